@@ -21,7 +21,6 @@ from typing import (
 )
 
 import numpy as np
-import plotly.graph_objects as go
 from nomad.datamodel.data import (
     ArchiveSection,
     EntryData,
@@ -39,7 +38,8 @@ from nomad.metainfo import (
     SubSection,
 )
 
-from schema_packages.utils import FabricationChemical
+from schema_packages.figures import figure_cache, figure_key
+from schema_packages.utils import FabricationChemical, plotly_graph_objects
 if TYPE_CHECKING:
     pass
 
@@ -204,70 +204,80 @@ class Rectangle(Contour):
     )
 
 
-def make_geometric_represent(chuck, x, y, finalist):
+def _geometric_figure_json(chuck, x, y):
     posizione_centro = [(x, y)]
+    go = plotly_graph_objects()
     # Chuck creation
     fig = go.Figure()
-    if chuck is not None:
-        if isinstance(chuck, Circle):
-            theta = np.linspace(0, 2 * np.pi, 100)
-            x_cerchio = chuck.radius * np.cos(theta)
-            y_cerchio = chuck.radius * np.sin(theta)
+    if isinstance(chuck, Circle):
+        theta = np.linspace(0, 2 * np.pi, 100)
+        x_cerchio = chuck.radius * np.cos(theta)
+        y_cerchio = chuck.radius * np.sin(theta)
+        fig.add_trace(
+            go.Scatter(
+                x=x_cerchio, y=y_cerchio, mode='lines', fill='toself', name='Chuck'
+            )
+        )
+    else:
+        if isinstance(chuck, Square):
+            half = chuck.side / 2
+            x_quad = [-half, half, half, -half, -half]
+            y_quad = [-half, -half, half, half, -half]
             fig.add_trace(
                 go.Scatter(
-                    x=x_cerchio, y=y_cerchio, mode='lines', fill='toself', name='Chuck'
+                    x=x_quad, y=y_quad, mode='lines', fill='toself', name='Chuck'
                 )
             )
-        else:
-            if isinstance(chuck, Square):
-                half = chuck.side / 2
-                x_quad = [-half, half, half, -half, -half]
-                y_quad = [-half, -half, half, half, -half]
-                fig.add_trace(
-                    go.Scatter(
-                        x=x_quad, y=y_quad, mode='lines', fill='toself', name='Chuck'
-                    )
-                )
-            if isinstance(chuck, Rectangle):
-                half_base = chuck.base / 2
-                half_height = chuck.height / 2
-                x_quad = [-half_base, half_base, half_base, -half_base, -half_base]
-                y_quad = [
-                    -half_height,
-                    -half_height,
-                    half_height,
-                    half_height,
-                    -half_height,
-                ]
-                fig.add_trace(
-                    go.Scatter(
-                        x=x_quad, y=y_quad, mode='lines', fill='toself', name='Chuck'
-                    )
-                )
-        for i, (x1, y1) in enumerate(posizione_centro):
+        if isinstance(chuck, Rectangle):
+            half_base = chuck.base / 2
+            half_height = chuck.height / 2
+            x_quad = [-half_base, half_base, half_base, -half_base, -half_base]
+            y_quad = [
+                -half_height,
+                -half_height,
+                half_height,
+                half_height,
+                -half_height,
+            ]
             fig.add_trace(
                 go.Scatter(
-                    x=[x1],
-                    y=[y1],
-                    mode='markers',
-                    marker=dict(size=10, color='red'),
-                    name=f'Quadratino {i + 1} centro',
+                    x=x_quad, y=y_quad, mode='lines', fill='toself', name='Chuck'
                 )
             )
-        fig.update_layout(
-            title='Item centering on chuck/chamber',
-            width=800,
-            height=800,
-        )
-        figure_json = fig.to_plotly_json()
-        figure_json['config'] = {'staticPlot': True}
-        finalist.append(
-            PlotlyFigure(
-                label='Chuck vision',
-                figure=figure_json,
-                index=0,
+    for i, (x1, y1) in enumerate(posizione_centro):
+        fig.add_trace(
+            go.Scatter(
+                x=[x1],
+                y=[y1],
+                mode='markers',
+                marker=dict(size=10, color='red'),
+                name=f'Quadratino {i + 1} centro',
             )
         )
+    fig.update_layout(
+        title='Item centering on chuck/chamber',
+        width=800,
+        height=800,
+    )
+    figure_json = fig.to_plotly_json()
+    figure_json['config'] = {'staticPlot': True}
+    return figure_json
+
+
+def make_geometric_represent(chuck, x, y, finalist):
+    if chuck is None:
+        return
+    key = figure_key('placement', chuck.m_def.name, chuck.m_to_dict(), x, y)
+    figure_json = figure_cache.get_or_build(
+        key, lambda: _geometric_figure_json(chuck, x, y)
+    )
+    finalist.append(
+        PlotlyFigure(
+            label='Chuck vision',
+            figure=figure_json,
+            index=0,
+        )
+    )
 
 
 class ItemPlacement(PlotSection, EntryData):
@@ -0,0 +1,233 @@
+#######################################################################################
+# Vectorized versions of the operations of the calculus sheets. Each function takes   #
+# columns of inputs (scalars, arrays, lists or pint quantities, with None for missing #
+# values) and returns the results of all rows at once as a pint quantity. Rows with   #
+# missing, non-finite or zero inputs are masked: their result is NaN.                 #
+#######################################################################################
+import warnings
+from statistics import NormalDist
+from typing import NamedTuple
+
+import numpy as np
+from nomad.units import ureg
+
+RATE_UNIT = 'nm/minute'
+STRESS_UNIT = 'GPa'
+STONEY_UNITS = (STRESS_UNIT, 'dimensionless', 'nm', 'nm', 'nm')
+CONFIDENCE_LEVEL = 0.95
+MONTE_CARLO_SAMPLES = 100_000
+MONTE_CARLO_SEED = 0
+
+
+class StressUncertainty(NamedTuple):
+    """
+    Stoney stress with its uncertainty: mean, standard deviation and the bounds of
+    the confidence interval, as pint quantities in GPa.
+    """
+
+    mean: object
+    standard_deviation: object
+    low: object
+    high: object
+
+
+def _magnitude(value, unit):
+    if value is None:
+        return np.nan
+    return value.m_as(unit) if hasattr(value, 'm_as') else value
+
+
+def column(values, unit):
+    """
+    Returns values as a float array in unit. Pint quantities are converted, plain
+    numbers are taken as already in unit and None becomes NaN.
+    """
+    if hasattr(values, 'm_as'):
+        return np.asarray(values.m_as(unit), dtype=np.float64)
+    if isinstance(values, (list, tuple)):
+        return np.array([_magnitude(value, unit) for value in values], dtype=np.float64)
+    return np.asarray(_magnitude(values, unit), dtype=np.float64)
+
+
+def _quantity(result, unit):
+    return ureg.Quantity(result[()] if result.ndim == 0 else result, unit)
+
+
+def _masked_ratio(numerator, denominator, valid, unit):
+    result = np.divide(
+        numerator,
+        denominator,
+        out=np.full(np.broadcast(numerator, denominator).shape, np.nan),
+        where=valid,
+    )
+    return _quantity(result, unit)
+
+
+def _usable(*columns):
+    valid = np.ones(np.broadcast(*columns).shape, dtype=bool)
+    for values in columns:
+        valid &= np.isfinite(values) & (values != 0)
+    return valid
+
+
+def etching_rate(depth, etching_time):
+    """
+    Returns etched depth over etching time in nm/minute.
+    """
+    depth, etching_time = column(depth, 'nm'), column(etching_time, 'minute')
+    return _masked_ratio(depth, etching_time, _usable(depth, etching_time), RATE_UNIT)
+
+
+def deposition_rate(thickness, deposition_time):
+    """
+    Returns deposited thickness over deposition time in nm/minute.
+    """
+    thickness, deposition_time = (
+        column(thickness, 'nm'),
+        column(deposition_time, 'minute'),
+    )
+    return _masked_ratio(
+        thickness, deposition_time, _usable(thickness, deposition_time), RATE_UNIT
+    )
+
+
+def _stoney_columns(values, missing=np.nan):
+    columns = [column(value, unit) for value, unit in zip(values, STONEY_UNITS)]
+    return [np.where(np.isnan(array), missing, array) for array in columns]
+
+
+def _stoney_valid(young, poisson, substrate, layer, radius):
+    return (
+        _usable(young, poisson, layer, radius) & np.isfinite(substrate) & (poisson != 1)
+    )
+
+
+def stoney_stress(  # noqa: PLR0917
+    young_modulus,
+    poisson_coefficient,
+    substrate_thickness,
+    layer_thickness,
+    curvature_radius,
+):
+    """
+    Returns the film stress in GPa given by the Stoney formula
+
+        sigma = E * D^2 / (6 * (1 - nu) * R * t)
+
+    with E and nu the Young modulus and Poisson coefficient of the substrate, D the
+    substrate thickness, t the layer thickness and R the curvature radius. Rows
+    with a missing substrate thickness, a Poisson coefficient of 1 or a zero or
+    missing E, nu, t or R are masked.
+    """
+    (
+        young_modulus,
+        poisson_coefficient,
+        substrate_thickness,
+        layer_thickness,
+        curvature_radius,
+    ) = _stoney_columns(
+        (
+            young_modulus,
+            poisson_coefficient,
+            substrate_thickness,
+            layer_thickness,
+            curvature_radius,
+        )
+    )
+    valid = _stoney_valid(
+        young_modulus,
+        poisson_coefficient,
+        substrate_thickness,
+        layer_thickness,
+        curvature_radius,
+    )
+    return _masked_ratio(
+        young_modulus * substrate_thickness**2,
+        6 * (1 - poisson_coefficient) * curvature_radius * layer_thickness,
+        valid,
+        STRESS_UNIT,
+    )
+
+
+def _confidence_interval(mean, standard_deviation, confidence):
+    half_width = NormalDist().inv_cdf((1 + confidence) / 2) * standard_deviation
+    return mean - half_width, mean + half_width
+
+
+def stoney_stress_first_order(values, uncertainties, confidence=CONFIDENCE_LEVEL):
+    """
+    Propagates the standard uncertainties of the Stoney inputs to first order.
+
+    values and uncertainties are the five columns taken by stoney_stress, in the
+    same order; missing uncertainties count as zero. The interval is the normal
+    one around the Stoney stress at the given confidence level.
+    """
+    young, poisson, substrate, layer, radius = _stoney_columns(values)
+    errors = _stoney_columns(uncertainties, missing=0.0)
+    stress = stoney_stress(*values).m_as(STRESS_UNIT)
+    denominator = 6 * (1 - poisson) * radius * layer
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # partial derivatives of the stress, NaN on masked rows like the stress
+        gradient = (
+            substrate**2 / denominator,
+            stress / (1 - poisson),
+            2 * young * substrate / denominator,
+            -stress / layer,
+            -stress / radius,
+        )
+    variance = sum((slope * error) ** 2 for slope, error in zip(gradient, errors))
+    standard_deviation = np.sqrt(variance)
+    low, high = _confidence_interval(stress, standard_deviation, confidence)
+    return StressUncertainty(
+        *(
+            _quantity(np.asarray(result), STRESS_UNIT)
+            for result in (stress, standard_deviation, low, high)
+        )
+    )
+
+
+def stoney_stress_monte_carlo(
+    values,
+    uncertainties,
+    confidence=CONFIDENCE_LEVEL,
+    samples=MONTE_CARLO_SAMPLES,
+    seed=MONTE_CARLO_SEED,
+):
+    """
+    Propagates the standard uncertainties of the Stoney inputs by Monte Carlo.
+
+    Each input is drawn from a normal distribution around its value with its
+    uncertainty as standard deviation (missing uncertainties count as zero), for
+    every row at once on a (rows, samples) grid. The interval is given by the
+    quantiles of the sampled stresses. The generator is seeded, so normalizing
+    the same sheet again gives the same results.
+    """
+    columns = np.broadcast_arrays(*_stoney_columns(values))
+    errors = np.broadcast_arrays(*_stoney_columns(uncertainties, missing=0.0))
+    shape = np.broadcast(columns[0], errors[0]).shape
+    valid = _stoney_valid(*columns).reshape(-1, 1)
+    generator = np.random.default_rng(seed)
+    young, poisson, substrate, layer, radius = (
+        generator.normal(
+            np.broadcast_to(value, shape).reshape(-1, 1),
+            np.broadcast_to(error, shape).reshape(-1, 1),
+            (int(np.prod(shape)), samples),
+        )
+        for value, error in zip(columns, errors)
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stress = young * substrate**2 / (6 * (1 - poisson) * radius * layer)
+    stress = np.where(valid & np.isfinite(stress), stress, np.nan)
+    tail = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        # masked rows are all NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(stress, axis=1)
+        standard_deviation = np.nanstd(stress, axis=1)
+        low, high = np.nanquantile(stress, [tail, 1 - tail], axis=1)
+    return StressUncertainty(
+        *(
+            _quantity(result.reshape(shape), STRESS_UNIT)
+            for result in (mean, standard_deviation, low, high)
+        )
+    )
@@ -1,234 +1,588 @@
-#######################################################################################
-#######################################################################################
-# In this file will be defined entities which will be used to perform some operations #
-# on data. In particular, we will define structures within some inputs are passed and #
-# through the normalization method will give as output the properties to evaluate.    #
-#######################################################################################
-#######################################################################################
-from typing import (
-    TYPE_CHECKING,
-)
-
-import numpy as np
-from nomad.datamodel.data import ArchiveSection, EntryData
-from nomad.metainfo import (
-    Datetime,
-    Package,
-    Quantity,
-    Section,
-    SubSection,
-)
-from schema_packages.fabrication_utilities import (
-    FabricationProcessStep,
-)
-
-if TYPE_CHECKING:
-    from nomad.datamodel.datamodel import (
-        EntryArchive,
-    )
-    from structlog.stdlib import (
-        BoundLogger,
-    )
-
-m_package = Package(name='Definitions for usual operation of analysis')
-
-
-class BaseCalculusSheet(EntryData, ArchiveSection):
-    m_def = Section()
-
-    name = Quantity(type=str, a_eln={'component': 'StringEditQuantity'})
-
-    ID = Quantity(type=str, a_eln={'component': 'StringEditQuantity'})
-
-    datetime = Quantity(
-        type=Datetime,
-        a_eln={'component': 'DateTimeEditQuantity'},
-    )
-
-    notes = Quantity(type=str, a_eln={'component': 'RichTextEditQuantity'})
-
-    location = Quantity(type=str, a_eln={'component': 'StringEditQuantity'})
-
-
-class EtchingRateOutput(ArchiveSection):
-    m_def = Section()
-
-    etching_rate_value = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm/minute'},
-        unit='nm/minute',
-    )
-
-
-class EtchingRateInputs(ArchiveSection):
-    m_def = Section()
-
-    etching_time = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'minute'},
-        unit='minute',
-    )
-    etching_time_reference = Quantity(
-        type=FabricationProcessStep,
-        a_eln={'component': 'ReferenceEditQuantity'},
-    )
-    depth = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
-        unit='nm',
-    )
-    depth_reference = Quantity(
-        type=FabricationProcessStep,
-        a_eln={'component': 'ReferenceEditQuantity'},
-    )
-
-
-class EtchingRate(BaseCalculusSheet):
-    m_def = Section()
-
-    inputs = SubSection(section_def=EtchingRateInputs, repeats=False)
-
-    output = SubSection(section_def=EtchingRateOutput, repeats=False)
-
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        if self.inputs is not None:
-            if self.inputs.depth and self.inputs.etching_time != 0:
-                self.output = EtchingRateOutput()
-                self.output.etching_rate_value = (
-                    self.inputs.depth / self.inputs.etching_time
-                )
-
-
-class DepositionRateOutput(ArchiveSection):
-    m_def = Section()
-
-    deposition_rate_value = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm/minute'},
-        unit='nm/minute',
-    )
-
-
-class DepositionRateInputs(ArchiveSection):
-    m_def = Section()
-
-    deposition_time = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'minute'},
-        unit='minute',
-    )
-    deposition_time_reference = Quantity(
-        type=FabricationProcessStep,
-        a_eln={'component': 'ReferenceEditQuantity'},
-    )
-    thickness = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
-        unit='nm',
-    )
-    thickness_reference = Quantity(
-        type=FabricationProcessStep,
-        a_eln={'component': 'ReferenceEditQuantity'},
-    )
-
-
-class DepositionRate(BaseCalculusSheet):
-    m_def = Section()
-
-    inputs = SubSection(section_def=DepositionRateInputs, repeats=False)
-
-    output = SubSection(section_def=DepositionRateOutput, repeats=False)
-
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        if self.inputs is not None:
-            if self.inputs.thickness and self.inputs.deposition_time != 0:
-                self.output = DepositionRateOutput()
-                self.output.deposition_rate_value = (
-                    self.inputs.thickness / self.inputs.deposition_time
-                )
-
-
-class StressPropertiesOutput(ArchiveSection):
-    m_def = Section()
-
-    stress_value = Quantity(
-        type=np.float64,
-        unit='GPa',
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
-    )
-
-
-class StressPropertiesInputs(ArchiveSection):
-    m_def = Section()
-
-    substrate_thickness = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
-        unit='nm',
-    )
-
-    substrate_thickness_reference = Quantity(
-        type=FabricationProcessStep, a_eln={'component': 'ReferenceEditQuantity'}
-    )
-
-    layer_thickness = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
-        unit='nm',
-    )
-
-    layer_thickness_reference = Quantity(
-        type=FabricationProcessStep, a_eln={'component': 'ReferenceEditQuantity'}
-    )
-
-    curvature_radius = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
-        unit='nm',
-    )
-
-    curvature_radius_reference = Quantity(
-        type=FabricationProcessStep, a_eln={'component': 'ReferenceEditQuantity'}
-    )
-
-
-class StressParametersAdopted(ArchiveSection):
-    m_def = Section()
-
-    assumed_Young_module_of_the_substrate = Quantity(
-        type=np.float64,
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
-        unit='GPa',
-    )
-
-    assumed_Poisson_coefficient = Quantity(
-        type=np.float64, a_eln={'component': 'NumberEditQuantity'}
-    )
-
-
-class StressProperties(BaseCalculusSheet):
-    m_def = Section(
-        description="""
-        Calculus sheet to evaluate some stress properties thanks to the Stoney formula
-        """
-    )
-
-    inputs = SubSection(section_def=StressPropertiesInputs, repeats=False)
-
-    parameters = SubSection(section_def=StressParametersAdopted, repeats=False)
-
-    output = SubSection(section_def=StressPropertiesOutput, repeats=False)
-
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        if self.parameters.assumed_Poisson_coefficient is not None:
-            pois = self.parameters.assumed_Poisson_coefficient
-        if self.parameters.assumed_Young_module_of_the_substrate is not None:
-            young = self.parameters.assumed_Young_module_of_the_substrate
-        if self.inputs is not None and pois and young:
-            if self.inputs.curvature_radius and self.inputs.layer_thickness:
-                R = self.inputs.curvature_radius
-                t = self.inputs.layer_thickness
-                if self.inputs.substrate_thickness is not None and R != 0 and t != 0:
-                    D = self.inputs.substrate_thickness
-                    self.output = StressPropertiesOutput()
-                    self.output.stress_value = young * D * D / (6 * (1 - pois) * R * t)
+#######################################################################################
+#######################################################################################
+# In this file will be defined entities which will be used to perform some operations #
+# on data. In particular, we will define structures within some inputs are passed and #
+# through the normalization method will give as output the properties to evaluate.    #
+#######################################################################################
+#######################################################################################
+from typing import (
+    TYPE_CHECKING,
+)
+
+import numpy as np
+from nomad.datamodel.data import ArchiveSection, EntryData
+from nomad.metainfo import (
+    Datetime,
+    MEnum,
+    MetainfoReferenceError,
+    MProxy,
+    Package,
+    Quantity,
+    Section,
+    SubSection,
+)
+from nomad.units import ureg
+from schema_packages.calculus.batch import (
+    CONFIDENCE_LEVEL,
+    MONTE_CARLO_SAMPLES,
+    deposition_rate,
+    etching_rate,
+    stoney_stress,
+    stoney_stress_first_order,
+    stoney_stress_monte_carlo,
+)
+from schema_packages.calculus.graph import DependencyGraph
+from schema_packages.fabrication_utilities import (
+    FabricationProcessStep,
+)
+from schema_packages.references import prefetch_archive_references
+from schema_packages.utils import reference_key, step_value
+
+if TYPE_CHECKING:
+    from nomad.datamodel.datamodel import (
+        EntryArchive,
+    )
+    from structlog.stdlib import (
+        BoundLogger,
+    )
+
+m_package = Package(name='Definitions for usual operation of analysis')
+
+DURATION_QUANTITIES = ('duration_measured', 'duration_target')
+THICKNESS_QUANTITIES = ('thickness_measured', 'thickness_target')
+DEPTH_QUANTITIES = ('depth_target',)
+STONEY_NODES = (
+    'parameters.assumed_Young_module_of_the_substrate',
+    'parameters.assumed_Poisson_coefficient',
+    'inputs.substrate_thickness',
+    'inputs.layer_thickness',
+    'inputs.curvature_radius',
+)
+STONEY_UNCERTAINTY_NODES = (
+    'parameters.Young_module_uncertainty',
+    'parameters.Poisson_coefficient_uncertainty',
+    'inputs.substrate_thickness_uncertainty',
+    'inputs.layer_thickness_uncertainty',
+    'inputs.curvature_radius_uncertainty',
+)
+PROPAGATION_NODES = (
+    'parameters.uncertainty_propagation',
+    'parameters.monte_carlo_samples',
+    'parameters.confidence_level',
+)
+
+
+def resolve_reference(archive, reference):
+    """
+    Returns the section a reference points to. Targets are cached in the m_cache of
+    the archive being normalized, so inputs referencing the same process step load
+    it once per normalization, and the archives referenced by the sheet are all
+    loaded in one bulk read before the first one is resolved.
+    """
+    if not isinstance(reference, MProxy):
+        return reference
+    cache = archive.m_cache.setdefault('calculus_references', {})
+    if reference.m_proxy_value not in cache:
+        prefetch_archive_references(archive)
+        cache[reference.m_proxy_value] = reference.m_proxy_resolve()
+    return cache[reference.m_proxy_value]
+
+
+def finite(value):
+    """
+    Returns value, or None when its magnitude is not finite.
+    """
+    if value is None or not np.all(np.isfinite(getattr(value, 'magnitude', value))):
+        return None
+    return value
+
+
+def propagation_error(samples, confidence):
+    """
+    Returns why the number of Monte Carlo samples or the confidence level cannot
+    be used, None when both can. Unset ones take their default.
+    """
+    if confidence is not None and not 0 < confidence < 1:
+        return 'the confidence level must be between 0 and 1'
+    if samples is not None and samples <= 0:
+        return 'the number of Monte Carlo samples must be positive'
+    return None
+
+
+class ReferencedInputs(ArchiveSection):
+    """
+    Base of the inputs of calculus sheets that can be read from the referenced
+    process steps. input_references lists, for each input, the quantity holding
+    the reference and the quantities of the step to read, in order of preference.
+    Inputs given by hand are kept; inputs read from a step are listed in
+    read_from_references and read again at each normalization, so that they
+    follow the changes of the step.
+    """
+
+    m_def = Section()
+
+    input_references = ()
+
+    read_from_references = Quantity(
+        type=str,
+        shape=['*'],
+        description="""
+        Inputs read from the referenced process steps, read again at each
+        normalization while their reference is set
+        """,
+    )
+
+    def resolve_references(self, archive, logger):
+        read = list(self.read_from_references or [])
+        for quantity, reference_quantity, step_quantities in self.input_references:
+            reference = getattr(self, reference_quantity)
+            if reference is None or (
+                getattr(self, quantity) is not None and quantity not in read
+            ):
+                continue
+            try:
+                step = resolve_reference(archive, reference)
+            except MetainfoReferenceError as e:
+                logger.warning(
+                    'could not resolve the referenced process step',
+                    quantity=reference_quantity,
+                    exc_info=e,
+                )
+                continue
+            value = step_value(step, step_quantities)
+            if value is None:
+                logger.warning(
+                    'the referenced process step has none of the quantities read',
+                    quantity=reference_quantity,
+                    step_quantities=step_quantities,
+                )
+                continue
+            setattr(self, quantity, value)
+            if quantity not in read:
+                read.append(quantity)
+        if read:
+            self.read_from_references = read
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        super().normalize(archive, logger)
+        self.resolve_references(archive, logger)
+
+
+class BaseCalculusSheet(EntryData, ArchiveSection):
+    """
+    Base of the calculus sheets. Subclasses list in calculations, for each method
+    filling the output, its name, the nodes it takes (quantities of inputs and
+    parameters written as 'inputs.depth') and the output quantities it returns.
+
+    Nodes and calculations form the DependencyGraph kept in m_cache: normalizing
+    again only runs the calculations downstream of the nodes that changed. The
+    references of the inputs are nodes too, triggering the calculations using the
+    inputs read from them.
+    """
+
+    m_def = Section()
+
+    calculations = ()
+
+    name = Quantity(type=str, a_eln={'component': 'StringEditQuantity'})
+
+    ID = Quantity(type=str, a_eln={'component': 'StringEditQuantity'})
+
+    datetime = Quantity(
+        type=Datetime,
+        a_eln={'component': 'DateTimeEditQuantity'},
+    )
+
+    notes = Quantity(type=str, a_eln={'component': 'RichTextEditQuantity'})
+
+    location = Quantity(type=str, a_eln={'component': 'StringEditQuantity'})
+
+    def sub_section_class(self, name):
+        return self.m_def.all_sub_sections[name].sub_section.section_cls
+
+    def reference_nodes(self, nodes):
+        references = []
+        for node in nodes:
+            section_name, quantity = node.split('.')
+            section_cls = self.sub_section_class(section_name)
+            for name, reference_quantity, _ in getattr(
+                section_cls, 'input_references', ()
+            ):
+                if name == quantity:
+                    references.append(f'{section_name}.{reference_quantity}')
+        return references
+
+    def calculus_graph(self):
+        """
+        Returns the dependency graph of the sheet, whose dirty flags tell which
+        nodes changed and which calculations will run at the next normalization.
+        """
+        graph = self.m_cache.get('calculus_graph')
+        if graph is None:
+            graph = self.m_cache['calculus_graph'] = DependencyGraph()
+            for name, nodes, _ in self.calculations:
+                graph.add(name, nodes, getattr(self, name), self.reference_nodes(nodes))
+        return graph
+
+    def node_value(self, node):
+        section_name, quantity = node.split('.')
+        section = getattr(self, section_name)
+        if section is None:
+            return None
+        value = getattr(section, quantity)
+        references = getattr(section, 'input_references', ())
+        if quantity in (reference for _, reference, _ in references):
+            return reference_key(value)
+        return value
+
+    def write_output(self, name, values):
+        quantities = next(q for n, _, q in self.calculations if n == name)
+        for quantity, value in zip(quantities, values):
+            if value is not None and self.output is None:
+                self.output = self.sub_section_class('output')()
+            if self.output is not None:
+                setattr(self.output, quantity, value)
+
+    def update_calculus_graph(self):
+        """
+        Passes the current values of the nodes to the dependency graph and returns
+        it, flagging the changed nodes and the calculations downstream as dirty.
+        """
+        graph = self.calculus_graph()
+        graph.update({node: self.node_value(node) for node in graph.sources})
+        return graph
+
+    def update_outputs(self):
+        """
+        Runs the calculations downstream of the changed nodes and writes their
+        results to the output, returning the names of the calculations run.
+        """
+        graph = self.update_calculus_graph()
+        if self.output is None:
+            graph.invalidate()
+        recomputed = graph.compute()
+        for name in recomputed:
+            self.write_output(name, graph.results[name])
+        return recomputed
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        super().normalize(archive, logger)
+        self.update_outputs()
+
+
+class EtchingRateOutput(ArchiveSection):
+    m_def = Section()
+
+    etching_rate_value = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm/minute'},
+        unit='nm/minute',
+    )
+
+
+class EtchingRateInputs(ReferencedInputs):
+    m_def = Section()
+
+    input_references = (
+        ('etching_time', 'etching_time_reference', DURATION_QUANTITIES),
+        ('depth', 'depth_reference', DEPTH_QUANTITIES),
+    )
+
+    etching_time = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'minute'},
+        unit='minute',
+    )
+    etching_time_reference = Quantity(
+        type=FabricationProcessStep,
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+    depth = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+    depth_reference = Quantity(
+        type=FabricationProcessStep,
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+
+
+class EtchingRate(BaseCalculusSheet):
+    m_def = Section()
+
+    inputs = SubSection(section_def=EtchingRateInputs, repeats=False)
+
+    output = SubSection(section_def=EtchingRateOutput, repeats=False)
+
+    calculations = (
+        (
+            'calculate_etching_rate',
+            ('inputs.depth', 'inputs.etching_time'),
+            ('etching_rate_value',),
+        ),
+    )
+
+    def calculate_etching_rate(self, depth, etching_time):
+        return (finite(etching_rate(depth, etching_time)),)
+
+
+class DepositionRateOutput(ArchiveSection):
+    m_def = Section()
+
+    deposition_rate_value = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm/minute'},
+        unit='nm/minute',
+    )
+
+
+class DepositionRateInputs(ReferencedInputs):
+    m_def = Section()
+
+    input_references = (
+        ('deposition_time', 'deposition_time_reference', DURATION_QUANTITIES),
+        ('thickness', 'thickness_reference', THICKNESS_QUANTITIES),
+    )
+
+    deposition_time = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'minute'},
+        unit='minute',
+    )
+    deposition_time_reference = Quantity(
+        type=FabricationProcessStep,
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+    thickness = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+    thickness_reference = Quantity(
+        type=FabricationProcessStep,
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+
+
+class DepositionRate(BaseCalculusSheet):
+    m_def = Section()
+
+    inputs = SubSection(section_def=DepositionRateInputs, repeats=False)
+
+    output = SubSection(section_def=DepositionRateOutput, repeats=False)
+
+    calculations = (
+        (
+            'calculate_deposition_rate',
+            ('inputs.thickness', 'inputs.deposition_time'),
+            ('deposition_rate_value',),
+        ),
+    )
+
+    def calculate_deposition_rate(self, thickness, deposition_time):
+        return (finite(deposition_rate(thickness, deposition_time)),)
+
+
+class StressPropertiesOutput(ArchiveSection):
+    m_def = Section()
+
+    stress_value = Quantity(
+        type=np.float64,
+        unit='GPa',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
+    )
+
+    stress_mean = Quantity(
+        type=np.float64,
+        description='Mean stress given the uncertainties of inputs and parameters',
+        unit='GPa',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
+    )
+
+    stress_standard_deviation = Quantity(
+        type=np.float64,
+        unit='GPa',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
+    )
+
+    stress_confidence_interval = Quantity(
+        type=np.float64,
+        shape=[2],
+        description='Lower and upper bound of the stress at the confidence level',
+        unit='GPa',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
+    )
+
+
+class StressPropertiesInputs(ReferencedInputs):
+    m_def = Section()
+
+    input_references = (
+        ('substrate_thickness', 'substrate_thickness_reference', THICKNESS_QUANTITIES),
+        ('layer_thickness', 'layer_thickness_reference', THICKNESS_QUANTITIES),
+    )
+
+    substrate_thickness = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+
+    substrate_thickness_reference = Quantity(
+        type=FabricationProcessStep, a_eln={'component': 'ReferenceEditQuantity'}
+    )
+
+    substrate_thickness_uncertainty = Quantity(
+        type=np.float64,
+        description='Standard uncertainty of the substrate thickness',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+
+    layer_thickness = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+
+    layer_thickness_reference = Quantity(
+        type=FabricationProcessStep, a_eln={'component': 'ReferenceEditQuantity'}
+    )
+
+    layer_thickness_uncertainty = Quantity(
+        type=np.float64,
+        description='Standard uncertainty of the layer thickness',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+
+    curvature_radius = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+
+    curvature_radius_reference = Quantity(
+        type=FabricationProcessStep, a_eln={'component': 'ReferenceEditQuantity'}
+    )
+
+    curvature_radius_uncertainty = Quantity(
+        type=np.float64,
+        description='Standard uncertainty of the curvature radius',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'nm'},
+        unit='nm',
+    )
+
+
+class StressParametersAdopted(ArchiveSection):
+    m_def = Section()
+
+    assumed_Young_module_of_the_substrate = Quantity(
+        type=np.float64,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
+        unit='GPa',
+    )
+
+    assumed_Poisson_coefficient = Quantity(
+        type=np.float64, a_eln={'component': 'NumberEditQuantity'}
+    )
+
+    Young_module_uncertainty = Quantity(
+        type=np.float64,
+        description='Standard uncertainty of the Young module of the substrate',
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'GPa'},
+        unit='GPa',
+    )
+
+    Poisson_coefficient_uncertainty = Quantity(
+        type=np.float64,
+        description='Standard uncertainty of the Poisson coefficient',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+
+    uncertainty_propagation = Quantity(
+        type=MEnum(['Monte Carlo', 'first order']),
+        description="""
+        How uncertainties are propagated to the stress, Monte Carlo by default
+        """,
+        a_eln={'component': 'EnumEditQuantity'},
+    )
+
+    monte_carlo_samples = Quantity(
+        type=int,
+        description=f'Number of Monte Carlo samples, {MONTE_CARLO_SAMPLES} by default',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+
+    confidence_level = Quantity(
+        type=np.float64,
+        description=f'Confidence level of the interval, {CONFIDENCE_LEVEL} by default',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+
+
+class StressProperties(BaseCalculusSheet):
+    m_def = Section(
+        description="""
+        Calculus sheet to evaluate some stress properties thanks to the Stoney formula
+        """
+    )
+
+    inputs = SubSection(section_def=StressPropertiesInputs, repeats=False)
+
+    parameters = SubSection(section_def=StressParametersAdopted, repeats=False)
+
+    output = SubSection(section_def=StressPropertiesOutput, repeats=False)
+
+    calculations = (
+        ('calculate_stress', STONEY_NODES, ('stress_value',)),
+        (
+            'calculate_stress_uncertainty',
+            STONEY_NODES + STONEY_UNCERTAINTY_NODES + PROPAGATION_NODES,
+            ('stress_mean', 'stress_standard_deviation', 'stress_confidence_interval'),
+        ),
+    )
+
+    def calculate_stress(self, *values):
+        return (finite(stoney_stress(*values)),)
+
+    def calculate_stress_uncertainty(self, *nodes):
+        """
+        Returns mean, standard deviation and confidence interval of the stress,
+        all None when no uncertainty is given or the parameters of the propagation
+        cannot be used (see propagation_error).
+        """
+        count = len(STONEY_NODES)
+        values, uncertainties = nodes[:count], nodes[count : 2 * count]
+        propagation, samples, confidence = nodes[2 * count :]
+        if all(uncertainty is None for uncertainty in uncertainties):
+            return (None, None, None)
+        if propagation_error(samples, confidence) is not None:
+            return (None, None, None)
+        if confidence is None:
+            confidence = CONFIDENCE_LEVEL
+        if propagation == 'first order':
+            result = stoney_stress_first_order(values, uncertainties, confidence)
+        else:
+            result = stoney_stress_monte_carlo(
+                values,
+                uncertainties,
+                confidence,
+                samples=MONTE_CARLO_SAMPLES if samples is None else samples,
+            )
+        interval = finite(
+            ureg.Quantity([result.low.m_as('GPa'), result.high.m_as('GPa')], 'GPa')
+        )
+        return (finite(result.mean), finite(result.standard_deviation), interval)
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        if self.parameters is not None:
+            error = propagation_error(
+                self.parameters.monte_carlo_samples, self.parameters.confidence_level
+            )
+            if error is not None:
+                logger.warning(
+                    'could not propagate the stress uncertainties', reason=error
+                )
+        super().normalize(archive, logger)
@@ -0,0 +1,138 @@
+#######################################################################################
+# Dependency tracking of the calculus sheets. Inputs, references and parameters are  #
+# source nodes of a graph whose other nodes are the computations of the sheet. Each  #
+# update compares the sources with the fingerprints of the previous one, flags the   #
+# changed ones and everything downstream as dirty, and only dirty computations run.  #
+#######################################################################################
+from collections import defaultdict
+from graphlib import TopologicalSorter
+
+from schema_packages.hashing import content_hash
+
+
+def fingerprint(value):
+    """
+    Returns the digest a source value is compared on (see hashing.content_hash):
+    arrays on content, pint quantities on magnitude and unit.
+    """
+    return content_hash('node', value)
+
+
+class DependencyGraph:
+    """
+    Graph of the computations of a calculus sheet.
+
+    Computations are added with add(name, dependencies, function, triggers):
+    dependencies are names of source nodes or of other computations, and function
+    is called with their values in that order; triggers are nodes whose changes
+    make the computation dirty without being passed to it. Sources are the nodes
+    that are not computations; their values are given to update, which flags as
+    dirty the changed sources and all computations downstream of them. compute
+    runs the dirty computations in dependency order and keeps their results in
+    results.
+    """
+
+    def __init__(self):
+        self.computations = {}
+        self.results = {}
+        self.values = {}
+        self.fingerprints = {}
+        self.dirty = set()
+        self.recomputed = []
+        self._dependents = defaultdict(set)
+        self._triggers = {}
+        self._order = None
+
+    @property
+    def sources(self):
+        """
+        Names of the source nodes, in order of first use.
+        """
+        names = {}
+        for name, (dependencies, _) in self.computations.items():
+            for node in (*dependencies, *self._triggers[name]):
+                if node not in self.computations:
+                    names[node] = None
+        return list(names)
+
+    def add(self, name, dependencies, function, triggers=()):
+        if name in self.computations:
+            raise ValueError(f'Computation {name!r} is already in the graph')
+        self.computations[name] = (tuple(dependencies), function)
+        self._triggers[name] = tuple(triggers)
+        for dependency in (*dependencies, *triggers):
+            self._dependents[dependency].add(name)
+        self._order = None
+        self.dirty.add(name)
+
+    def order(self):
+        """
+        Returns the names of the computations in dependency order.
+        """
+        if self._order is None:
+            sorter = TopologicalSorter(
+                {
+                    name: [
+                        node
+                        for node in (*dependencies, *self._triggers[name])
+                        if node in self.computations
+                    ]
+                    for name, (dependencies, _) in self.computations.items()
+                }
+            )
+            self._order = list(sorter.static_order())
+        return self._order
+
+    def downstream(self, names):
+        """
+        Returns the computations depending, directly or not, on any of names.
+        """
+        found = set()
+        pending = list(names)
+        while pending:
+            for dependent in self._dependents[pending.pop()]:
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+        return found
+
+    def invalidate(self, names=None):
+        """
+        Flags names, all computations by default, and their dependents as dirty.
+        """
+        names = set(self.computations if names is None else names)
+        self.dirty |= names | self.downstream(names)
+
+    def update(self, values):
+        """
+        Sets the values of source nodes and flags as dirty the changed ones and
+        their dependents. Sources missing from values keep their last value.
+        Returns the set of changed sources.
+        """
+        changed = set()
+        for name, value in values.items():
+            digest = fingerprint(value)
+            if self.fingerprints.get(name) != digest or name not in self.values:
+                self.fingerprints[name] = digest
+                changed.add(name)
+            self.values[name] = value
+        self.invalidate(changed)
+        return changed
+
+    def is_dirty(self, name):
+        return name in self.dirty
+
+    def compute(self):
+        """
+        Runs the dirty computations in dependency order and returns their names.
+        """
+        self.recomputed = [name for name in self.order() if name in self.dirty]
+        for name in self.recomputed:
+            dependencies, function = self.computations[name]
+            arguments = [
+                self.results.get(d) if d in self.computations else self.values.get(d)
+                for d in dependencies
+            ]
+            self.results[name] = function(*arguments)
+        self.dirty.clear()
+        return self.recomputed
@@ -0,0 +1,295 @@
+#######################################################################################
+# Capabilities of the equipment. Tools are indexed by kind, and the min_/max_         #
+# quantities of each tool by parameter in arrays sorted by lower bound. A step is     #
+# compared with the tools of its kind only, by intersecting sorted sets of tool       #
+# indices: the tools whose ranges contain a setpoint are a prefix of the sorted       #
+# bounds, found by bisection, kept where their upper bound is high enough.            #
+#######################################################################################
+from typing import NamedTuple
+
+import numpy as np
+
+# Step sections and the equipment able to run them, subclasses included. The most
+# derived section of a step found here decides.
+STEP_EQUIPMENT = {
+    'DRIE_BOSCH': 'DRIE_BOSCH_Etcher',
+    'ICP_RIE': 'ICP_RIE_Etcher',
+    'RIE': 'RIE_Etcher',
+    'ICP_CVD': 'ICP_CVD_System',
+    'PECVD': 'PECVD_System',
+    'LPCVD': 'LPCVD_System',
+    'sputtering_catania': 'sputtering_catania_System',
+    'Spin_Coating': 'SpinCoater',
+    'SpinResistDevelopment': 'ResistSpinDeveloper',
+    'ResistDevelopment': 'ResistDeveloper',
+    'Rinsing_Drying': 'Rinser_Dryer',
+    'Baking': 'BakingFurnace',
+    'FIB': 'FocusedIonBeamLithographer',
+    'EBL': 'ElectronBeamLithographer',
+    'WetEtching': 'Wet_Bench_Unit',
+    'WetCleaning': 'Wet_Bench_Unit',
+}
+# Setpoints of steps checked against a capability of another name
+PARAMETER_ALIASES = {
+    'deposition_pressure': 'chamber_pressure',
+    'high_chuck_power': 'chuck_power',
+    'low_chuck_power': 'chuck_power',
+    'chuck_high_frequency': 'chuck_frequency',
+    'chuck_low_frequency': 'chuck_frequency',
+    'active_state_massflow': 'massflow',
+    'inactive_state_massflow': 'massflow',
+    'tank_temperature': 'bath_temperature',
+}
+# Parameters given per gas: a tool without the gas cannot run the step
+GAS_PARAMETERS = ('massflow',)
+# Subsections holding records rather than setpoints or capabilities
+RECORD_SUB_SECTIONS = ('outputs', 'users', 'equipmentLogBook', 'permittedItems')
+
+
+class ParameterRange(NamedTuple):
+    """
+    Setpoint of a step out of the range of a tool. value_min and value_max are
+    the extreme setpoints of the step, low and high the bounds of the tool (NaN
+    when the tool lacks the gas), in base SI units.
+    """
+
+    value_min: float
+    value_max: float
+    low: float
+    high: float
+
+
+class CapabilityMatch(NamedTuple):
+    """
+    Comparison of a step with a tool. outside gives the ParameterRange of the
+    setpoints out of range by parameter, unchecked the parameters of the step the
+    tool declares no range for.
+    """
+
+    equipment: object
+    runnable: bool
+    outside: dict
+    unchecked: tuple
+
+
+def _base(value):
+    if hasattr(value, 'to_base_units'):
+        value = value.to_base_units().magnitude
+    return float(value)
+
+
+def _gas(section):
+    return getattr(section, 'chemical_formula', None) or getattr(section, 'name', None)
+
+
+def _numbers(section):
+    """
+    Yields the (name, value in base SI units, section) of the scalar numbers set
+    on a section and its subsections, leaving out RECORD_SUB_SECTIONS.
+    """
+    for name, quantity in section.m_def.all_quantities.items():
+        if quantity.shape or not section.m_is_set(quantity):
+            continue
+        value = section.m_get(quantity)
+        if isinstance(value, (bool, str)) or value is None:
+            continue
+        try:
+            yield name, _base(value), section
+        except (TypeError, ValueError):
+            continue
+    for name, sub_section in section.m_def.all_sub_sections.items():
+        if name in RECORD_SUB_SECTIONS:
+            continue
+        for child in section.m_get_sub_sections(sub_section):
+            yield from _numbers(child)
+
+
+def _parameter(name, section):
+    if name in GAS_PARAMETERS:
+        return f'{name}/{_gas(section)}'
+    return name
+
+
+def section_names(section):
+    """
+    Returns the names of the section definition of section and of its bases.
+    """
+    return [section.m_def.name] + [
+        base.name for base in section.m_def.all_base_sections
+    ]
+
+
+def step_setpoints(step):
+    """
+    Returns the (min, max) of the setpoints of a step and its substeps by
+    parameter, in base SI units. Massflows are given per gas, as massflow/<gas>.
+    """
+    setpoints = {}
+    for name, value, section in _numbers(step):
+        parameter = _parameter(PARAMETER_ALIASES.get(name, name), section)
+        low, high = setpoints.get(parameter, (value, value))
+        setpoints[parameter] = (min(low, value), max(high, value))
+    return setpoints
+
+
+def equipment_capabilities(equipment):
+    """
+    Returns the (low, high) range of each parameter of a tool from its min_ and
+    max_ quantities, in base SI units, -inf or inf for a missing bound.
+    """
+    bounds = {}
+    for name, value, section in _numbers(equipment):
+        side, _, parameter = name.partition('_')
+        if side not in {'min', 'max'} or not parameter:
+            continue
+        parameter = _parameter(parameter, section)
+        low, high = bounds.get(parameter, (np.inf, -np.inf))
+        if side == 'min':
+            low = min(low, value)
+        else:
+            high = max(high, value)
+        bounds[parameter] = (low, high)
+    return {
+        parameter: (
+            -np.inf if low == np.inf else low,
+            np.inf if high == -np.inf else high,
+        )
+        for parameter, (low, high) in bounds.items()
+    }
+
+
+class ParameterIndex:
+    """
+    Ranges of one parameter over the tools declaring it, sorted by lower bound.
+    declared holds the same tools sorted by index, positions their position in
+    the bounds.
+    """
+
+    def __init__(self, tools, lows, highs):
+        order = np.argsort(lows, kind='stable')
+        self.tools = np.asarray(tools, dtype=np.int64)[order]
+        self.lows = np.asarray(lows, dtype=float)[order]
+        self.highs = np.asarray(highs, dtype=float)[order]
+        self.declared = np.sort(self.tools)
+        self.positions = {
+            int(tool): position for position, tool in enumerate(self.tools)
+        }
+
+    def bounds(self, tool):
+        position = self.positions[tool]
+        return float(self.lows[position]), float(self.highs[position])
+
+    def containing(self, low, high):
+        """
+        Returns the tools whose range contains [low, high], sorted. Bisection
+        finds the tools whose lower bound is low enough; their upper bounds are
+        then compared one by one.
+        """
+        end = np.searchsorted(self.lows, low, side='right')
+        return np.sort(self.tools[:end][self.highs[:end] >= high])
+
+
+class CapabilityIndex:
+    """
+    Index of the capabilities of a set of tools, answering which of them can run
+    a step and which setpoints fall outside the ranges of the others. Tools are
+    indexed by the names of their section and its bases, so that a step is only
+    compared with the tools of its kind.
+    """
+
+    def __init__(self, equipments):
+        self.equipments = list(equipments)
+        kinds, ranges = {}, {}
+        for tool, equipment in enumerate(self.equipments):
+            for name in section_names(equipment):
+                kinds.setdefault(name, []).append(tool)
+            for parameter, (low, high) in equipment_capabilities(equipment).items():
+                ranges.setdefault(parameter, []).append((tool, low, high))
+        self.kinds = {
+            name: np.array(tools, dtype=np.int64) for name, tools in kinds.items()
+        }
+        self.parameters = {
+            parameter: ParameterIndex(*zip(*values))
+            for parameter, values in ranges.items()
+        }
+
+    def candidates(self, step):
+        """
+        Returns the sorted indices of the tools of the kind running step, all of
+        them when the step is of no kind of STEP_EQUIPMENT.
+        """
+        kinds = [name for name in section_names(step) if name in STEP_EQUIPMENT]
+        if not kinds:
+            return np.arange(len(self.equipments), dtype=np.int64)
+        return self.kinds.get(STEP_EQUIPMENT[kinds[0]], np.zeros(0, dtype=np.int64))
+
+    def _checks(self, setpoints, candidates):
+        for parameter, (value_min, value_max) in setpoints.items():
+            index = self.parameters.get(parameter)
+            gas = parameter.partition('/')[0] in GAS_PARAMETERS
+            if index is None and not gas:
+                continue
+            declared = inside = np.zeros(0, dtype=np.int64)
+            if index is not None:
+                declared = np.intersect1d(
+                    candidates, index.declared, assume_unique=True
+                )
+                inside = np.intersect1d(
+                    declared,
+                    index.containing(value_min, value_max),
+                    assume_unique=True,
+                )
+            yield parameter, value_min, value_max, index, declared, inside, gas
+
+    def capable(self, step):
+        """
+        Returns the tools able to run step: of its kind, with every setpoint in
+        range and every gas it flows.
+        """
+        runnable = self.candidates(step)
+        checks = self._checks(step_setpoints(step), runnable)
+        for _, _, _, _, declared, inside, gas in checks:
+            if gas:
+                runnable = np.intersect1d(runnable, inside, assume_unique=True)
+            else:
+                runnable = np.setdiff1d(
+                    runnable,
+                    np.setdiff1d(declared, inside, assume_unique=True),
+                    assume_unique=True,
+                )
+        return [self.equipments[tool] for tool in runnable]
+
+    def match(self, step):
+        """
+        Returns the CapabilityMatch of the tools of the kind of step, those able
+        to run it first.
+        """
+        candidates = self.candidates(step).tolist()
+        outside = {tool: {} for tool in candidates}
+        unchecked = {tool: [] for tool in candidates}
+        checks = self._checks(step_setpoints(step), candidates)
+        for parameter, value_min, value_max, index, declared, inside, gas in checks:
+            declared_tools, inside_tools = set(declared.tolist()), set(inside.tolist())
+            for tool in candidates:
+                if tool in inside_tools:
+                    continue
+                if tool in declared_tools:
+                    low, high = index.bounds(tool)
+                elif gas:
+                    low, high = np.nan, np.nan
+                else:
+                    unchecked[tool].append(parameter)
+                    continue
+                outside[tool][parameter] = ParameterRange(
+                    value_min, value_max, low, high
+                )
+        matches = [
+            CapabilityMatch(
+                self.equipments[tool],
+                not outside[tool],
+                outside[tool],
+                tuple(unchecked[tool]),
+            )
+            for tool in candidates
+        ]
+        return sorted(matches, key=lambda match: not match.runnable)
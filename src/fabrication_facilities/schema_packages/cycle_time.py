@@ -0,0 +1,153 @@
+#######################################################################################
+# Cycle time of a fabrication process. Each step has a planned duration, an actual   #
+# one when it was measured or dated, and a queue time when it started after the end  #
+# of its predecessors. Cumulative times are the heaviest paths ending at each step   #
+# of the ProcessFlow, in one pass over the steps in topological order.                #
+#######################################################################################
+from typing import NamedTuple
+
+import numpy as np
+from schema_packages.utils import step_value
+
+TIME_UNIT = 'minute'
+SECONDS_PER_MINUTE = 60.0
+
+# Quantities of the steps, or of their outputs, read in order of preference
+PLANNED_QUANTITIES = ('duration_target', 'duration')
+ACTUAL_QUANTITIES = ('duration_measured',)
+
+# Columns of the array of step times
+PLANNED, ACTUAL, START, END = range(4)
+
+
+class CycleTimes(NamedTuple):
+    """
+    Times of the steps of a process, in minutes and by position in the steps.
+
+    planned and actual are the durations of the steps, actual falling back on
+    planned where nothing was measured or dated. queue is the wait between the
+    end of the predecessors and the start of the step, 0 where unknown.
+    planned_cumulative and actual_cumulative are the times from the start of the
+    process to the end of each step, the actual ones including queues. The
+    critical paths are the steps of the longest chain of the flow.
+    """
+
+    planned: np.ndarray
+    actual: np.ndarray
+    queue: np.ndarray
+    planned_cumulative: np.ndarray
+    actual_cumulative: np.ndarray
+    planned_critical_path: list
+    actual_critical_path: list
+
+    @property
+    def planned_total(self):
+        return float(self.planned_cumulative.max(initial=0.0))
+
+    @property
+    def actual_total(self):
+        return float(self.actual_cumulative.max(initial=0.0))
+
+    @property
+    def queue_total(self):
+        return float(self.queue[self.actual_critical_path].sum())
+
+
+def minutes(value):
+    """
+    Returns a duration in minutes, from a pint quantity or a number already in
+    minutes; NaN when value is None.
+    """
+    if value is None:
+        return np.nan
+    if hasattr(value, 'to'):
+        value = value.to(TIME_UNIT).magnitude
+    return float(value)
+
+
+def timestamp(value):
+    """
+    Returns a date in minutes since the epoch, NaN when value is None.
+    """
+    if value is None:
+        return np.nan
+    return value.timestamp() / SECONDS_PER_MINUTE
+
+
+def step_revision(step):
+    """
+    Returns what the times of a step are read from: its planned and actual
+    durations as set, unconverted, and its dates. Comparing revisions tells
+    whether the times of a step changed without converting them.
+    """
+    return (
+        step_value(step, PLANNED_QUANTITIES),
+        step_value(step, ACTUAL_QUANTITIES),
+        getattr(step, 'starting_date', None),
+        getattr(step, 'ending_date', None),
+    )
+
+
+def revision_times(revision):
+    """
+    Returns the (planned, actual, start, end) times in minutes of a step revision,
+    NaN where unknown. The actual duration is the measured one or the time
+    between the dates of the step.
+    """
+    planned, actual, start, end = revision
+    start, end = timestamp(start), timestamp(end)
+    actual = minutes(actual)
+    if np.isnan(actual):
+        actual = end - start
+    return (minutes(planned), actual, start, end)
+
+
+def step_times(step):
+    """
+    Returns the (planned, actual, start, end) times of a step, see revision_times.
+    """
+    return revision_times(step_revision(step))
+
+
+def queue_times(flow, starts, ends):
+    """
+    Returns the time each step waited between the last end of its predecessors
+    and its start, 0 where a date is missing or the step started before.
+    """
+    _, _, offsets, predecessors = flow.adjacency()
+    steps = np.repeat(np.arange(flow.count), np.diff(offsets))
+    ready = np.full(flow.count, -np.inf)
+    np.maximum.at(ready, steps, np.nan_to_num(ends[predecessors], nan=-np.inf))
+    queue = starts - ready
+    return np.where(np.isfinite(queue) & (queue > 0), queue, 0.0)
+
+
+def _critical_path(total, previous):
+    if not len(total):
+        return []
+    path = [int(np.argmax(total))]
+    while previous[path[-1]] >= 0:
+        path.append(int(previous[path[-1]]))
+    return path[::-1]
+
+
+def cycle_times(flow, times):
+    """
+    Returns the CycleTimes of the steps of flow from their times, an (steps, 4)
+    array of (planned, actual, start, end) as given by step_times.
+    """
+    times = np.asarray(times, dtype=float).reshape(-1, 4)
+    planned = np.nan_to_num(times[:, PLANNED])
+    actual = np.where(np.isnan(times[:, ACTUAL]), planned, times[:, ACTUAL])
+    queue = queue_times(flow, times[:, START], times[:, END])
+    planned_cumulative, planned_previous = flow.cumulative(planned)
+    actual_cumulative, actual_previous = flow.cumulative(actual + queue)
+    return CycleTimes(
+        planned=planned,
+        actual=actual,
+        queue=queue,
+        planned_cumulative=planned_cumulative,
+        actual_cumulative=actual_cumulative,
+        planned_critical_path=_critical_path(planned_cumulative, planned_previous),
+        actual_critical_path=_critical_path(actual_cumulative, actual_previous),
+    )
@@ -34,6 +34,8 @@ from nomad.datamodel.metainfo.workflow import Link
 from nomad.metainfo import (
     Datetime,
     MEnum,
+    MetainfoReferenceError,
+    MProxy,
     Package,
     Quantity,
     Section,
@@ -43,7 +45,19 @@ from schema_packages.Items import (
     Item,
     ItemsPermitted
 )
-from schema_packages.utils import parse_chemical_formula
+from schema_packages.cycle_time import (
+    cycle_times,
+    revision_times,
+    step_revision,
+)
+from schema_packages.film_stack import replay_steps
+from schema_packages.flow import ProcessFlow
+from schema_packages.hashing import content_hash
+from schema_packages.references import (
+    prefetch_archive_references,
+    prefetch_references,
+)
+from schema_packages.utils import ElementalCompositionMixin, reference_key
 
 if TYPE_CHECKING:
     from nomad.datamodel.datamodel import (
@@ -439,6 +453,83 @@ class Equipment(Instrument, EntryData, ArchiveSection):
     )
 
 
+# Fields of an equipment copied on the references to it
+EQUIPMENT_SNAPSHOT_FIELDS = (
+    'lab_id',
+    'name',
+    'institution',
+    'manufacturer_name',
+    'product_model',
+    'is_bookable',
+    'contamination_class',
+)
+
+
+class EquipmentSnapshot(ArchiveSection):
+    m_def = Section(
+        description="""
+        Copy of the fields of a referenced equipment read most often, so that
+        listings and searches get them without resolving the reference. version
+        is a hash of the fields, changing when the equipment does.
+        """,
+    )
+    lab_id = Quantity(type=str)
+    name = Quantity(type=str)
+    equipment_type = Quantity(
+        type=str,
+        description='Name of the section definition of the equipment',
+    )
+    institution = Quantity(type=str)
+    manufacturer_name = Quantity(type=str)
+    product_model = Quantity(type=str)
+    is_bookable = Quantity(type=bool)
+    contamination_class = Quantity(type=int)
+    version = Quantity(type=str)
+
+
+def equipment_cache_key(equipment):
+    """
+    Returns what identifies a referenced equipment across the archives: the URL of
+    an unresolved reference, the entry id and path of a resolved one.
+    """
+    if isinstance(equipment, MProxy):
+        return equipment.m_proxy_value
+    metadata = getattr(equipment.m_root(), 'metadata', None)
+    entry_id = getattr(metadata, 'entry_id', None)
+    if entry_id is None:
+        # a section outside any entry, only known by its identity
+        return ('section', id(equipment))
+    return (entry_id, equipment.m_path())
+
+
+def equipment_snapshot(archive, equipment, logger=None):
+    """
+    Returns the fields of EquipmentSnapshot of a referenced equipment, with their
+    version. They are cached in the m_cache of the archive being normalized by
+    equipment_cache_key, so each equipment is resolved once per normalization
+    however many steps reference it. None when the equipment cannot be resolved;
+    the failure is logged and cached too.
+    """
+    cache = (
+        {} if archive is None else archive.m_cache.setdefault('resolved_equipment', {})
+    )
+    key = equipment_cache_key(equipment)
+    if key not in cache:
+        try:
+            fields = {
+                name: getattr(equipment, name) for name in EQUIPMENT_SNAPSHOT_FIELDS
+            }
+            fields['equipment_type'] = equipment.m_def.name
+        except (MetainfoReferenceError, NotImplementedError) as e:
+            if logger is not None:
+                logger.warning('could not resolve the referenced equipment', exc_info=e)
+            fields = None
+        else:
+            fields['version'] = content_hash('equipment', *sorted(fields.items()))
+        cache[key] = fields
+    return cache[key]
+
+
 class EquipmentReference(Link, ArchiveSection):
     m_def = Section()
 
@@ -457,14 +548,23 @@ class EquipmentReference(Link, ArchiveSection):
         a_eln={'component': 'ReferenceEditQuantity'},
     )
 
+    snapshot = SubSection(section_def=EquipmentSnapshot, repeats=False)
+
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         if self.section is not None:
+            # load the equipment of all references in the archive at once
+            prefetch_archive_references(archive, logger, [EquipmentReference.section])
+            # resolve before Link.normalize, which reads the referenced name and
+            # would fail on an equipment that cannot be resolved
+            fields = equipment_snapshot(archive, self.section, logger)
+            if fields is None:
+                # keep the last snapshot taken, its version tells how old it is
+                return
             super().normalize(archive, logger)
-            try:
-                self.name = self.section.name
-                self.id = self.section.lab_id
-            except Exception as e:
-                raise e
+            if self.snapshot is None or self.snapshot.version != fields['version']:
+                self.snapshot = EquipmentSnapshot(**fields)
+            self.name = fields['name']
+            self.id = fields['lab_id']
 
 
 class User(ArchiveSection):
@@ -655,6 +755,33 @@ class FabricationOutput(ArchiveSection):
     )
 
 
+def update_sequential_flow(flow, previous, keys):
+    """
+    Updates a flow of steps following the order of the list from the previous
+    keys of the steps to keys, when they differ by one step added or removed.
+    Returns whether the flow was updated.
+    """
+    if abs(len(keys) - len(previous)) != 1:
+        return False
+    position = next(
+        (i for i, pair in enumerate(zip(previous, keys)) if pair[0] != pair[1]),
+        min(len(keys), len(previous)),
+    )
+    if len(keys) > len(previous):
+        if keys[:position] + keys[position + 1 :] != previous:
+            return False
+        flow.insert_step(
+            position,
+            [position - 1] if position > 0 else [],
+            [position + 1] if position < len(previous) else [],
+        )
+    else:
+        if previous[:position] + previous[position + 1 :] != keys:
+            return False
+        flow.remove_step(position)
+    return True
+
+
 class FabricationProcess(EntryData, ArchiveSection):
     m_def = Section(
         a_eln={
@@ -751,14 +878,100 @@ class FabricationProcess(EntryData, ArchiveSection):
         shape=['*'],
         a_eln={'component': 'ReferenceEditQuantity'},
     )
+    flow_edges = Quantity(
+        type=np.int32,
+        shape=['*', 2],
+        description="""
+        Pairs (step, next step) of positions in steps describing branches and
+        rework loops of the flow. When not given, the steps follow each other in
+        the order of the list
+        """,
+    )
     instruments = SubSection(
         section_def=EquipmentReference,
         repeats=True,
     )
     output = SubSection(section_def=FabricationOutput, repeat=False)
 
+    def load_steps(self, backend=None):
+        """
+        Returns the steps, loading all their archives in one bulk read of backend
+        (see references.prefetch_references) when some are not loaded yet.
+        """
+        if any(
+            isinstance(step, MProxy) and step.m_proxy_resolved is None
+            for step in self.steps or []
+        ):
+            prefetch_references(self, backend, [FabricationProcess.steps])
+        return [
+            step.m_proxy_resolve() if isinstance(step, MProxy) else step
+            for step in self.steps or []
+        ]
+
+    def step_keys(self):
+        """
+        Returns the references of the steps without loading them.
+        """
+        return [reference_key(step) for step in self.steps or []]
+
+    def process_flow(self):
+        """
+        Returns the ProcessFlow of the steps, cached in m_cache. When steps follow
+        the order of the list and one step was added or removed since the last
+        call, the cached flow is updated in place instead of rebuilt.
+        """
+        keys = self.step_keys()
+        edges = None if self.flow_edges is None else np.array(self.flow_edges)
+        flow, previous, previous_edges = self.m_cache.get(
+            'process_flow', (None, None, None)
+        )
+        if edges is None and previous_edges is None and flow is not None:
+            if keys != previous and not update_sequential_flow(flow, previous, keys):
+                flow = None
+        elif not (keys == previous and np.array_equal(edges, previous_edges)):
+            flow = None
+        if flow is None:
+            flow = ProcessFlow(len(keys), edges)
+        self.m_cache['process_flow'] = (flow, keys, edges)
+        return flow
+
+    def cycle_times(self, backend=None):
+        """
+        Returns the CycleTimes of the steps over the process flow. The result is
+        cached in m_cache for the revision of the process: the flow and the
+        step_revision of each step. The times are converted again only when the
+        steps, the flow or what the times of a step are read from change.
+        """
+        flow = self.process_flow()
+        revisions = [step_revision(step) for step in self.load_steps(backend)]
+        cached, previous_flow, previous_revisions = self.m_cache.get(
+            'cycle_times', (None, None, None)
+        )
+        if (
+            cached is None
+            or previous_flow is not flow
+            or revisions != previous_revisions
+        ):
+            times = [revision_times(revision) for revision in revisions]
+            cached = cycle_times(flow, times)
+        self.m_cache['cycle_times'] = (cached, flow, revisions)
+        return cached
+
+    def film_stacks(self, wafers=1, backend=None):
+        """
+        Returns the StackReplay of the steps, in the topological order of the
+        process flow, on the stacks of wafers (a number of wafers or a list of the
+        ids of their items). Snapshots and flags are indexed by that order.
+        """
+        steps = self.load_steps(backend)
+        return replay_steps(
+            [steps[step] for step in self.process_flow().topological_order()], wafers
+        )
+
 
-class StartingMaterial(Chemical, FabricationProcessStep, ArchiveSection):
+class StartingMaterial(
+    ElementalCompositionMixin, Chemical, FabricationProcessStep, ArchiveSection
+):
     m_def = Section(
         a_eln={
             'hide': [
@@ -845,26 +1058,7 @@ class StartingMaterial(Chemical, FabricationProcessStep, ArchiveSection):
 
     elemental_composition = SubSection(section_def=ElementalComposition, repeats=True)
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        super().normalize(archive, logger)
-        if self.chemical_formula:
-            elements, counts = parse_chemical_formula(self.chemical_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.elemental_composition = elementality
+    elemental_composition_targets = (('chemical_formula', 'elemental_composition'),)
 
 
 class SampleParenting(Entity, EntryData, ArchiveSection):
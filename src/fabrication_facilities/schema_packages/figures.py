@@ -0,0 +1,258 @@
+#######################################################################################
+# Helpers building the plotly JSON stored in PlotlyFigure sections. Ramps are simple  #
+# x/y lines, so their figure dictionaries are written directly from NumPy arrays      #
+# instead of going through pandas and plotly.express for every normalization. Long   #
+# instrument logs are downsampled for display only, the full arrays stay as data.     #
+# Built figures are cached on a hash of their inputs, so normalizing an unchanged     #
+# section again does not plot it again.                                               #
+#######################################################################################
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from schema_packages.hashing import content_hash
+
+FIGURE_CACHE_SIZE = 256
+FIGURE_CACHE_DIR_VARIABLE = 'FABRICATION_FIGURE_CACHE_DIR'
+FIGURE_HEIGHT = 400
+FIGURE_WIDTH = 800
+LINE_COLOR = '#636efa'
+MAX_FIGURE_POINTS = 2000
+DOWNSAMPLING_MODES = ('lttb', 'minmax')
+MIN_DOWNSAMPLED_POINTS = 4
+
+
+def as_magnitudes(values):
+    """
+    Returns the values as a flat float array, dropping the units of pint quantities.
+    """
+    return np.asarray(getattr(values, 'magnitude', values), dtype=np.float64).ravel()
+
+
+def line_arrays(x, y):
+    """
+    Returns x and y as float arrays of equal length. When x is None the points are
+    plotted against their index.
+    """
+    y = as_magnitudes(y)
+    x = np.arange(len(y), dtype=np.float64) if x is None else as_magnitudes(x)
+    if len(x) != len(y):
+        raise ValueError(f'x and y have different lengths: {len(x)} and {len(y)}')
+    return x, y
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last points and, in each of
+    max_points - 2 buckets in between, the point forming the largest triangle with
+    the point kept in the previous bucket and the mean of the next bucket.
+    """
+    n = len(y)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    sizes = np.diff(edges)
+    next_x = np.append((np.add.reduceat(x[: n - 1], edges[:-1]) / sizes)[1:], x[-1])
+    next_y = np.append((np.add.reduceat(y[: n - 1], edges[:-1]) / sizes)[1:], y[-1])
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    kept = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        areas = np.abs(
+            (x[kept] - next_x[bucket]) * (y[start:stop] - y[kept])
+            - (x[kept] - x[start:stop]) * (next_y[bucket] - y[kept])
+        )
+        kept = start + int(np.argmax(areas))
+        selected[bucket + 1] = kept
+    return selected
+
+
+def minmax_indices(y, max_points):
+    """
+    Min/max envelope: keeps the first and last points and the smallest and largest
+    value of each of (max_points - 2) // 2 equal buckets, in their original order.
+    """
+    n = len(y)
+    buckets = (max_points - 2) // 2
+    size = -(-n // buckets)
+    padded = np.pad(y, (0, buckets * size - n), mode='edge').reshape(buckets, size)
+    offsets = np.arange(buckets)[:, np.newaxis] * size
+    extremes = np.stack((padded.argmin(axis=1), padded.argmax(axis=1)), axis=1)
+    indices = np.minimum(extremes + offsets, n - 1)
+    return np.unique(np.concatenate(([0], indices.ravel(), [n - 1])))
+
+
+def downsample(x, y, max_points=MAX_FIGURE_POINTS, mode='lttb'):
+    """
+    Returns at most max_points of the line x/y, selected with one of
+    DOWNSAMPLING_MODES: 'lttb' keeps the visual shape of the line, 'minmax' keeps
+    the envelope of noisy signals. Lines that are already short enough, or a
+    max_points of None, are returned unchanged.
+    """
+    if mode not in DOWNSAMPLING_MODES:
+        raise ValueError(
+            f'Unknown downsampling mode {mode!r}, use {DOWNSAMPLING_MODES}'
+        )
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    if max_points < MIN_DOWNSAMPLED_POINTS:
+        raise ValueError(
+            f'At least {MIN_DOWNSAMPLED_POINTS} points are needed to downsample a line'
+        )
+    if mode == 'lttb':
+        indices = lttb_indices(x, y, max_points)
+    else:
+        indices = minmax_indices(y, max_points)
+    return x[indices], y[indices]
+
+
+def line_figure_json(
+    x,
+    y,
+    labelx,
+    labely,
+    *,
+    height=FIGURE_HEIGHT,
+    width=FIGURE_WIDTH,
+    markers=True,
+    max_points=None,
+    downsampling='lttb',
+):
+    """
+    Returns the plotly-compatible dictionary of a single line, with the same data
+    and layout plotly.express.line produces for it. The plotly template is left out,
+    the GUI applies its own.
+
+    When max_points is given, longer lines are downsampled with the downsampling
+    mode before being written to the figure.
+    """
+    x, y = downsample(*line_arrays(x, y), max_points, downsampling)
+    trace = {
+        'hovertemplate': f'{labelx}=%{{x}}<br>{labely}=%{{y}}<extra></extra>',
+        'legendgroup': '',
+        'line': {'color': LINE_COLOR, 'dash': 'solid'},
+        'marker': {'symbol': 'circle'},
+        'mode': 'lines+markers' if markers else 'lines',
+        'name': '',
+        'orientation': 'v',
+        'showlegend': False,
+        'x': x.tolist(),
+        'xaxis': 'x',
+        'y': y.tolist(),
+        'yaxis': 'y',
+        'type': 'scatter',
+    }
+    layout = {
+        'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'title': {'text': labelx}},
+        'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0], 'title': {'text': labely}},
+        'legend': {'tracegroupgap': 0},
+        'margin': {'t': 60},
+        'height': height,
+        'width': width,
+    }
+    return {'data': [trace], 'layout': layout}
+
+
+def figure_key(kind, *parts):
+    """
+    Returns the hexadecimal digest identifying a figure of the given kind built
+    from parts, see hashing.content_hash.
+    """
+    return content_hash(kind, *parts)
+
+
+def _to_json(value):
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class FigureCache:
+    """
+    Cache of figure dictionaries by figure_key: an in-memory LRU of maxsize figures
+    and, when directory is given, a directory of JSON files shared by processes and
+    kept across restarts. The cache keeps its own copy of each figure and returns
+    a new copy on every hit, so callers may modify the figures they get.
+    """
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = self.disk_hits = self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def _remember(self, key, figure):
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            if len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+
+    def get(self, key):
+        """
+        Returns a copy of the cached figure of key, or None.
+        """
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(figure)
+        if self.directory:
+            try:
+                with open(self._path(key), encoding='utf-8') as file:
+                    figure = json.load(file)
+            except (OSError, ValueError):
+                figure = None
+            if figure is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, figure)
+                return copy.deepcopy(figure)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, figure):
+        self._remember(key, copy.deepcopy(figure))
+        if not self.directory:
+            return
+        path = self._path(key)
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temporary, 'w', encoding='utf-8') as file:
+                json.dump(figure, file, default=_to_json)
+            os.replace(temporary, path)
+        except (OSError, TypeError):
+            # the disk tier is best effort, the figure stays cached in memory
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def get_or_build(self, key, build):
+        """
+        Returns the cached figure of key, building and caching it with build() when
+        missing.
+        """
+        figure = self.get(key)
+        if figure is None:
+            figure = build()
+            self.put(key, figure)
+        return figure
+
+    def clear(self):
+        """
+        Empties the in-memory tier and resets the counters; files on disk are kept.
+        """
+        with self._lock:
+            self._figures.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+
+figure_cache = FigureCache(directory=os.environ.get(FIGURE_CACHE_DIR_VARIABLE))
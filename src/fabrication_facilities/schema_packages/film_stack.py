@@ -0,0 +1,468 @@
+#######################################################################################
+# Layer stacks of the wafers of a lot. Steps are compiled once into film operations  #
+# (substrate, deposit, oxidize, etch, strip) and replayed on arrays holding, for each #
+# wafer, the material index and the thickness of each layer from the bottom up. All  #
+# wafers are updated together, so a step costs a few array operations.              #
+#######################################################################################
+from typing import NamedTuple
+
+import numpy as np
+from schema_packages.formula import N_ELEMENTS, composition_matrices, parse_formula
+
+LENGTH_UNIT = 'nm'
+STACK_CAPACITY = 16
+EMPTY_LAYER = 1e-9
+MISMATCH_TOLERANCE = 0.05
+
+# Thickness of silicon consumed by the growth of a unit thickness of thermal oxide
+SILICON_CONSUMPTION = 0.44
+THERMAL_OXIDE = 'SiO2'
+SILICON_NAMES = ('si', 'silicon', 'poly-si', 'polysilicon', 'a-si')
+
+# Sections of steps and the film operation they make, subclasses included
+FILM_STEPS = (
+    ('StartingMaterial', 'substrate'),
+    ('ThermalOxidation', 'oxidize'),
+    ('LPCVD', 'deposit'),
+    ('sputtering_catania', 'deposit'),
+    ('ElectronGun', 'deposit'),
+    ('Sputtering', 'deposit'),
+    ('SOG', 'deposit'),
+    ('Spin_Coating', 'deposit'),
+    ('Track', 'deposit'),
+    ('RIE', 'etch'),
+    ('WetEtching', 'etch'),
+    ('Stripping', 'strip'),
+)
+# Quantities giving the amount of a film operation, in order of preference
+AMOUNT_QUANTITIES = ('thickness_target', 'depth_target', 'wafer_thickness')
+MEASURED_QUANTITIES = ('thickness_measured',)
+# Subsections of steps listing the materials deposited, etched or stripped
+MATERIAL_SUB_SECTIONS = (
+    'synthesis_steps',
+    'spin_coating_steps',
+    'etching_steps',
+    'stripping_steps',
+    'material_deposited',
+    'resist_material',
+    'materials_etched',
+    'resist_to_strip',
+)
+
+
+class FilmOperation(NamedTuple):
+    """
+    Change of the layer stack made by a step. amount is the thickness deposited,
+    grown or etched in nm, measured the thickness measured after the step when
+    known. materials are the materials deposited or, for etch and strip, the ones
+    removed (any of them when empty). item is the id of the item processed.
+    """
+
+    kind: str
+    materials: tuple
+    amount: float
+    measured: float
+    item: object = None
+
+
+class StackFlag(NamedTuple):
+    """
+    Disagreement found while replaying a step on some wafers.
+    """
+
+    step: int
+    kind: str
+    wafers: list
+    expected: float
+    measured: float
+
+
+class StackSnapshot(NamedTuple):
+    """
+    Layer stacks of all wafers after a step: material indices and thicknesses of
+    the layers from the bottom up, count the number of layers of each wafer.
+    """
+
+    materials: np.ndarray
+    thickness: np.ndarray
+    count: np.ndarray
+
+
+def _nm(value):
+    if value is None:
+        return np.nan
+    if hasattr(value, 'to'):
+        value = value.to(LENGTH_UNIT).magnitude
+    return float(value)
+
+
+def _material(section):
+    return getattr(section, 'chemical_formula', None) or getattr(
+        section, 'short_name', None
+    )
+
+
+def _step_materials(section):
+    materials = []
+    for name in MATERIAL_SUB_SECTIONS:
+        children = getattr(section, name, None) or []
+        for child in [children] if hasattr(children, 'm_def') else children:
+            materials.extend(_step_materials(child) or [_material(child) or child.name])
+    return [material for material in materials if material]
+
+
+def film_kind(step):
+    """
+    Returns the film operation of a step, None for steps leaving the stack as it
+    is.
+    """
+    names = {step.m_def.name} | {base.name for base in step.m_def.all_base_sections}
+    return next((kind for name, kind in FILM_STEPS if name in names), None)
+
+
+def film_operation(step):
+    """
+    Returns the FilmOperation of a step, None when it does not change the stack.
+    """
+    kind = film_kind(step)
+    if kind is None:
+        return None
+    materials = _step_materials(step)
+    if kind in {'substrate', 'deposit'}:
+        materials = [_material(step) or (materials[0] if materials else None)]
+    elif kind == 'oxidize':
+        materials = [THERMAL_OXIDE]
+    amount = next(
+        (
+            _nm(getattr(step, name))
+            for name in AMOUNT_QUANTITIES
+            if getattr(step, name, None) is not None
+        ),
+        np.nan,
+    )
+    measured = next(
+        (
+            _nm(getattr(step, name))
+            for name in MEASURED_QUANTITIES
+            if getattr(step, name, None) is not None
+        ),
+        np.nan,
+    )
+    return FilmOperation(
+        kind,
+        tuple(dict.fromkeys(m for m in materials if m)),
+        amount,
+        measured,
+        getattr(step, 'id_item_processed', None),
+    )
+
+
+class MaterialTable:
+    """
+    Materials of the stacks by index, with their elemental compositions.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._indices = {}
+        self._compositions = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, name):
+        index = self._indices.get(name)
+        if index is None:
+            index = self._indices[name] = len(self.names)
+            self.names.append(name)
+            self._compositions = None
+        return index
+
+    def mask(self, names):
+        """
+        Returns a boolean mask of the materials in names, by index.
+        """
+        indices = [self.index(name) for name in names]
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[indices] = True
+        return mask
+
+    def is_silicon(self):
+        """
+        Returns a boolean mask of the materials made of silicon.
+        """
+        return np.array([name.lower() in SILICON_NAMES for name in self.names])
+
+    def compositions(self):
+        """
+        Returns the (materials, elements) atomic fractions of the materials, zero
+        for materials whose name is not a chemical formula.
+        """
+        if self._compositions is None:
+            formulas = []
+            for name in self.names:
+                try:
+                    parse_formula(name)
+                    formulas.append(name)
+                except ValueError:
+                    formulas.append('')
+            self._compositions = (
+                composition_matrices(formulas).atomic_fractions
+                if formulas
+                else np.zeros((0, N_ELEMENTS))
+            )
+        return self._compositions
+
+
+class FilmStack:
+    """
+    Layer stacks of a set of wafers, held in (wafers, capacity) arrays of material
+    indices and thicknesses in nm, grown as needed. Operations apply to all the
+    wafers or to those selected by a boolean mask, with one amount or one amount
+    per wafer.
+    """
+
+    def __init__(self, wafers, materials=None, capacity=STACK_CAPACITY):
+        self.wafers = wafers
+        self.material_table = MaterialTable() if materials is None else materials
+        self.materials = np.zeros((wafers, capacity), dtype=np.int32)
+        self.thickness = np.zeros((wafers, capacity))
+        self.count = np.zeros(wafers, dtype=np.int32)
+        self._rows = np.arange(wafers)
+
+    def _selected(self, wafers):
+        if wafers is None:
+            return np.ones(self.wafers, dtype=bool)
+        return np.asarray(wafers, dtype=bool).copy()
+
+    def _reserve(self):
+        capacity = self.materials.shape[1]
+        if self.count.max(initial=0) < capacity:
+            return
+        self.materials = np.concatenate(
+            (self.materials, np.zeros_like(self.materials)), axis=1
+        )
+        self.thickness = np.concatenate(
+            (self.thickness, np.zeros_like(self.thickness)), axis=1
+        )
+
+    def _top(self, rows):
+        return self.materials[rows, np.maximum(self.count[rows] - 1, 0)]
+
+    def _pop(self, rows):
+        self.thickness[rows, self.count[rows] - 1] = 0.0
+        self.count[rows] -= 1
+
+    def deposit(self, material, thickness, wafers=None):
+        """
+        Adds a layer of material on top, or thickens the top layer when it is of
+        the same material.
+        """
+        index = self.material_table.index(material)
+        thickness = np.broadcast_to(np.asarray(thickness, float), self.wafers)
+        selected = self._selected(wafers) & (thickness > 0)
+        self._reserve()
+        same = selected & (self.count > 0) & (self._top(self._rows) == index)
+        rows = self._rows[same]
+        self.thickness[rows, self.count[rows] - 1] += thickness[same]
+        new = selected & ~same
+        rows = self._rows[new]
+        self.materials[rows, self.count[rows]] = index
+        self.thickness[rows, self.count[rows]] = thickness[new]
+        self.count[rows] += 1
+
+    def etch(self, depth, materials=(), wafers=None):
+        """
+        Removes depth from the top of the stacks, stopping at the first layer not
+        in materials when materials are given. Returns the depth left to etch on
+        each wafer, non zero where the etch stopped early.
+        """
+        remaining = np.where(
+            self._selected(wafers),
+            np.broadcast_to(np.asarray(depth, float), self.wafers),
+            0.0,
+        )
+        etched = self.material_table.mask(materials) if materials else None
+        while True:
+            active = (remaining > EMPTY_LAYER) & (self.count > 0)
+            if etched is not None:
+                active &= etched[self._top(self._rows)]
+            if not active.any():
+                return remaining
+            rows = self._rows[active]
+            top = self.count[rows] - 1
+            removed = np.minimum(remaining[rows], self.thickness[rows, top])
+            self.thickness[rows, top] -= removed
+            remaining[rows] -= removed
+            self._pop(rows[self.thickness[rows, top] <= EMPTY_LAYER])
+
+    def strip(self, materials, wafers=None):
+        """
+        Removes the top layers made of one of materials, or the top layer when no
+        materials are given. Returns the number of layers removed on each wafer.
+        """
+        selected = self._selected(wafers)
+        if not materials:
+            rows = self._rows[selected & (self.count > 0)]
+            self._pop(rows)
+            return np.bincount(rows, minlength=self.wafers).astype(np.int32)
+        stripped = self.material_table.mask(materials)
+        removed = np.zeros(self.wafers, dtype=np.int32)
+        while True:
+            active = selected & (self.count > 0)
+            active &= stripped[self._top(self._rows)]
+            if not active.any():
+                return removed
+            rows = self._rows[active]
+            self._pop(rows)
+            removed[rows] += 1
+
+    def oxidize(self, thickness, wafers=None):
+        """
+        Grows thermal oxide on top, consuming SILICON_CONSUMPTION of its thickness
+        from the silicon layer at the top or under the oxide already grown.
+        """
+        oxide = self.material_table.index(THERMAL_OXIDE)
+        thickness = np.broadcast_to(np.asarray(thickness, float), self.wafers)
+        selected = self._selected(wafers) & (self.count > 0)
+        below = self.count - 1 - (self._top(self._rows) == oxide)
+        silicon = self.material_table.is_silicon()
+        selected &= below >= 0
+        rows = self._rows[selected]
+        rows = rows[silicon[self.materials[rows, below[rows]]]]
+        layers = below[rows]
+        consumed = np.minimum(
+            SILICON_CONSUMPTION * thickness[rows], self.thickness[rows, layers]
+        )
+        self.thickness[rows, layers] -= consumed
+        emptied = rows[
+            (self.thickness[rows, layers] <= EMPTY_LAYER)
+            & (layers == self.count[rows] - 1)
+        ]
+        self._pop(emptied)
+        self.deposit(THERMAL_OXIDE, thickness, wafers)
+
+    def total_thickness(self):
+        return self.thickness.sum(axis=1)
+
+    def snapshot(self):
+        layers = self.count.max(initial=0)
+        return StackSnapshot(
+            self.materials[:, :layers].copy(),
+            self.thickness[:, :layers].copy(),
+            self.count.copy(),
+        )
+
+    def layers(self, wafer, snapshot=None):
+        """
+        Returns the (material, thickness in nm) of the layers of a wafer from the
+        bottom up, now or in a snapshot.
+        """
+        snapshot = self if snapshot is None else snapshot
+        return [
+            (self.material_table.names[material], float(thickness))
+            for material, thickness in zip(
+                snapshot.materials[wafer, : snapshot.count[wafer]],
+                snapshot.thickness[wafer, : snapshot.count[wafer]],
+            )
+            if thickness > EMPTY_LAYER
+        ]
+
+    def composition(self, wafer):
+        """
+        Returns the (layers, elements) atomic fractions of the layers of a wafer.
+        """
+        count = self.count[wafer]
+        return self.material_table.compositions()[self.materials[wafer, :count]]
+
+
+class StackReplay(NamedTuple):
+    """
+    Result of a replay: the final stack, a snapshot after each operation and the
+    flags raised.
+    """
+
+    stack: FilmStack
+    snapshots: list
+    flags: list
+
+
+def _mismatch(expected, measured, tolerance):
+    return not np.isnan(measured) and abs(measured - expected) > tolerance * max(
+        abs(expected), EMPTY_LAYER
+    )
+
+
+def replay_operations(operations, wafers=1, tolerance=MISMATCH_TOLERANCE):
+    """
+    Replays FilmOperation (or None for steps leaving the stack as it is) on the
+    stacks of wafers, a number of wafers or a list of their ids. Operations on an
+    item in the list apply to that wafer only, the others to all wafers.
+
+    Flags are raised when a measured thickness differs from the target by more
+    than tolerance, when an etch is stopped by a layer it does not etch or runs
+    out of stack, and when a strip finds nothing to remove.
+    """
+    ids = list(range(wafers)) if isinstance(wafers, int) else list(wafers)
+    positions = {item: position for position, item in enumerate(ids)}
+    stack = FilmStack(len(ids))
+    snapshots, flags = [], []
+    for step, operation in enumerate(operations):
+        if operation is None or (
+            np.isnan(operation.amount) and operation.kind != 'strip'
+        ):
+            snapshots.append(stack.snapshot())
+            continue
+        selected = None
+        if operation.item in positions:
+            selected = np.zeros(len(ids), dtype=bool)
+            selected[positions[operation.item]] = True
+        wafer_list = (
+            list(range(len(ids))) if selected is None else [positions[operation.item]]
+        )
+        material = operation.materials[0] if operation.materials else 'unknown'
+        if operation.kind in {'substrate', 'deposit'}:
+            stack.deposit(material, operation.amount, selected)
+        elif operation.kind == 'oxidize':
+            stack.oxidize(operation.amount, selected)
+        elif operation.kind == 'etch':
+            left = stack.etch(operation.amount, operation.materials, selected)
+            short = np.flatnonzero(left > EMPTY_LAYER).tolist()
+            if short:
+                flags.append(
+                    StackFlag(
+                        step,
+                        'etch stopped',
+                        short,
+                        operation.amount,
+                        operation.amount - float(left[short].max()),
+                    )
+                )
+        elif operation.kind == 'strip':
+            removed = stack.strip(operation.materials, selected)
+            missing = [wafer for wafer in wafer_list if not removed[wafer]]
+            if missing:
+                flags.append(
+                    StackFlag(step, 'nothing stripped', missing, np.nan, np.nan)
+                )
+        if _mismatch(operation.amount, operation.measured, tolerance):
+            flags.append(
+                StackFlag(
+                    step,
+                    'thickness mismatch',
+                    wafer_list,
+                    operation.amount,
+                    operation.measured,
+                )
+            )
+        snapshots.append(stack.snapshot())
+    return StackReplay(stack, snapshots, flags)
+
+
+def replay_steps(steps, wafers=1, tolerance=MISMATCH_TOLERANCE):
+    """
+    Replays process steps on the stacks of wafers, see replay_operations.
+    """
+    return replay_operations(
+        [film_operation(step) for step in steps], wafers, tolerance
+    )
@@ -0,0 +1,229 @@
+#######################################################################################
+# Index of the flow of a fabrication process. Steps are the nodes, numbered by their  #
+# position in FabricationProcess.steps, and the flow is a set of edges kept in int32  #
+# arrays, with predecessors and successors in compressed sparse rows. Edges closing a #
+# loop are rework edges, kept apart so that the rest of the flow stays acyclic.       #
+#######################################################################################
+import heapq
+
+import numpy as np
+
+
+def sequential_edges(count):
+    """
+    Returns the edges of steps run one after the other in the order of the list.
+    """
+    nodes = np.arange(count - 1, dtype=np.int32)
+    return np.column_stack((nodes, nodes + 1)).reshape(-1, 2)
+
+
+def _compressed_rows(count, sources, targets):
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(count + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=count), out=offsets[1:])
+    return offsets, targets[order].astype(np.int32)
+
+
+class ProcessFlow:
+    """
+    Directed graph of the steps of a process.
+
+    edges is an (edges, 2) array of (step, next step) positions, sequential_edges
+    by default. Edges closing a loop when the flow is walked depth first, taking
+    steps in the order of the list, are rework edges: they are listed in
+    rework_edges and left out of the ordering, the adjacency and the longest path.
+
+    The topological order is cached. Adding a step between steps already in order
+    or removing one updates it in place; any other change recomputes it at the
+    next query.
+    """
+
+    def __init__(self, count, edges=None):
+        self.count = count
+        edges = sequential_edges(count) if edges is None else edges
+        self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        if np.any((self.edges < 0) | (self.edges >= count)):
+            raise ValueError(f'Flow edges must join steps between 0 and {count - 1}')
+        self._reset()
+
+    def _reset(self):
+        self._rework = None
+        self._order = None
+        self._adjacency = None
+
+    @property
+    def rework(self):
+        """
+        Boolean mask of the rework edges in edges.
+        """
+        if self._rework is None:
+            self._rework = self._find_rework()
+        return self._rework
+
+    @property
+    def rework_edges(self):
+        return self.edges[self.rework]
+
+    def _find_rework(self):
+        # edges of each step in the list order of their next steps
+        by_next = np.argsort(self.edges[:, 1], kind='stable')
+        offsets, targets = _compressed_rows(self.count, self.edges[by_next, 0], by_next)
+        state = np.zeros(self.count, dtype=np.int8)  # 0 new, 1 open, 2 done
+        rework = np.zeros(len(self.edges), dtype=bool)
+        for root in range(self.count):
+            if state[root]:
+                continue
+            state[root] = 1
+            stack = [(root, offsets[root])]
+            while stack:
+                node, cursor = stack[-1]
+                if cursor == offsets[node + 1]:
+                    state[node] = 2
+                    stack.pop()
+                    continue
+                stack[-1] = (node, cursor + 1)
+                edge = targets[cursor]
+                following = self.edges[edge, 1]
+                if state[following] == 1:
+                    rework[edge] = True
+                elif state[following] == 0:
+                    state[following] = 1
+                    stack.append((following, offsets[following]))
+        return rework
+
+    def _flow_edges(self):
+        return self.edges[~self.rework]
+
+    def adjacency(self):
+        """
+        Returns (offsets, successors, offsets, predecessors) of the flow without
+        rework edges, in compressed sparse rows.
+        """
+        if self._adjacency is None:
+            edges = self._flow_edges()
+            self._adjacency = (
+                *_compressed_rows(self.count, edges[:, 0], edges[:, 1]),
+                *_compressed_rows(self.count, edges[:, 1], edges[:, 0]),
+            )
+        return self._adjacency
+
+    def successors(self, step):
+        offsets, successors, _, _ = self.adjacency()
+        return successors[offsets[step] : offsets[step + 1]]
+
+    def predecessors(self, step):
+        _, _, offsets, predecessors = self.adjacency()
+        return predecessors[offsets[step] : offsets[step + 1]]
+
+    def topological_order(self):
+        """
+        Returns the steps in an order where each one follows its predecessors,
+        taking the earliest step in the list among the ready ones.
+        """
+        if self._order is None:
+            offsets, successors, _, _ = self.adjacency()
+            waiting = np.bincount(self._flow_edges()[:, 1], minlength=self.count)
+            ready = np.flatnonzero(waiting == 0).tolist()
+            heapq.heapify(ready)
+            order = []
+            while ready:
+                step = heapq.heappop(ready)
+                order.append(step)
+                for following in successors[offsets[step] : offsets[step + 1]]:
+                    waiting[following] -= 1
+                    if waiting[following] == 0:
+                        heapq.heappush(ready, int(following))
+            self._order = np.array(order, dtype=np.int32)
+        return self._order
+
+    def cumulative(self, weights):
+        """
+        Returns the weight of the heaviest path ending at each step, weights giving
+        one value per step, and the previous step on that path (-1 at its start).
+        """
+        _, _, offsets, predecessors = self.adjacency()
+        total = np.array(weights, dtype=float)
+        previous = np.full(self.count, -1, dtype=np.int64)
+        for step in self.topological_order():
+            before = predecessors[offsets[step] : offsets[step + 1]]
+            if len(before):
+                best = before[np.argmax(total[before])]
+                total[step] += total[best]
+                previous[step] = best
+        return total, previous
+
+    def longest_path(self, weights=None):
+        """
+        Returns the total weight and the steps of the heaviest path of the flow,
+        each step weighing 1 unless weights gives one value per step.
+        """
+        if self.count == 0:
+            return 0.0, []
+        total, previous = self.cumulative(
+            np.ones(self.count) if weights is None else weights
+        )
+        step = int(np.argmax(total))
+        path = [step]
+        while previous[path[-1]] >= 0:
+            path.append(int(previous[path[-1]]))
+        return float(total[step]), path[::-1]
+
+    def insert_step(self, position, predecessors=(), successors=()):
+        """
+        Inserts a step at position in the list, after predecessors and before
+        successors (positions in the list after the insertion). An edge going
+        directly from one of the predecessors to one of the successors is replaced
+        by the path through the new step.
+        """
+        shift = self.edges >= position
+        edges = (self.edges + shift).astype(np.int32)
+        before = np.asarray(predecessors, dtype=np.int32)
+        after = np.asarray(successors, dtype=np.int32)
+        split = np.isin(edges[:, 0], before) & np.isin(edges[:, 1], after)
+        new = np.concatenate(
+            (
+                np.column_stack((before, np.full_like(before, position))),
+                np.column_stack((np.full_like(after, position), after)),
+            )
+        ).reshape(-1, 2)
+        order = self._order
+        rework = self._rework
+        self.count += 1
+        self.edges = np.concatenate((edges[~split], new)).astype(np.int32)
+        self._reset()
+        if order is None or rework is None:
+            return
+        order = order + (order >= position)
+        where = np.empty(self.count, dtype=np.int64)
+        where[order] = np.arange(len(order))
+        where[position] = -1
+        last = where[before].max(initial=-1)
+        first = where[after].min(initial=len(order))
+        if last < first:
+            # the new step fits between its neighbours, the rest of the order holds
+            self._order = np.insert(order, last + 1, position).astype(np.int32)
+            self._rework = np.concatenate((rework[~split], np.zeros(len(new), bool)))
+
+    def remove_step(self, position):
+        """
+        Removes the step at position, joining each of its predecessors to each of
+        its successors.
+        """
+        before = self.predecessors(position)
+        after = self.successors(position)
+        order = self.topological_order()
+        rework = self.rework
+        keep = (self.edges[:, 0] != position) & (self.edges[:, 1] != position)
+        existing = set(map(tuple, self.edges.tolist()))
+        bridge = np.array(
+            [(p, s) for p in before for s in after if (p, s) not in existing],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+        edges = np.concatenate((self.edges[keep], bridge))
+        self.count -= 1
+        self.edges = (edges - (edges > position)).astype(np.int32)
+        self._reset()
+        # removing a step and joining around it keeps the order and the loops
+        order = order[order != position]
+        self._order = (order - (order > position)).astype(np.int32)
+        self._rework = np.concatenate((rework[keep], np.zeros(len(bridge), bool)))
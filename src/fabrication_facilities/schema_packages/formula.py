@@ -0,0 +1,283 @@
+#######################################################################################
+# Helpers used to turn chemical formulas into element counts and fractions. The same #
+# few formulas (SiO2, Si3N4, SF6, ...) are normalized thousands of times in a single  #
+# upload, so parsed formulas are kept in a bounded, process-wide LRU cache keyed on   #
+# the canonical spelling of the formula.                                              #
+#######################################################################################
+import re
+from functools import cache, lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+FORMULA_CACHE_SIZE = 1024
+N_ELEMENTS = 118
+
+_SUBSCRIPTS = str.maketrans('₀₁₂₃₄₅₆₇₈₉', '0123456789')
+_ADDUCT_SEPARATORS = str.maketrans({'•': '·', '*': '·'})
+_GROUPS = {'(': ')', '[': ']', '{': '}'}
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+_HYDRATE = re.compile(r'\d+(?:\.\d+)?H2O(?=$|[.·])')
+_TOKEN = re.compile(
+    r"""
+    (?P<element>[A-Z][a-z]*)(?P<count>\d+(?:\.\d+)?)?
+    |(?P<open>[(\[{])(?![\d+-])
+    |(?P<close>[)\]}])(?:(?P<group_charge>\d+[+-])(?=$|·)|(?P<multiplier>\d+(?:\.\d+)?))?
+    |·(?P<coefficient>\d+(?:\.\d+)?)?
+    |(?P<charge>\^\d*[+-]|[(\[{]\d*[+-][)\]}]|\+{2,}|-{2,}|[+-]\d*)(?=$|·)
+    """,
+    re.VERBOSE,
+)
+
+
+@cache
+def ase_data():
+    """
+    Returns ase.data, imported on first use.
+    """
+    from ase import data
+
+    return data
+
+
+class ParsedFormula(NamedTuple):
+    """
+    Immutable result of the parsing of a chemical formula. Elements are kept in order
+    of first appearance, the other tuples are aligned with them.
+    """
+
+    formula: str
+    elements: tuple
+    counts: tuple
+    atomic_fractions: tuple
+    mass_fractions: tuple
+    charge: int = 0
+    atomic_numbers: tuple = ()
+
+
+class CompositionMatrices(NamedTuple):
+    """
+    Dense compositions of N formulas, one row per formula and one column per element
+    (column Z - 1 for atomic number Z). Rows of empty formulas are all zeros.
+    """
+
+    counts: np.ndarray
+    atomic_fractions: np.ndarray
+    mass_fractions: np.ndarray
+
+
+def _is_adduct_dot(formula, index):
+    # A dot between two digits is a decimal point (Si0.5Ge0.5) unless a water of
+    # hydration follows a subscript, as in the usual ASCII spelling CuSO4.5H2O.
+    before = formula[index - 1 : index]
+    after = formula[index + 1 : index + 2]
+    if not (before.isdigit() and after.isdigit()):
+        return True
+    start = index - 1
+    while start > 0 and formula[start - 1].isdigit():
+        start -= 1
+    if start == 0 or formula[start - 1] in '.·':
+        return False
+    return _HYDRATE.match(formula, index + 1) is not None
+
+
+def canonicalize_formula(formula):
+    """
+    Returns the spelling of the formula used as cache key: blanks are removed,
+    unicode subscripts become digits and every adduct separator becomes a middle
+    dot, while dots used as decimal points are kept.
+    """
+    formula = formula.translate(_SUBSCRIPTS).translate(_ADDUCT_SEPARATORS)
+    formula = ''.join(formula.split())
+    if '.' not in formula:
+        return formula
+    return ''.join(
+        '·' if char == '.' and _is_adduct_dot(formula, index) else char
+        for index, char in enumerate(formula)
+    )
+
+
+def _read_charge(token):
+    magnitude = ''.join(char for char in token if char.isdigit())
+    sign = 1 if '+' in token else -1
+    return sign * (int(magnitude) if magnitude else token.count('+') + token.count('-'))
+
+
+def _merge(target, source, multiplier):
+    for element, count in source.items():
+        target[element] = target.get(element, 0) + count * multiplier
+
+
+def _close_group(formula, stack, closers, token):
+    closing, group_charge, multiplier = token.group(
+        'close', 'group_charge', 'multiplier'
+    )
+    if not closers or closers.pop() != closing:
+        raise ValueError(f'Unbalanced {closing!r} in {formula}')
+    group = stack.pop()
+    _merge(stack[-1], group, float(multiplier) if multiplier else 1.0)
+    if group_charge is None:
+        return 0
+    if closers:
+        raise ValueError(f'Charge inside a group in {formula}')
+    return _read_charge(group_charge)
+
+
+def _as_count(value):
+    if not value.is_integer():
+        value = round(value, 10)
+    return int(value) if value.is_integer() else value
+
+
+def expand_formula(formula):
+    """
+    Single-pass parser of a canonical formula returning elements, counts and charge.
+
+    Element counts are accumulated on a stack with one frame per open group, so
+    nested groups are multiplied out without expanding strings. Supported syntax:
+
+    - nested (), [] and {} groups with integer or decimal multipliers
+    - decimal subscripts, e.g. Si0.5Ge0.5
+    - adducts separated by middle dots with optional coefficients, e.g.
+      CaSO4·0.5H2O or Na2CO3·10H2O
+    - charges closing an adduct: SO4^2-, SO4(2-), NH4+, Fe+3, Fe++ or a digit and
+      a sign after a closing group, e.g. [Fe(CN)6]4-
+    """
+    totals = {}
+    stack = [{}]
+    closers = []
+    charge = 0
+    coefficient, index = 1.0, 0
+    if formula[:1].isdigit():
+        leading = _NUMBER.match(formula)
+        coefficient, index = float(leading.group()), leading.end()
+    length = len(formula)
+    while index < length:
+        token = _TOKEN.match(formula, index)
+        if token is None:
+            raise ValueError(f'Unexpected character {formula[index]!r} in {formula}')
+        index = token.end()
+        (
+            element,
+            count,
+            opening,
+            closing,
+            group_charge,
+            multiplier,
+            separator_coefficient,
+            adduct_charge,
+        ) = token.groups()
+        if element is not None:
+            frame = stack[-1]
+            frame[element] = frame.get(element, 0) + (float(count) if count else 1.0)
+        elif opening is not None:
+            stack.append({})
+            closers.append(_GROUPS[opening])
+        elif closing is not None:
+            charge += _close_group(formula, stack, closers, token)
+        elif adduct_charge is not None:
+            charge += _read_charge(adduct_charge)
+        else:
+            if closers:
+                raise ValueError(f'Unclosed group in {formula}')
+            _merge(totals, stack[0], coefficient)
+            stack[0] = {}
+            coefficient = float(separator_coefficient) if separator_coefficient else 1.0
+    if closers:
+        raise ValueError(f'Unclosed group in {formula}')
+    if totals or coefficient != 1.0:
+        _merge(totals, stack[0], coefficient)
+    else:
+        totals = stack[0]
+    return (
+        tuple(totals),
+        tuple(_as_count(count) for count in totals.values()),
+        charge,
+    )
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def _parse_canonical_formula(formula):
+    elements, counts, charge = expand_formula(formula)
+    total = sum(counts)
+    if total == 0:
+        return ParsedFormula(formula, (), (), (), (), charge)
+    atomic_numbers = ase_data().atomic_numbers
+    atomic_masses = ase_data().atomic_masses
+    unknown = [element for element in elements if element not in atomic_numbers]
+    if unknown:
+        raise ValueError(f'Unknown elements {unknown} in formula {formula}')
+    masses = [
+        atomic_masses[atomic_numbers[element]] * count
+        for element, count in zip(elements, counts)
+    ]
+    mass = sum(masses)
+    return ParsedFormula(
+        formula,
+        elements,
+        counts,
+        tuple(count / total for count in counts),
+        tuple(partial / mass for partial in masses),
+        charge,
+        tuple(atomic_numbers[element] for element in elements),
+    )
+
+
+def parse_formula(formula):
+    """
+    Returns the cached ParsedFormula of a chemical formula. Spellings sharing the
+    same canonical form share the same cache entry.
+    """
+    return _parse_canonical_formula(canonicalize_formula(formula))
+
+
+def formula_cache_info():
+    """
+    Returns hits, misses, maxsize and currsize of the formula cache.
+    """
+    return _parse_canonical_formula.cache_info()
+
+
+def clear_formula_cache():
+    _parse_canonical_formula.cache_clear()
+
+
+@cache
+def _atomic_mass_vector():
+    masses = np.array(ase_data().atomic_masses[1 : N_ELEMENTS + 1], dtype=np.float64)
+    masses.flags.writeable = False
+    return masses
+
+
+def composition_matrices(formulas):
+    """
+    Batch version of parse_formula returning CompositionMatrices for the formulas.
+
+    Distinct canonical formulas are parsed once (through the formula cache) into a
+    sparse list of (row, column, count) triples, scattered into the count matrix in
+    a single assignment; fractions are then two matrix operations against the
+    atomic-mass vector.
+    """
+    canonical = [canonicalize_formula(formula) for formula in formulas]
+    unique, inverse = np.unique(
+        np.asarray(canonical, dtype=object), return_inverse=True
+    )
+    rows, columns, values = [], [], []
+    for row, formula in enumerate(unique):
+        parsed = _parse_canonical_formula(formula)
+        rows.extend([row] * len(parsed.elements))
+        columns.extend(number - 1 for number in parsed.atomic_numbers)
+        values.extend(parsed.counts)
+    unique_counts = np.zeros((len(unique), N_ELEMENTS))
+    unique_counts[rows, columns] = values
+    counts = unique_counts[inverse.reshape(-1)]
+    masses = counts * _atomic_mass_vector()
+    totals = counts.sum(axis=1, keepdims=True)
+    total_masses = masses.sum(axis=1, keepdims=True)
+    atomic_fractions = np.divide(
+        counts, totals, out=np.zeros_like(counts), where=totals > 0
+    )
+    mass_fractions = np.divide(
+        masses, total_masses, out=np.zeros_like(masses), where=total_masses > 0
+    )
+    return CompositionMatrices(counts, atomic_fractions, mass_fractions)
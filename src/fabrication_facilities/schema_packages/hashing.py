@@ -0,0 +1,38 @@
+#######################################################################################
+# Content hashes of values: arrays on dtype, shape and content, pint quantities on   #
+# magnitude and unit, sequences item by item. Used wherever a cache or a version     #
+# stamp must tell whether values changed without keeping a copy of them.             #
+#######################################################################################
+import hashlib
+
+import numpy as np
+
+HASH_DIGEST_SIZE = 20
+
+
+def _feed(hasher, part):
+    if hasattr(part, 'magnitude') and hasattr(part, 'units'):
+        _feed(hasher, part.magnitude)
+        hasher.update(str(part.units).encode())
+    elif isinstance(part, np.ndarray):
+        hasher.update(f'{part.dtype.str}{part.shape}'.encode())
+        hasher.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, (list, tuple)):
+        hasher.update(f'[{len(part)}'.encode())
+        for item in part:
+            _feed(hasher, item)
+    else:
+        hasher.update(repr(part).encode())
+    hasher.update(b'|')
+
+
+def content_hash(kind, *parts):
+    """
+    Returns the hexadecimal blake2b digest of parts under kind: arrays (hashed on
+    dtype, shape and content), pint quantities (on magnitude and unit), sequences
+    and any value with a stable repr.
+    """
+    hasher = hashlib.blake2b(kind.encode(), digest_size=HASH_DIGEST_SIZE)
+    for part in parts:
+        _feed(hasher, part)
+    return hasher.hexdigest()
@@ -0,0 +1,256 @@
+#######################################################################################
+# Genealogy of wafers, pieces, dies and assemblies. Items are nodes linked to their   #
+# parents: the wafer they were cut from, the components they were bonded from or the #
+# starting materials of a SampleParenting. Descendants are answered from intervals   #
+# of postorder numbers, so an ancestry check is a binary search.                      #
+#######################################################################################
+from bisect import bisect_right
+from collections import deque
+
+_END = float('inf')
+
+
+def item_parents(item):
+    """
+    Returns the ids of the parents of an Item: the wafer it comes from and, for
+    assemblies, its components.
+    """
+    parents = [item.id_wafer_parent] if item.id_wafer_parent else []
+    return parents + [component for component in item.ids_components or [] if component]
+
+
+def material_id(material):
+    """
+    Returns the id of a starting material: the item processed, its lab id or its
+    name.
+    """
+    return material.id_item_processed or material.lab_id or material.name
+
+
+class LineageIndex:
+    """
+    Transitive closure of a genealogy.
+
+    Every item has a postorder number in a spanning forest of the genealogy, in
+    which each item hangs from its first parent, and the list of intervals of the
+    numbers of its descendants. Trees of wafers split and diced are one interval
+    per item; bonded assemblies add one interval per branch joining in. Checking
+    an ancestry is a binary search in these intervals and listing descendants
+    takes the time of the output.
+
+    Items added with known parents and no children yet take the next number and
+    extend the intervals of their ancestors. Other changes, such as parents given
+    to an item already in the index, are applied by renumbering everything at the
+    next query.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.parents = []
+        self._nodes = {}
+        self._numbers = []
+        self._by_number = []
+        self._intervals = []
+        self._stale = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._nodes
+
+    def _node(self, item_id):
+        node = self._nodes.get(item_id)
+        if node is None:
+            node = self._nodes[item_id] = len(self.ids)
+            self.ids.append(item_id)
+            self.parents.append([])
+            self._numbers.append(len(self._by_number))
+            self._intervals.append([(len(self._by_number), len(self._by_number))])
+            self._by_number.append(node)
+        return node
+
+    def add(self, item_id, parents=()):
+        """
+        Adds an item and the ids of its parents. Parents not yet in the index are
+        added as items without parents.
+        """
+        known = item_id in self._nodes
+        parent_nodes = dict.fromkeys(
+            self._node(parent) for parent in parents if parent != item_id
+        )
+        node = self._node(item_id)
+        new = [parent for parent in parent_nodes if parent not in self.parents[node]]
+        if not new:
+            return
+        self.parents[node].extend(new)
+        if known or self._stale:
+            self._stale = True
+            return
+        number = self._numbers[node]
+        for ancestor in self._ancestor_nodes(node):
+            intervals = self._intervals[ancestor]
+            low, high = intervals[-1]
+            if high == number - 1:
+                intervals[-1] = (low, number)
+            else:
+                intervals.append((number, number))
+
+    def add_item(self, item, parents=()):
+        """
+        Adds an Item with the parents it records and any other parents given.
+        """
+        self.add(item.id, [*item_parents(item), *parents])
+
+    def add_parenting(self, parenting):
+        """
+        Adds the outputs of a SampleParenting as children of its inputs.
+        """
+        inputs = [material_id(material) for material in parenting.inputs]
+        for item in parenting.outputs:
+            if item.id:
+                self.add_item(item, [parent for parent in inputs if parent])
+
+    def add_section(self, section):
+        """
+        Adds a SampleParenting or an Item, skipping any other section.
+        """
+        if hasattr(section, 'outputs') and hasattr(section, 'inputs'):
+            self.add_parenting(section)
+        elif getattr(section, 'id', None) and hasattr(section, 'id_wafer_parent'):
+            self.add_item(section)
+
+    def _ancestor_nodes(self, node):
+        seen = set()
+        pending = deque(self.parents[node])
+        while pending:
+            parent = pending.popleft()
+            if parent not in seen:
+                seen.add(parent)
+                pending.extend(self.parents[parent])
+        return seen
+
+    def renumber(self):
+        """
+        Numbers all items again and rebuilds their intervals.
+        """
+        count = len(self.ids)
+        children = [[] for _ in range(count)]
+        tree_children = [[] for _ in range(count)]
+        roots = []
+        for node, parents in enumerate(self.parents):
+            for parent in parents:
+                children[parent].append(node)
+            if parents:
+                tree_children[parents[0]].append(node)
+            else:
+                roots.append(node)
+
+        numbers, lows = [0] * count, [0] * count
+        by_number = []
+        for root in roots:
+            stack = [(root, 0)]
+            while stack:
+                node, cursor = stack[-1]
+                if cursor < len(tree_children[node]):
+                    stack[-1] = (node, cursor + 1)
+                    stack.append((tree_children[node][cursor], 0))
+                    continue
+                stack.pop()
+                numbers[node] = len(by_number)
+                first = tree_children[node][:1]
+                lows[node] = lows[first[0]] if first else numbers[node]
+                by_number.append(node)
+
+        # children before parents, so that their intervals are ready when merged
+        waiting = [len(nodes) for nodes in children]
+        ready = deque(node for node in range(count) if not waiting[node])
+        intervals = [None] * count
+        merged = 0
+        while ready:
+            node = ready.popleft()
+            merged += 1
+            own = (lows[node], numbers[node])
+            extra = [
+                interval
+                for child in children[node]
+                for interval in intervals[child]
+                if not own[0] <= interval[0] <= interval[1] <= own[1]
+            ]
+            intervals[node] = _merge([own, *extra]) if extra else [own]
+            for parent in self.parents[node]:
+                waiting[parent] -= 1
+                if not waiting[parent]:
+                    ready.append(parent)
+        if merged != count or len(by_number) != count:
+            raise ValueError('The genealogy has a loop: an item descends from itself')
+        self._numbers, self._by_number = numbers, by_number
+        self._intervals = intervals
+        self._stale = False
+
+    def _fresh(self, item_id):
+        if self._stale:
+            self.renumber()
+        return self._nodes[item_id]
+
+    def is_ancestor(self, ancestor, descendant):
+        """
+        Returns whether descendant comes, directly or not, from ancestor.
+        """
+        if ancestor == descendant or ancestor not in self or descendant not in self:
+            return False
+        node = self._fresh(ancestor)
+        intervals = self._intervals[node]
+        number = self._numbers[self._nodes[descendant]]
+        position = bisect_right(intervals, (number, _END)) - 1
+        return position >= 0 and intervals[position][1] >= number
+
+    def descendants(self, item_id):
+        """
+        Returns the ids of all the items coming, directly or not, from item_id.
+        """
+        node = self._fresh(item_id)
+        return [
+            self.ids[other]
+            for low, high in self._intervals[node]
+            for other in self._by_number[low : high + 1]
+            if other != node
+        ]
+
+    def ancestors(self, item_id):
+        """
+        Returns the ids of all the items item_id comes from, nearest first.
+        """
+        node = self._nodes[item_id]
+        seen, order = {node}, []
+        pending = deque(self.parents[node])
+        while pending:
+            parent = pending.popleft()
+            if parent not in seen:
+                seen.add(parent)
+                order.append(parent)
+                pending.extend(self.parents[parent])
+        return [self.ids[parent] for parent in order]
+
+    def origins(self, item_id):
+        """
+        Returns the ids of the items without parents item_id comes from, such as
+        the starting lots of a die.
+        """
+        return [
+            ancestor
+            for ancestor in self.ancestors(item_id)
+            if not self.parents[self._nodes[ancestor]]
+        ]
+
+
+def _merge(intervals):
+    intervals.sort()
+    merged = [intervals[0]]
+    for low, high in intervals[1:]:
+        last_low, last_high = merged[-1]
+        if low <= last_high + 1:
+            merged[-1] = (last_low, max(last_high, high))
+        else:
+            merged.append((low, high))
+    return merged
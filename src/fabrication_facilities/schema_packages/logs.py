@@ -0,0 +1,157 @@
+#######################################################################################
+# Streaming reader of instrument logs (furnace, PECVD, chuck temperature, ...) used   #
+# to fill the time and values arrays of ramps. Logs can have millions of lines, so    #
+# the file is parsed in chunks of lines into arrays allocated once from a line count: #
+# besides the result only one chunk is held in memory.                                #
+#######################################################################################
+import io
+import os
+import warnings
+from itertools import chain, islice
+from typing import NamedTuple
+
+import numpy as np
+
+LOG_CHUNK_LINES = 65536
+LOG_BLOCK_SIZE = 1 << 20
+LOG_DELIMITERS = {'.csv': ',', '.tsv': '\t', '.tab': '\t'}
+
+
+class RampLog(NamedTuple):
+    """
+    Time and value columns read from a log file.
+    """
+
+    time: np.ndarray
+    values: np.ndarray
+
+
+def count_lines(file, block_size=LOG_BLOCK_SIZE):
+    """
+    Counts the lines of a binary file reading it in blocks, then rewinds it to
+    where it was.
+    """
+    start = file.tell()
+    lines, last = 0, b'\n'
+    for block in iter(lambda: file.read(block_size), b''):
+        lines += block.count(b'\n')
+        last = block[-1:]
+    file.seek(start)
+    return lines + (last != b'\n')
+
+
+def sniff_delimiter(line):
+    """
+    Returns the delimiter of a log line: tab, comma or semicolon, or None for
+    columns separated by blanks.
+    """
+    for delimiter in ('\t', ',', ';'):
+        if delimiter in line:
+            return delimiter
+    return None
+
+
+def _is_number(field):
+    try:
+        float(field)
+    except ValueError:
+        return False
+    return True
+
+
+def _first_record(file, comments):
+    for line in file:
+        stripped = line.strip()
+        if stripped and not stripped.startswith(comments.encode()):
+            return line
+    return b''
+
+
+def _is_header(fields, columns):
+    if any(isinstance(column, str) and not column.isdigit() for column in columns):
+        return True
+    indices = [int(column) for column in columns]
+    return not all(
+        _is_number(fields[index]) for index in indices if index < len(fields)
+    )
+
+
+def _column_index(column, header):
+    if isinstance(column, int) or column.isdigit():
+        return int(column)
+    if header is None or column not in header:
+        raise ValueError(f'Column {column!r} not found in the log header {header}')
+    return header.index(column)
+
+
+def _parse_chunk(lines, delimiter, columns, comments):
+    text = b''.join(lines).decode('utf-8', errors='replace')
+    with warnings.catch_warnings():
+        # chunks made only of comments or blank lines are empty
+        warnings.simplefilter('ignore', UserWarning)
+        return np.loadtxt(
+            io.StringIO(text),
+            delimiter=delimiter,
+            usecols=columns,
+            comments=comments,
+            ndmin=2,
+        )
+
+
+def read_ramp_log(
+    file,
+    time_column=0,
+    values_column=1,
+    *,
+    delimiter=None,
+    comments='#',
+    chunk_lines=LOG_CHUNK_LINES,
+):
+    """
+    Reads the time and value columns of a CSV/TSV log into a RampLog.
+
+    file is a path or a seekable binary file. Columns are given by index or by name
+    in the header row, which is recognised as the first line that is neither blank
+    nor a comment and has non-numeric fields in the selected columns. When no
+    delimiter is given it is taken from the file extension or sniffed from that
+    line.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        if delimiter is None:
+            delimiter = LOG_DELIMITERS.get(os.path.splitext(file)[1].lower())
+        with open(file, 'rb') as opened:
+            return read_ramp_log(
+                opened,
+                time_column,
+                values_column,
+                delimiter=delimiter,
+                comments=comments,
+                chunk_lines=chunk_lines,
+            )
+
+    capacity = count_lines(file)
+    first = _first_record(file, comments)
+    if not first:
+        return RampLog(np.empty(0), np.empty(0))
+    line = first.decode('utf-8', errors='replace').strip()
+    if delimiter is None:
+        delimiter = sniff_delimiter(line)
+    fields = [field.strip().strip('"') for field in line.split(delimiter)]
+    header = None
+    if _is_header(fields, (time_column, values_column)):
+        header, first = fields, b''
+    columns = (
+        _column_index(time_column, header),
+        _column_index(values_column, header),
+    )
+
+    time = np.empty(capacity)
+    values = np.empty(capacity)
+    filled = 0
+    lines = chain([first], file)
+    while chunk := list(islice(lines, chunk_lines)):
+        data = _parse_chunk(chunk, delimiter, columns, comments)
+        time[filled : filled + len(data)] = data[:, 0]
+        values[filled : filled + len(data)] = data[:, 1]
+        filled += len(data)
+    return RampLog(time[:filled], values[:filled])
@@ -0,0 +1,322 @@
+#######################################################################################
+# Structural diff of two routes. Steps are aligned on their signature (kind of step, #
+# step type and recipe): common ends and signatures unique to both routes anchor the #
+# alignment, the gaps left are aligned in a band around their diagonal. Only aligned #
+# pairs of steps are compared, quantity by quantity.                                 #
+#######################################################################################
+from bisect import bisect_left
+from typing import NamedTuple
+
+import numpy as np
+from nomad.metainfo import Reference
+from schema_packages.utils import reference_key
+
+ALIGNMENT_BAND = 16
+# Relative difference left by a unit conversion of equal values
+CONVERSION_TOLERANCE = 1e-12
+
+# Quantities recording a run rather than setting it, left out of the comparison
+RUN_QUANTITIES = (
+    'name',
+    'job_number',
+    'step_id',
+    'id_item_processed',
+    'operator',
+    'starting_date',
+    'ending_date',
+    'datetime',
+    'notes',
+    'description',
+)
+RUN_SUB_SECTIONS = ('outputs', 'users')
+
+
+class ParameterDelta(NamedTuple):
+    """
+    Quantity differing between two aligned steps, by its path in the step.
+    difference is after - before when both values can be subtracted.
+    """
+
+    path: str
+    before: object
+    after: object
+    difference: object
+
+
+class StepDifference(NamedTuple):
+    """
+    Entry of a process diff. kind is 'equal', 'changed', 'inserted' or 'removed',
+    before and after the positions of the step in each route (None when absent).
+    """
+
+    kind: str
+    before: object
+    after: object
+    deltas: list
+
+
+def step_signature(step):
+    """
+    Returns what a step must share with another to be aligned with it: its
+    section, step type and recipe.
+    """
+    return (
+        step.m_def.name,
+        getattr(step, 'step_type', None),
+        getattr(step, 'recipe_name', None),
+    )
+
+
+def step_parameters(section, prefix=''):
+    """
+    Returns the values of the quantities set on a section and its subsections by
+    path, leaving out RUN_QUANTITIES and RUN_SUB_SECTIONS. References are given by
+    reference_key.
+    """
+    parameters = {}
+    for name, quantity in section.m_def.all_quantities.items():
+        if name in RUN_QUANTITIES or not section.m_is_set(quantity):
+            continue
+        value = section.m_get(quantity)
+        if isinstance(quantity.type, Reference):
+            value = (
+                [reference_key(item) for item in value]
+                if isinstance(value, list)
+                else reference_key(value)
+            )
+        parameters[f'{prefix}{name}'] = value
+    for name, sub_section in section.m_def.all_sub_sections.items():
+        if name in RUN_SUB_SECTIONS:
+            continue
+        children = section.m_get_sub_sections(sub_section)
+        for index, child in enumerate(children):
+            path = (
+                f'{prefix}{name}/{index}/'
+                if sub_section.repeats
+                else f'{prefix}{name}/'
+            )
+            parameters.update(step_parameters(child, path))
+    return parameters
+
+
+def _difference(before, after):
+    if isinstance(before, (bool, str)) or isinstance(after, (bool, str)):
+        return None
+    try:
+        return after - before
+    except (TypeError, ValueError, ArithmeticError):
+        return None
+
+
+def same_value(before, after):
+    """
+    Returns whether two parameter values are equal: arrays element-wise with NaN
+    equal to NaN, pint quantities of different units once converted, up to the
+    rounding of the conversion.
+    """
+    before_units, after_units = hasattr(before, 'units'), hasattr(after, 'units')
+    if before_units != after_units:
+        return False
+    if before_units:
+        if before.units != after.units:
+            try:
+                after = after.to(before.units)
+            except TypeError:
+                # pint raises a DimensionalityError, a TypeError, for other dimensions
+                return False
+            return bool(
+                np.shape(before) == np.shape(after)
+                and np.allclose(
+                    before.magnitude,
+                    after.magnitude,
+                    rtol=CONVERSION_TOLERANCE,
+                    atol=0.0,
+                    equal_nan=True,
+                )
+            )
+        before, after = before.magnitude, after.magnitude
+    try:
+        return bool(np.array_equal(before, after, equal_nan=True))
+    except TypeError:
+        return bool(np.array_equal(before, after))
+
+
+def parameter_deltas(before, after):
+    """
+    Returns the ParameterDelta of the quantities differing between two parameter
+    dictionaries of step_parameters.
+    """
+    deltas = []
+    for path in sorted(before.keys() | after.keys()):
+        old, new = before.get(path), after.get(path)
+        if not same_value(old, new):
+            deltas.append(ParameterDelta(path, old, new, _difference(old, new)))
+    return deltas
+
+
+def _unique_positions(items):
+    positions = {}
+    for position, item in enumerate(items):
+        positions[item] = None if item in positions else position
+    return {
+        item: position for item, position in positions.items() if position is not None
+    }
+
+
+def _anchors(before, after):
+    """
+    Returns increasing pairs of positions of the signatures occurring once in both
+    sequences, as many as possible (patience alignment).
+    """
+    unique_after = _unique_positions(after)
+    pairs = [
+        (position, unique_after[item])
+        for item, position in _unique_positions(before).items()
+        if item in unique_after
+    ]
+    pairs.sort()
+    # longest increasing subsequence of the positions in after
+    tails, tail_pairs, links = [], [], []
+    for pair in pairs:
+        length = bisect_left(tails, pair[1])
+        links.append(tail_pairs[length - 1] if length else None)
+        if length == len(tails):
+            tails.append(pair[1])
+            tail_pairs.append(len(links) - 1)
+        else:
+            tails[length] = pair[1]
+            tail_pairs[length] = len(links) - 1
+    anchors = []
+    index = tail_pairs[-1] if tail_pairs else None
+    while index is not None:
+        anchors.append(pairs[index])
+        index = links[index]
+    return anchors[::-1]
+
+
+def _banded_alignment(before, after, band):
+    """
+    Returns the pairs of positions of a longest common subsequence of before and
+    after among the alignments staying within band steps of the diagonal.
+    """
+    count_before, count_after = len(before), len(after)
+    low = min(0, count_after - count_before) - band
+    high = max(0, count_after - count_before) + band
+    width = high - low + 1
+    # lengths[i][k] is the common length of before[:i] and after[:i + low + k]
+    lengths = [[-1] * width for _ in range(count_before + 1)]
+    for k in range(width):
+        if 0 <= low + k <= count_after:
+            lengths[0][k] = 0
+    for i in range(1, count_before + 1):
+        row, previous = lengths[i], lengths[i - 1]
+        for k in range(width):
+            j = i + low + k
+            if j < 0 or j > count_after:
+                continue
+            best = previous[k + 1] if k + 1 < width else -1
+            if j > 0 and k > 0:
+                best = max(best, row[k - 1])
+            if j == 0:
+                best = max(best, 0)
+            if j > 0 and previous[k] >= 0 and before[i - 1] == after[j - 1]:
+                best = max(best, previous[k] + 1)
+            row[k] = best
+    pairs = []
+    i, j = count_before, count_after
+    while i > 0 and j > 0:
+        k = j - i - low
+        if before[i - 1] == after[j - 1] and lengths[i - 1][k] + 1 == lengths[i][k]:
+            pairs.append((i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif k + 1 < width and lengths[i - 1][k + 1] == lengths[i][k]:
+            i -= 1
+        else:
+            j -= 1
+    return pairs[::-1]
+
+
+def align(before, after, band=ALIGNMENT_BAND):
+    """
+    Returns increasing pairs of positions of equal items of before and after: the
+    common first and last items, the items occurring once in both and, between
+    these anchors, a banded alignment of what is left.
+    """
+    start = 0
+    while start < min(len(before), len(after)) and before[start] == after[start]:
+        start += 1
+    end = 0
+    while (
+        end < min(len(before), len(after)) - start
+        and before[-1 - end] == after[-1 - end]
+    ):
+        end += 1
+    pairs = [(i, i) for i in range(start)]
+    middle_before = before[start : len(before) - end]
+    middle_after = after[start : len(after) - end]
+    if middle_before and middle_after:
+        anchors = _anchors(middle_before, middle_after)
+        previous = (-1, -1)
+        for anchor in [*anchors, (len(middle_before), len(middle_after))]:
+            gap_before = middle_before[previous[0] + 1 : anchor[0]]
+            gap_after = middle_after[previous[1] + 1 : anchor[1]]
+            if gap_before and gap_after:
+                # the gap may hold signatures unique to it once the anchors are out
+                inner = (
+                    align(gap_before, gap_after, band)
+                    if anchors
+                    else _banded_alignment(gap_before, gap_after, band)
+                )
+                pairs.extend(
+                    (previous[0] + 1 + i + start, previous[1] + 1 + j + start)
+                    for i, j in inner
+                )
+            if anchor[0] < len(middle_before):
+                pairs.append((anchor[0] + start, anchor[1] + start))
+            previous = anchor
+    pairs.extend(
+        (len(before) - end + offset, len(after) - end + offset) for offset in range(end)
+    )
+    return pairs
+
+
+def diff_steps(before, after, band=ALIGNMENT_BAND):
+    """
+    Returns the StepDifference list turning the steps before into the steps after,
+    in the order of the routes.
+    """
+    pairs = align(
+        [step_signature(step) for step in before],
+        [step_signature(step) for step in after],
+        band,
+    )
+    differences = []
+    i = j = 0
+    for pair_before, pair_after in [*pairs, (len(before), len(after))]:
+        differences.extend(
+            StepDifference('removed', position, None, [])
+            for position in range(i, pair_before)
+        )
+        differences.extend(
+            StepDifference('inserted', None, position, [])
+            for position in range(j, pair_after)
+        )
+        if pair_before < len(before):
+            deltas = parameter_deltas(
+                step_parameters(before[pair_before]), step_parameters(after[pair_after])
+            )
+            differences.append(
+                StepDifference(
+                    'changed' if deltas else 'equal', pair_before, pair_after, deltas
+                )
+            )
+        i, j = pair_before + 1, pair_after + 1
+    return differences
+
+
+def diff_processes(before, after, backend=None, band=ALIGNMENT_BAND):
+    """
+    Returns the diff_steps of two FabricationProcess, loading the steps of each
+    in one bulk read.
+    """
+    return diff_steps(before.load_steps(backend), after.load_steps(backend), band)
@@ -0,0 +1,78 @@
+#######################################################################################
+# Profiles of recipe ramps. When only start value, end value, duration and behavior  #
+# of a ramp are known, its time and values arrays are generated here so that recipe  #
+# entries are plotted like measured ones. All segments of a program are evaluated on  #
+# one (segments, points) grid, without per-point Python work.                         #
+#######################################################################################
+import numpy as np
+
+RAMP_PROFILE_POINTS = 200
+MIN_PROFILE_POINTS = 2
+RAMP_BEHAVIORS = ('linear', 'exponential', 'sigmoidal')
+EXPONENTIAL_RATE = 5.0
+SIGMOID_STEEPNESS = 10.0
+
+# Words of increment_behavior recognised for each behavior
+_BEHAVIOR_KEYWORDS = (
+    ('exponential', ('exp',)),
+    ('sigmoidal', ('sigm', 'logistic', 's-curve')),
+    ('linear', ('lin', 'uniform', 'constant')),
+)
+
+
+def ramp_behavior(text):
+    """
+    Returns the behavior in RAMP_BEHAVIORS described by a free text such as
+    'linear(uniform)' or 'Sigmoidal'. An empty text is linear.
+    """
+    text = (text or 'linear').lower()
+    for behavior, keywords in _BEHAVIOR_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return behavior
+    raise ValueError(f'Unknown ramp behavior {text!r}, use one of {RAMP_BEHAVIORS}')
+
+
+def _exponential(fraction):
+    return np.expm1(-EXPONENTIAL_RATE * fraction) / np.expm1(-EXPONENTIAL_RATE)
+
+
+def _sigmoidal(fraction):
+    logistic = 1 / (1 + np.exp(-SIGMOID_STEEPNESS * (fraction - 0.5)))
+    low, high = 1 / (1 + np.exp(SIGMOID_STEEPNESS * np.array([0.5, -0.5])))
+    return (logistic - low) / (high - low)
+
+
+def piecewise_profile(starts, ends, durations, behaviors, points=RAMP_PROFILE_POINTS):
+    """
+    Returns time and values of a program of consecutive ramp segments, each going
+    from its start to its end value in its duration with its behavior (see
+    ramp_behavior). Every segment is sampled at points points; the first point of
+    a segment after the first is dropped, being the last point of the previous one.
+
+    Values are in the units of starts and ends, time in the units of durations.
+    """
+    starts, ends, durations = (
+        np.atleast_1d(np.asarray(array, dtype=np.float64))
+        for array in (starts, ends, durations)
+    )
+    if points < MIN_PROFILE_POINTS:
+        raise ValueError(
+            f'A ramp profile needs at least {MIN_PROFILE_POINTS} points per segment'
+        )
+    kinds = np.array([RAMP_BEHAVIORS.index(ramp_behavior(b)) for b in behaviors])
+    fraction = np.linspace(0.0, 1.0, points)
+    shapes = np.stack((fraction, _exponential(fraction), _sigmoidal(fraction)))
+    shape = shapes[kinds]
+    values = starts[:, np.newaxis] + (ends - starts)[:, np.newaxis] * shape
+    offsets = np.concatenate(([0.0], np.cumsum(durations)[:-1]))
+    time = offsets[:, np.newaxis] + durations[:, np.newaxis] * fraction
+    keep = np.ones(time.shape, dtype=bool)
+    keep[1:, 0] = False
+    return time[keep], values[keep]
+
+
+def ramp_profile(start, end, duration, behavior=None, points=RAMP_PROFILE_POINTS):
+    """
+    Returns time and values of a single ramp, see piecewise_profile.
+    """
+    return piecewise_profile([start], [end], [duration], [behavior], points)
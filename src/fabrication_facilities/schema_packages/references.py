@@ -0,0 +1,244 @@
+#######################################################################################
+# Batched loading of referenced archives. Following the references of a process one  #
+# at a time reads one archive per step, equipment or material. Here the references   #
+# of a whole section tree are collected, deduplicated by archive and loaded through   #
+# a backend in one bulk read, then put in the cache of the context that resolves them.#
+#######################################################################################
+import json
+import os
+from typing import NamedTuple
+from urllib.parse import urldefrag
+
+from nomad.metainfo import MetainfoReferenceError, MProxy, Reference
+
+ARCHIVE_SUFFIXES = ('.archive.json', '.archive.yaml', '.archive.yml')
+
+
+class ArchiveRequest(NamedTuple):
+    """
+    Archive to load, as parsed from a reference by the context.
+    """
+
+    entry_id: str
+    upload_id: str
+    installation_url: str
+
+
+class ArchiveBackend:
+    """
+    Access to archives in bulk. load_archives returns the archives it could load
+    by request; the missing ones are left to the context. The base backend loads
+    them one by one through the context, reads counts the bulk reads.
+    """
+
+    def __init__(self):
+        self.reads = 0
+
+    def load_archives(self, context, requests):
+        self.reads += 1
+        archives = {}
+        for request in requests:
+            try:
+                archives[request] = context.load_archive(*request)
+            except (MetainfoReferenceError, NotImplementedError):
+                continue
+        return archives
+
+
+class DirectoryBackend(ArchiveBackend):
+    """
+    Archives stored as files in a directory, named after their entry id with one
+    of ARCHIVE_SUFFIXES, at the top or in a subdirectory named after their upload.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+
+    def path(self, request):
+        for folder in (request.upload_id, None):
+            for suffix in ARCHIVE_SUFFIXES:
+                parts = [self.directory, f'{request.entry_id}{suffix}']
+                if folder:
+                    parts.insert(1, folder)
+                path = os.path.join(*parts)
+                if os.path.isfile(path):
+                    return path
+        return None
+
+    def load_archives(self, context, requests):
+        from nomad.datamodel import EntryArchive, EntryMetadata
+
+        self.reads += 1
+        archives = {}
+        for request in requests:
+            path = self.path(request)
+            if path is None:
+                continue
+            with open(path, encoding='utf-8') as file:
+                if path.endswith('.json'):
+                    data = json.load(file)
+                else:
+                    import yaml
+
+                    data = yaml.safe_load(file)
+            archive = EntryArchive.m_from_dict(data, m_context=context)
+            if archive.metadata is None:
+                archive.metadata = EntryMetadata()
+            archive.metadata.entry_id = archive.metadata.entry_id or request.entry_id
+            archive.metadata.upload_id = archive.metadata.upload_id or request.upload_id
+            archives[request] = archive
+        return archives
+
+
+class UploadFilesBackend(ArchiveBackend):
+    """
+    Archives of the uploads of a NOMAD installation: the archive file of each
+    upload is opened once for all the entries requested in it.
+    """
+
+    def load_archives(self, context, requests):
+        from nomad.archive import to_json
+        from nomad.datamodel import EntryArchive
+        from nomad.files import UploadFiles
+
+        self.reads += 1
+        by_upload = {}
+        for request in requests:
+            by_upload.setdefault(request.upload_id, []).append(request)
+        archives = {}
+        for upload_id, upload_requests in by_upload.items():
+            if upload_id is None or upload_id != context.upload_id:
+                continue
+            upload_files = UploadFiles.get(upload_id)
+            with upload_files.read_archive(upload_requests[0].entry_id) as reader:
+                for request in upload_requests:
+                    try:
+                        data = to_json(reader[request.entry_id])
+                    except KeyError:
+                        continue
+                    archives[request] = EntryArchive.m_from_dict(
+                        data, m_context=context
+                    )
+        return archives
+
+
+def default_backend(context):
+    """
+    Returns the backend for a context: the one set as its archive_backend, the
+    upload files on a NOMAD server or the context itself otherwise.
+    """
+    if getattr(context, 'archive_backend', None) is not None:
+        return context.archive_backend
+    if hasattr(context, 'upload_files'):
+        return UploadFilesBackend()
+    return ArchiveBackend()
+
+
+def pending_references(section, quantities=None):
+    """
+    Returns the unresolved references of a section and all its subsections, only
+    those of the given quantity definitions when quantities is given.
+    """
+    proxies = []
+    for current in (section, *section.m_all_contents()):
+        for quantity in current.m_def.all_quantities.values():
+            if not isinstance(quantity.type, Reference) or not current.m_is_set(
+                quantity
+            ):
+                continue
+            if quantities is not None and quantity not in quantities:
+                continue
+            value = current.m_get(quantity)
+            for proxy in value if isinstance(value, list) else [value]:
+                if isinstance(proxy, MProxy) and proxy.m_proxy_resolved is None:
+                    proxies.append(proxy)
+    return proxies
+
+
+def archive_url(proxy):
+    """
+    Returns the archive part of a reference, empty for references within the
+    same archive.
+    """
+    return urldefrag(proxy.m_proxy_value)[0]
+
+
+def archive_request(context, url):
+    """
+    Returns the ArchiveRequest of the archive at url, None when the context has
+    it cached already or url is not an archive. Parsing the URL and looking up
+    the cache need the internals of nomad's Context: with other contexts None is
+    returned, and the references are left to be resolved one at a time.
+    """
+    archives = getattr(context, 'archives', None)
+    parse_url = getattr(context, '_parse_url', None)
+    if archives is None or parse_url is None:
+        return None
+    if url in archives:
+        return None
+    installation_url, upload_id, kind, entry_id = parse_url(url)
+    if kind != 'archive':
+        return None
+    return ArchiveRequest(entry_id, upload_id, installation_url)
+
+
+def prefetch_references(section, backend=None, quantities=None, depth=1):
+    """
+    Loads the archives referenced from section and its subsections in one bulk
+    read of backend and caches them in the context of the section, so that the
+    references then resolve without reading. quantities restricts the references
+    followed, see pending_references. With depth above 1 the references of the
+    loaded archives are prefetched too, one bulk read per level.
+
+    Returns the number of archives loaded.
+    """
+    context = section.m_root().m_context
+    if context is None:
+        return 0
+    backend = default_backend(context) if backend is None else backend
+    loaded = 0
+    sections = [section]
+    for _ in range(depth):
+        requests = {}
+        for current in sections:
+            for proxy in pending_references(current, quantities):
+                url = archive_url(proxy)
+                if not url or url in requests:
+                    continue
+                request = archive_request(context, url)
+                if request is not None:
+                    requests[url] = request
+        if not requests:
+            break
+        archives = backend.load_archives(
+            context, list(dict.fromkeys(requests.values()))
+        )
+        sections = []
+        for url, request in requests.items():
+            if request in archives:
+                context.cache_archive(url, archives[request])
+                sections.append(archives[request])
+        loaded += len(sections)
+    return loaded
+
+
+def prefetch_archive_references(archive, logger=None, quantities=None):
+    """
+    Prefetches the references of an archive, or those of quantities, once per
+    normalization before the first of them is resolved. Archives that cannot be
+    found or read are logged and left to the resolution of each reference.
+    """
+    if archive is None:
+        return 0
+    done = archive.m_cache.setdefault('prefetched_references', set())
+    key = None if quantities is None else tuple(q.name for q in quantities)
+    if key in done:
+        return 0
+    done.add(key)
+    try:
+        return prefetch_references(archive, quantities=quantities)
+    except (MetainfoReferenceError, NotImplementedError, OSError) as e:
+        if logger is not None:
+            logger.warning('could not prefetch the referenced archives', exc_info=e)
+        return 0
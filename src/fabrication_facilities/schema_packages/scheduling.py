@@ -0,0 +1,348 @@
+#######################################################################################
+# Discrete-event simulation of lots running through the equipment. Each lot follows  #
+# the flow of its process; a step is ready when its predecessors are done and waits  #
+# in the queues of the tools able to run it. Events (releases, ends of steps, ends   #
+# of bookings) are taken from a heap in time order, and an idle tool picks the next  #
+# step of its queue with a dispatch rule.                                            #
+#######################################################################################
+import heapq
+from typing import NamedTuple
+
+import numpy as np
+from schema_packages.cycle_time import PLANNED, step_times, timestamp
+
+DISPATCH_RULES = ('fifo', 'spt', 'critical_ratio')
+# Due date of a lot without one, as a multiple of its planned cycle time
+DUE_DATE_FACTOR = 2.0
+
+RELEASE, FINISH, FREE = range(3)
+
+
+class Route(NamedTuple):
+    """
+    A process compiled for the simulation: planned duration of each step in
+    minutes, the tools able to run it (none when not bookable), the flow in
+    compressed sparse rows with the number of predecessors of each step, and the
+    planned work left from each step to the end of the process.
+    """
+
+    durations: np.ndarray
+    tools: list
+    offsets: np.ndarray
+    successors: np.ndarray
+    indegree: np.ndarray
+    remaining: np.ndarray
+
+    @property
+    def planned_total(self):
+        return float(self.remaining.max(initial=0.0))
+
+
+class Schedule(NamedTuple):
+    """
+    Result of a simulation, times in minutes from its start. Operations are given
+    by row in lot, step, tool (-1 for steps run without a tool), start and end.
+    utilization is the busy fraction of each tool up to the makespan, cycle_times
+    the time from release to completion of each lot.
+    """
+
+    lot: np.ndarray
+    step: np.ndarray
+    tool: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    utilization: np.ndarray
+    completion: np.ndarray
+    cycle_times: np.ndarray
+
+    @property
+    def makespan(self):
+        return float(self.end.max(initial=0.0))
+
+
+def equipment_key(equipment):
+    """
+    Returns what identifies a tool: its lab id, its name otherwise.
+    """
+    return getattr(equipment, 'lab_id', None) or getattr(equipment, 'name', None)
+
+
+def instrument_keys(step):
+    """
+    Returns the keys of the tools referenced by a step, read from the id and name
+    copied on its references and resolving a reference only when both are unset.
+    """
+    keys = []
+    for instrument in getattr(step, 'instruments', None) or []:
+        key = instrument.id or instrument.name
+        if key is None and instrument.section is not None:
+            key = equipment_key(instrument.section)
+        if key is not None:
+            keys.append(key)
+    return keys
+
+
+def compile_route(durations, tools, flow):
+    """
+    Returns the Route of steps with planned durations, running on tools (a list
+    of tool indices per step) along a ProcessFlow.
+    """
+    durations = np.nan_to_num(np.asarray(durations, dtype=float))
+    offsets, successors, _, _ = flow.adjacency()
+    remaining = durations.copy()
+    for step in flow.topological_order()[::-1]:
+        after = successors[offsets[step] : offsets[step + 1]]
+        if len(after):
+            remaining[step] += remaining[after].max()
+    return Route(
+        durations,
+        [tuple(step) for step in tools],
+        offsets,
+        successors,
+        np.diff(flow.adjacency()[2]).astype(np.int64),
+        remaining,
+    )
+
+
+def process_route(process, positions, backend=None):
+    """
+    Returns the Route of a FabricationProcess, positions giving the index of the
+    bookable tools by equipment_key.
+    """
+    steps = process.load_steps(backend)
+    durations = [step_times(step)[PLANNED] for step in steps]
+    tools = [
+        dict.fromkeys(
+            positions[key] for key in instrument_keys(step) if key in positions
+        )
+        for step in steps
+    ]
+    return compile_route(durations, tools, process.process_flow())
+
+
+def booked_intervals(equipment, start):
+    """
+    Returns the (start, end) in minutes from start of the jobs of the logbook of a
+    tool ending after start, sorted.
+    """
+    origin = timestamp(start)
+    intervals = []
+    for job in equipment.equipmentLogBook or []:
+        begin = timestamp(job.starting_date) - origin
+        end = timestamp(job.ending_date) - origin
+        if not np.isnan(begin) and end > 0:
+            intervals.append((max(begin, 0.0), end))
+    return sorted(intervals)
+
+
+class _Simulation:
+    def __init__(self, routes, tools, rule, *, releases, due_dates, bookings):
+        if rule not in DISPATCH_RULES:
+            raise ValueError(f'Dispatch rule must be one of {DISPATCH_RULES}')
+        self.routes = routes
+        self.rule = rule
+        self.releases = releases
+        self.due_dates = due_dates
+        self.bookings = [list(intervals) for intervals in bookings]
+        self.events = []
+        self.sequence = 0
+        self.queues = [[] for _ in range(tools)]
+        self.busy = np.zeros(tools, dtype=bool)
+        self.taken = set()
+        self.waiting = [route.indegree.copy() for route in routes]
+        self.left = [len(route.durations) for route in routes]
+        self.completion = np.array(releases, dtype=float)
+        self.operations = []
+
+    def push(self, time, kind, payload):
+        self.sequence += 1
+        heapq.heappush(self.events, (time, kind, self.sequence, payload))
+
+    def ready(self, now, lot, step):
+        route = self.routes[lot]
+        tools = route.tools[step]
+        if not tools:
+            self.start(now, lot, step, -1)
+            return
+        duration = route.durations[step]
+        self.sequence += 1
+        if self.rule == 'fifo':
+            entry = (now, self.sequence, lot, step)
+        elif self.rule == 'spt':
+            entry = (duration, self.sequence, lot, step)
+        else:
+            entry = (
+                self.due_dates[lot],
+                max(route.remaining[step], 1e-9),
+                self.sequence,
+                lot,
+                step,
+            )
+        for tool in tools:
+            if self.rule == 'critical_ratio':
+                self.queues[tool].append(entry)
+            else:
+                heapq.heappush(self.queues[tool], entry)
+        for tool in tools:
+            self.dispatch(now, tool)
+
+    def _pop(self, now, tool):
+        queue = self.queues[tool]
+        if self.rule != 'critical_ratio':
+            while queue:
+                entry = heapq.heappop(queue)
+                if entry[-3] not in self.taken:
+                    return entry
+            return None
+        queue[:] = [entry for entry in queue if entry[2] not in self.taken]
+        if not queue:
+            return None
+        due, remaining = np.array([entry[:2] for entry in queue]).T
+        return queue.pop(int(np.argmin((due - now) / remaining)))
+
+    def dispatch(self, now, tool):
+        if self.busy[tool]:
+            return
+        bookings = self.bookings[tool]
+        while bookings and bookings[0][1] <= now:
+            bookings.pop(0)
+        if bookings and bookings[0][0] <= now:
+            self.busy[tool] = True
+            self.push(bookings[0][1], FREE, tool)
+            return
+        entry = self._pop(now, tool)
+        if entry is None:
+            return
+        lot, step = entry[-2:]
+        end = now + self.routes[lot].durations[step]
+        if bookings and bookings[0][0] < end:
+            # the step would run into a booking: wait for its end
+            if self.rule == 'critical_ratio':
+                self.queues[tool].append(entry)
+            else:
+                heapq.heappush(self.queues[tool], entry)
+            self.busy[tool] = True
+            self.push(bookings[0][1], FREE, tool)
+            return
+        self.taken.add(entry[-3])
+        self.busy[tool] = True
+        self.start(now, lot, step, tool)
+
+    def start(self, now, lot, step, tool):
+        end = now + self.routes[lot].durations[step]
+        self.operations.append((lot, step, tool, now, end))
+        self.push(end, FINISH, (lot, step, tool))
+
+    def finish(self, now, lot, step, tool):
+        if tool >= 0:
+            self.busy[tool] = False
+        route = self.routes[lot]
+        self.left[lot] -= 1
+        if not self.left[lot]:
+            self.completion[lot] = now
+        waiting = self.waiting[lot]
+        for following in route.successors[
+            route.offsets[step] : route.offsets[step + 1]
+        ]:
+            waiting[following] -= 1
+            if not waiting[following]:
+                self.ready(now, lot, int(following))
+        if tool >= 0:
+            self.dispatch(now, tool)
+
+    def run(self):
+        for lot, release in enumerate(self.releases):
+            self.push(release, RELEASE, lot)
+        while self.events:
+            now, kind, _, payload = heapq.heappop(self.events)
+            if kind == RELEASE:
+                waiting = self.waiting[payload]
+                for step in np.flatnonzero(waiting == 0):
+                    self.ready(now, payload, int(step))
+            elif kind == FINISH:
+                self.finish(now, *payload)
+            else:
+                self.busy[payload] = False
+                self.dispatch(now, payload)
+        return self.operations
+
+
+def simulate(
+    routes, tools, rule='fifo', *, releases=None, due_dates=None, bookings=None
+):
+    """
+    Returns the Schedule of lots following routes (one Route per lot) on a number
+    of tools, dispatched with one of DISPATCH_RULES: 'fifo' takes the step ready
+    first, 'spt' the shortest one and 'critical_ratio' the one with the lowest
+    time to its due date over the planned work left.
+
+    releases and due_dates give the times of the lots in minutes, 0 and
+    DUE_DATE_FACTOR times the planned cycle time after release by default.
+    bookings are the sorted (start, end) intervals each tool is unavailable in.
+    """
+    releases = np.zeros(len(routes)) if releases is None else np.asarray(releases)
+    releases = releases.astype(float)
+    if due_dates is None:
+        due_dates = releases + DUE_DATE_FACTOR * np.array(
+            [route.planned_total for route in routes]
+        )
+    simulation = _Simulation(
+        routes,
+        tools,
+        rule,
+        releases=releases,
+        due_dates=np.asarray(due_dates, dtype=float),
+        bookings=bookings or [[] for _ in range(tools)],
+    )
+    operations = np.array(simulation.run(), dtype=float).reshape(-1, 5)
+    lot, step, tool = operations[:, :3].astype(np.int64).T
+    start, end = operations[:, 3], operations[:, 4]
+    makespan = end.max(initial=0.0)
+    used = tool >= 0
+    busy = np.bincount(tool[used], weights=(end - start)[used], minlength=tools)
+    return Schedule(
+        lot,
+        step,
+        tool,
+        start,
+        end,
+        busy / makespan if makespan > 0 else np.zeros(tools),
+        simulation.completion,
+        simulation.completion - releases,
+    )
+
+
+def schedule(
+    processes,
+    equipments,
+    rule='fifo',
+    *,
+    releases=None,
+    due_dates=None,
+    start=None,
+    backend=None,
+):
+    """
+    Returns the Schedule of lots, one FabricationProcess each, on equipments (see
+    simulate). Lots sharing a process share its compiled route. Steps run on the
+    bookable tools referenced by their instruments; steps without one run without
+    waiting. When start is given, the logbook jobs of the tools ending after it
+    block them, and times are counted from it.
+    """
+    tools = [equipment for equipment in equipments if equipment.is_bookable]
+    positions = {equipment_key(tool): index for index, tool in enumerate(tools)}
+    routes = {}
+    for process in processes:
+        if id(process) not in routes:
+            routes[id(process)] = process_route(process, positions, backend)
+    bookings = None
+    if start is not None:
+        bookings = [booked_intervals(tool, start) for tool in tools]
+    return simulate(
+        [routes[id(process)] for process in processes],
+        len(tools),
+        rule,
+        releases=releases,
+        due_dates=due_dates,
+        bookings=bookings,
+    )
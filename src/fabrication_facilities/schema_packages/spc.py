@@ -0,0 +1,325 @@
+#######################################################################################
+# Statistical process control of the rates of etching and deposition runs. Runs are  #
+# grouped by recipe, equipment and quantity, and each group has a control chart      #
+# updated in constant time per run: Welford mean and variance, EWMA, two-sided CUSUM #
+# and the Western Electric rules. A whole export is aggregated in one linear pass.   #
+#######################################################################################
+import math
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+from nomad.metainfo import MetainfoReferenceError
+from schema_packages.calculus.calculus import resolve_reference
+from schema_packages.utils import reference_key
+
+SPC_BASELINE_RUNS = 20
+MIN_BASELINE_RUNS = 2
+EWMA_WEIGHT = 0.2
+EWMA_LIMIT = 3.0
+CUSUM_ALLOWANCE = 0.5
+CUSUM_THRESHOLD = 5.0
+RATE_UNIT = 'nm/minute'
+
+# Quantities of process steps and of calculus sheet outputs that are charted
+STEP_QUANTITIES = ('etching_rate_target', 'deposition_rate_target')
+OUTPUT_QUANTITIES = ('etching_rate_value', 'deposition_rate_value')
+
+# Western Electric rules: (name, runs looked at, sigmas, runs beyond on one side)
+WESTERN_ELECTRIC_RULES = (
+    ('one beyond 3 sigma', 1, 3.0, 1),
+    ('two of three beyond 2 sigma', 3, 2.0, 2),
+    ('four of five beyond 1 sigma', 5, 1.0, 4),
+    ('eight on one side', 8, 0.0, 8),
+)
+
+
+class SPCKey(NamedTuple):
+    """
+    Group of runs sharing a control chart.
+    """
+
+    recipe: str
+    equipment: str
+    quantity: str
+
+
+class RunningStatistics:
+    """
+    Count, mean and variance of a stream of values by the Welford algorithm.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._squares = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._squares += delta * (value - self.mean)
+
+    def add_values(self, values):
+        """
+        Adds an array of values at once, merging their statistics (Chan et al.).
+        """
+        values = np.asarray(values, dtype=float)
+        count = len(values)
+        if not count:
+            return
+        mean = float(values.mean())
+        squares = float(((values - mean) ** 2).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._squares += squares + delta**2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        return self._squares / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def standard_deviation(self):
+        return math.sqrt(self.variance)
+
+
+class ControlChart:
+    """
+    Control chart of one group of runs.
+
+    The first baseline_runs runs estimate the center line and the standard
+    deviation, which are then frozen; every later run is checked against the
+    Western Electric rules and the EWMA and CUSUM limits. statistics keeps the
+    mean and variance of all runs. Each run is added in constant time; the
+    history is kept for the figure.
+    """
+
+    def __init__(
+        self,
+        baseline_runs=SPC_BASELINE_RUNS,
+        ewma_weight=EWMA_WEIGHT,
+        cusum_allowance=CUSUM_ALLOWANCE,
+        cusum_threshold=CUSUM_THRESHOLD,
+    ):
+        if baseline_runs < MIN_BASELINE_RUNS:
+            raise ValueError(
+                f'A control chart needs a baseline of at least {MIN_BASELINE_RUNS} runs'
+            )
+        self.baseline_runs = baseline_runs
+        self.ewma_weight = ewma_weight
+        self.cusum_allowance = cusum_allowance
+        self.cusum_threshold = cusum_threshold
+        self.statistics = RunningStatistics()
+        self.center = self.sigma = None
+        self.ewma = None
+        self.cusum_high = self.cusum_low = 0.0
+        self.values, self.labels, self.ewmas, self.violations = [], [], [], []
+        self._zones = [
+            deque(maxlen=window) for _, window, _, _ in WESTERN_ELECTRIC_RULES
+        ]
+
+    @property
+    def monitoring(self):
+        return self.center is not None
+
+    def _score(self, value):
+        if self.sigma > 0:
+            return (value - self.center) / self.sigma
+        return (
+            0.0
+            if value == self.center
+            else math.copysign(math.inf, value - self.center)
+        )
+
+    def _check(self, value):
+        score = self._score(value)
+        rules = []
+        for zone, (name, window, sigmas, beyond) in zip(
+            self._zones, WESTERN_ELECTRIC_RULES
+        ):
+            zone.append(math.copysign(1, score) if abs(score) > sigmas else 0)
+            if max(zone.count(1), zone.count(-1)) >= beyond:
+                rules.append(name)
+        weight = self.ewma_weight
+        self.ewma = weight * value + (1 - weight) * self.ewma
+        runs = self.statistics.count - self.baseline_runs
+        spread = math.sqrt(weight / (2 - weight) * (1 - (1 - weight) ** (2 * runs)))
+        if abs(self.ewma - self.center) > EWMA_LIMIT * self.sigma * spread:
+            rules.append('EWMA')
+        self.cusum_high = max(0.0, self.cusum_high + score - self.cusum_allowance)
+        self.cusum_low = max(0.0, self.cusum_low - score - self.cusum_allowance)
+        if max(self.cusum_high, self.cusum_low) > self.cusum_threshold:
+            rules.append('CUSUM')
+        return rules
+
+    def add(self, value, label=None):
+        """
+        Adds a run and returns the names of the rules it violates.
+        """
+        value = float(value)
+        self.statistics.add(value)
+        rules = self._check(value) if self.monitoring else []
+        if not self.monitoring and self.statistics.count == self.baseline_runs:
+            self.center = self.statistics.mean
+            self.sigma = self.statistics.standard_deviation
+            self.ewma = self.center
+        self.values.append(value)
+        self.labels.append(label)
+        self.ewmas.append(self.ewma)
+        self.violations.append(rules)
+        return rules
+
+    def figure_json(self, title, unit=RATE_UNIT, height=400, width=800):
+        """
+        Returns the control chart as a plotly figure dictionary: the runs, their
+        EWMA, the center line, the 3 sigma limits and the runs violating a rule.
+        """
+        runs = list(range(1, len(self.values) + 1))
+        data = [
+            _trace('runs', runs, self.values, 'lines+markers', text=self.labels),
+            _trace('EWMA', runs, self.ewmas, 'lines', line={'dash': 'dot'}),
+        ]
+        if self.monitoring:
+            for name, sigmas in (('UCL', 3), ('center', 0), ('LCL', -3)):
+                level = self.center + sigmas * self.sigma
+                data.append(
+                    _trace(
+                        name,
+                        [1, runs[-1]],
+                        [level, level],
+                        'lines',
+                        line={'dash': 'dash'},
+                    )
+                )
+        flagged = [index for index, rules in enumerate(self.violations) if rules]
+        data.append(
+            _trace(
+                'violations',
+                [runs[index] for index in flagged],
+                [self.values[index] for index in flagged],
+                'markers',
+                text=[', '.join(self.violations[index]) for index in flagged],
+                marker={'color': 'red', 'size': 10, 'symbol': 'x'},
+            )
+        )
+        layout = {
+            'title': {'text': title},
+            'xaxis': {'title': {'text': 'Run'}},
+            'yaxis': {'title': {'text': f'Rate ({unit})'}},
+            'height': height,
+            'width': width,
+        }
+        return {'data': data, 'layout': layout}
+
+
+def _trace(name, x, y, mode, **options):
+    return {'name': name, 'x': x, 'y': y, 'mode': mode, 'type': 'scatter', **options}
+
+
+def equipment_name(step):
+    """
+    Returns the identifier of the first instrument of a step: its id, its name or
+    the reference to the equipment, without loading it.
+    """
+    for instrument in getattr(step, 'instruments', None) or []:
+        name = instrument.id or instrument.name or reference_key(instrument.section)
+        if name:
+            return str(name)
+    return None
+
+
+def run_label(step):
+    for label in ('starting_date', 'job_number', 'name'):
+        value = getattr(step, label, None)
+        if value is not None:
+            return str(value)
+    return None
+
+
+def referenced_step(sheet):
+    """
+    Returns the first process step referenced by the inputs of a calculus sheet,
+    None when there is none or it cannot be resolved.
+    """
+    inputs = getattr(sheet, 'inputs', None)
+    for _, reference_quantity, _ in getattr(inputs, 'input_references', ()):
+        reference = getattr(inputs, reference_quantity)
+        if reference is None:
+            continue
+        try:
+            return resolve_reference(sheet.m_root(), reference)
+        except MetainfoReferenceError:
+            return None
+    return None
+
+
+def section_runs(section):
+    """
+    Yields (key, value, label) for the charted quantities set on a section: the
+    rate targets of etching and deposition steps and the rates of the calculus
+    sheets, grouped by the recipe and equipment of the step they reference.
+    """
+    step, quantities = section, STEP_QUANTITIES
+    output = getattr(section, 'output', None)
+    if output is not None:
+        step, section, quantities = referenced_step(section), output, OUTPUT_QUANTITIES
+    if step is None:
+        return
+    for quantity in quantities:
+        value = getattr(section, quantity, None)
+        if value is not None:
+            key = SPCKey(
+                getattr(step, 'recipe_name', None), equipment_name(step), quantity
+            )
+            yield key, value.m_as(RATE_UNIT), run_label(step)
+
+
+class SPCAggregator:
+    """
+    Control charts of all groups of runs, keyed by SPCKey. Options are passed to
+    each ControlChart.
+    """
+
+    def __init__(self, **chart_options):
+        self.chart_options = chart_options
+        self.charts = {}
+
+    def add(self, key, value, label=None):
+        """
+        Adds a run to the chart of its group and returns the rules it violates.
+        """
+        chart = self.charts.get(key)
+        if chart is None:
+            chart = self.charts[key] = ControlChart(**self.chart_options)
+        return chart.add(value, label)
+
+    def add_section(self, section):
+        """
+        Adds the runs of a process step or calculus sheet, returning the list of
+        (key, violated rules).
+        """
+        return [
+            (key, self.add(key, value, label))
+            for key, value, label in section_runs(section)
+        ]
+
+    def add_archives(self, archives):
+        """
+        Adds the entries of an export in order, in one pass. Entries without
+        charted quantities are skipped.
+        """
+        for archive in archives:
+            if archive.data is not None:
+                self.add_section(archive.data)
+        return self
+
+    def figures(self):
+        """
+        Returns the control chart figure of every group.
+        """
+        return {
+            key: chart.figure_json(f'{key.quantity} of {key.recipe} on {key.equipment}')
+            for key, chart in self.charts.items()
+        }
@@ -1,17 +1,9 @@
-from typing import (
-    TYPE_CHECKING,
-)
-
 import numpy as np
 from nomad.datamodel.metainfo.basesections import ElementalComposition
 from nomad.datamodel.metainfo.eln import Chemical
 from nomad.metainfo import MEnum, Package, Quantity, Section, SubSection
 from schema_packages.fabrication_utilities import FabricationProcessStep
-from schema_packages.utils import parse_chemical_formula
-
-if TYPE_CHECKING:
-    from nomad.datamodel.datamodel import EntryArchive
-    from structlog.stdlib import BoundLogger
+from schema_packages.utils import ElementalCompositionMixin
 
 m_package = Package(name='Add processes schema')
 
@@ -122,7 +114,7 @@ class ElectronGun(FabricationProcessStep):
     )
 
 
-class Sputtering(Chemical, FabricationProcessStep):
+class Sputtering(ElementalCompositionMixin, Chemical, FabricationProcessStep):
     """
     Class autogenerated from yaml schema.
     """
@@ -258,26 +250,9 @@ class Sputtering(Chemical, FabricationProcessStep):
         section_def=ElementalComposition, repeats=True
     )
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        super().normalize(archive, logger)
-        if self.chemical_formula:
-            elements, counts = parse_chemical_formula(self.chemical_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.material_elemental_composition = elementality
+    elemental_composition_targets = (
+        ('chemical_formula', 'material_elemental_composition'),
+    )
 
 
 #######################################################################################
@@ -368,7 +343,7 @@ class Bonding(FabricationProcessStep):
     )
 
 
-class SOG(Chemical, FabricationProcessStep):
+class SOG(ElementalCompositionMixin, Chemical, FabricationProcessStep):
     m_def = Section(
         a_eln={
             'hide': [
@@ -458,26 +433,9 @@ class SOG(Chemical, FabricationProcessStep):
         section_def=ElementalComposition, repeats=True
     )
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        super().normalize(archive, logger)
-        if self.chemical_formula:
-            elements, counts = parse_chemical_formula(self.chemical_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.substrate_elemental_composition = elementality
+    elemental_composition_targets = (
+        ('chemical_formula', 'substrate_elemental_composition'),
+    )
 
 
 m_package.__init_metainfo__()
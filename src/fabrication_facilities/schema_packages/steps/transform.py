@@ -27,10 +27,10 @@ from schema_packages.steps.utils import (
     WritingParameters,
 )
 from schema_packages.utils import (
+    ElementalCompositionMixin,
     FabricationChemical,
     TimeRampPressure,
     TimeRampTemperature,
-    parse_chemical_formula,
 )
 
 if TYPE_CHECKING:
@@ -516,7 +516,9 @@ class FIB(FabricationProcessStep):
 #######################################################################################
 
 
-class Annealing(Chemical, FabricationProcessStep, ArchiveSection):
+class Annealing(
+    ElementalCompositionMixin, Chemical, FabricationProcessStep, ArchiveSection
+):
     m_def = Section(
         a_eln={
             'hide': [
@@ -629,47 +631,15 @@ class Annealing(Chemical, FabricationProcessStep, ArchiveSection):
         section_def=ElementalComposition, repeats=True
     )
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        super().normalize(archive, logger)
-        if self.chemical_formula:
-            elements, counts = parse_chemical_formula(self.chemical_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.material_elemental_composition = elementality
-        if self.gas_formula:
-            elements, counts = parse_chemical_formula(self.gas_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.gas_elemental_composition = elementality
-
-
-class LTODensification(Chemical, FabricationProcessStep, ArchiveSection):
+    elemental_composition_targets = (
+        ('chemical_formula', 'material_elemental_composition'),
+        ('gas_formula', 'gas_elemental_composition'),
+    )
+
+
+class LTODensification(
+    ElementalCompositionMixin, Chemical, FabricationProcessStep, ArchiveSection
+):
     m_def = Section(
         a_eln={
             'hide': [
@@ -748,26 +718,7 @@ class LTODensification(Chemical, FabricationProcessStep, ArchiveSection):
         section_def=ElementalComposition, repeats=True
     )
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        super().normalize(archive, logger)
-        if self.chemical_formula:
-            elements, counts = parse_chemical_formula(self.chemical_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.gas_elemental_composition = elementality
+    elemental_composition_targets = (('chemical_formula', 'gas_elemental_composition'),)
 
 
 class Dicing(FabricationProcessStep, ArchiveSection):
@@ -1023,7 +974,9 @@ class LabelingCleaning(FabricationProcessStep, ArchiveSection):
     )
 
 
-class SOD(Chemical, FabricationProcessStep, ArchiveSection):
+class SOD(
+    ElementalCompositionMixin, Chemical, FabricationProcessStep, ArchiveSection
+):
     m_def = Section(
         a_eln={
             'hide': [
@@ -1154,29 +1107,14 @@ class SOD(Chemical, FabricationProcessStep, ArchiveSection):
         section_def=ElementalComposition, repeats=True
     )
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        super().normalize(archive, logger)
-        if self.chemical_formula:
-            elements, counts = parse_chemical_formula(self.chemical_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.doping_material_elemental_composition = elementality
-
-
-class Track(Chemical, FabricationProcessStep, ArchiveSection):
+    elemental_composition_targets = (
+        ('chemical_formula', 'doping_material_elemental_composition'),
+    )
+
+
+class Track(
+    ElementalCompositionMixin, Chemical, FabricationProcessStep, ArchiveSection
+):
     m_def = Section(
         a_eln={
             'hide': [
@@ -1413,6 +1351,10 @@ class Track(Chemical, FabricationProcessStep, ArchiveSection):
         section_def=ElementalComposition, repeats=True
     )
 
+    elemental_composition_targets = (
+        ('chemical_formula', 'resist_elemental_composition'),
+    )
+
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         super().normalize(archive, logger)
         # if self.exposure_required:
@@ -1425,24 +1367,6 @@ class Track(Chemical, FabricationProcessStep, ArchiveSection):
         #         },
         #         unit='minute',
         #     )
-        if self.chemical_formula:
-            elements, counts = parse_chemical_formula(self.chemical_formula)
-            total = 0
-            for token in counts:
-                total += int(token)
-            if total != 0:
-                elemental_fraction = np.array(counts) / total
-                elementality = []
-                i = 0
-                for entry in elements:
-                    elemental_try = ElementalComposition()
-                    elemental_try.element = entry
-                    elemental_try.atomic_fraction = elemental_fraction[i]
-                    i += 1
-                    elementality.append(elemental_try)
-            else:
-                print('No elements provided')
-            self.resist_elemental_composition = elementality
 
 
 m_package.__init_metainfo__()
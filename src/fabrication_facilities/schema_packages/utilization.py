@@ -0,0 +1,282 @@
+#######################################################################################
+# Utilization of the equipment from the jobs of their logbooks. Jobs are folded in   #
+# chunks into per-window arrays (busy time, jobs and items finished, idle gaps), so  #
+# memory grows with the number of windows and not with the number of jobs. Jobs     #
+# crossing windows are split with a difference array of the windows fully covered.  #
+#######################################################################################
+from datetime import datetime, timezone
+from itertools import islice
+
+import numpy as np
+from schema_packages.cycle_time import timestamp
+from schema_packages.scheduling import equipment_key
+from schema_packages.spc import RunningStatistics
+
+UTILIZATION_WINDOW = 24 * 60
+JOB_CHUNK = 4096
+MINUTES_PER_DAY = 24 * 60
+
+# Per-window arrays of a tool
+WINDOW_ARRAYS = ('busy', 'covered', 'jobs', 'items', 'gaps', 'gap_total', 'gap_max')
+
+
+def _date(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return timestamp(value)
+
+
+def job_record(job):
+    """
+    Returns the (start, end) in minutes since the epoch and the number of items
+    of a logbook job, a Jobdone section or its dictionary in an archive.
+    """
+    if isinstance(job, dict):
+        items = job.get('id_items_processed')
+        return (
+            _date(job.get('starting_date')),
+            _date(job.get('ending_date')),
+            len(items) if items is not None else 0,
+        )
+    items = job.id_items_processed
+    return (
+        _date(job.starting_date),
+        _date(job.ending_date),
+        len(items) if items is not None else 0,
+    )
+
+
+class ToolUtilization:
+    """
+    Utilization of one tool by windows of window minutes, aligned on multiples of
+    window since the epoch (UTC days by default). Jobs are expected in logbook
+    order: a job overlapping the ones before it only counts for the time after
+    their end, and the idle gap before a job is the time since that end.
+    """
+
+    def __init__(self, window=UTILIZATION_WINDOW):
+        self.window = window
+        self.first = None
+        self.arrays = {name: np.zeros(0) for name in WINDOW_ARRAYS}
+        self.last_end = -np.inf
+        self.gaps = RunningStatistics()
+
+    def _reserve(self, low, high):
+        if self.first is None:
+            self.first = low
+        count = len(self.arrays['busy'])
+        before = max(self.first - low, 0)
+        after = max(high + 1 - self.first - count, 0)
+        if before or after:
+            if before:
+                before = max(before, count)
+            if after:
+                after = max(after, count)
+            self.arrays = {
+                name: np.pad(values, (before, after))
+                for name, values in self.arrays.items()
+            }
+            self.first -= before
+
+    def add_jobs(self, starts, ends, items=None):
+        """
+        Folds jobs given by arrays of start and end in minutes since the epoch,
+        in logbook order. Jobs without both dates are skipped.
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        items = np.zeros(len(starts)) if items is None else np.asarray(items, float)
+        dated = np.isfinite(starts) & np.isfinite(ends) & (ends >= starts)
+        starts, ends, items = starts[dated], ends[dated], items[dated]
+        if not len(starts):
+            return self
+        window = self.window
+        previous = np.maximum.accumulate(np.concatenate(([self.last_end], ends)))
+        previous, self.last_end = previous[:-1], previous[-1]
+        busy_start = np.maximum(starts, previous)
+        first = np.floor(starts / window).astype(np.int64)
+        last = np.floor(ends / window).astype(np.int64)
+        self._reserve(int(first.min()), int(last.max()))
+        arrays, offset = self.arrays, self.first
+
+        counted = ends > busy_start
+        begin = np.floor(busy_start[counted] / window).astype(np.int64) - offset
+        end = last[counted] - offset
+        busy_start, busy_end = busy_start[counted], ends[counted]
+        same = begin == end
+        np.add.at(arrays['busy'], begin[same], (busy_end - busy_start)[same])
+        split = ~same
+        np.add.at(
+            arrays['busy'],
+            begin[split],
+            (begin[split] + offset + 1) * window - busy_start[split],
+        )
+        np.add.at(
+            arrays['busy'], end[split], busy_end[split] - (end[split] + offset) * window
+        )
+        np.add.at(arrays['covered'], begin[split] + 1, 1.0)
+        np.add.at(arrays['covered'], end[split], -1.0)
+
+        finished = last - offset
+        np.add.at(arrays['jobs'], finished, 1.0)
+        np.add.at(arrays['items'], finished, items)
+
+        gaps = starts - previous
+        idle = np.isfinite(gaps) & (gaps > 0)
+        started = first[idle] - offset
+        np.add.at(arrays['gaps'], started, 1.0)
+        np.add.at(arrays['gap_total'], started, gaps[idle])
+        np.maximum.at(arrays['gap_max'], started, gaps[idle])
+        self.gaps.add_values(gaps[idle])
+        return self
+
+    def add_records(self, jobs, chunk=JOB_CHUNK):
+        """
+        Folds logbook jobs (see job_record) from an iterable, chunk at a time.
+        """
+        jobs = iter(jobs)
+        while True:
+            records = np.array(
+                [job_record(job) for job in islice(jobs, chunk)], dtype=float
+            ).reshape(-1, 3)
+            if not len(records):
+                return self
+            self.add_jobs(*records.T)
+
+    @property
+    def window_starts(self):
+        """
+        Start of each window in minutes since the epoch.
+        """
+        first = 0 if self.first is None else self.first
+        return (first + np.arange(len(self.arrays['busy']))) * self.window
+
+    @property
+    def busy(self):
+        """
+        Busy minutes in each window.
+        """
+        return self.arrays['busy'] + self.window * np.cumsum(self.arrays['covered'])
+
+    @property
+    def utilization(self):
+        return self.busy / self.window
+
+    @property
+    def throughput(self):
+        """
+        Jobs finished per day in each window.
+        """
+        return self.arrays['jobs'] * MINUTES_PER_DAY / self.window
+
+    @property
+    def items(self):
+        return self.arrays['items']
+
+    @property
+    def gap_mean(self):
+        """
+        Mean idle gap before the jobs starting in each window, NaN without gaps.
+        """
+        gaps = self.arrays['gaps']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(gaps > 0, self.arrays['gap_total'] / gaps, np.nan)
+
+    @property
+    def gap_max(self):
+        return self.arrays['gap_max']
+
+    def figure_json(self, title, height=400, width=800):
+        """
+        Returns the utilization of each window and the jobs finished per day as a
+        plotly figure dictionary.
+        """
+        dates = [
+            datetime.fromtimestamp(start * 60, timezone.utc).isoformat()
+            for start in self.window_starts
+        ]
+        data = [
+            {
+                'name': 'utilization',
+                'x': dates,
+                'y': self.utilization.tolist(),
+                'type': 'bar',
+            },
+            {
+                'name': 'jobs per day',
+                'x': dates,
+                'y': self.throughput.tolist(),
+                'mode': 'lines+markers',
+                'type': 'scatter',
+                'yaxis': 'y2',
+            },
+        ]
+        layout = {
+            'title': {'text': title},
+            'xaxis': {'title': {'text': 'Date'}},
+            'yaxis': {'title': {'text': 'Utilization'}, 'range': [0, 1]},
+            'yaxis2': {
+                'title': {'text': 'Jobs per day'},
+                'overlaying': 'y',
+                'side': 'right',
+            },
+            'height': height,
+            'width': width,
+        }
+        return {'data': data, 'layout': layout}
+
+
+class UtilizationAggregator:
+    """
+    Utilization of all tools by windows, keyed by equipment_key. Options are
+    passed to each ToolUtilization.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self.tools = {}
+
+    def tool(self, key):
+        utilization = self.tools.get(key)
+        if utilization is None:
+            utilization = self.tools[key] = ToolUtilization(**self.options)
+        return utilization
+
+    def add_equipment(self, equipment):
+        """
+        Folds the logbook of a tool, a section or its dictionary in an archive.
+        """
+        if isinstance(equipment, dict):
+            key = equipment.get('lab_id') or equipment.get('name')
+            jobs = equipment.get('equipmentLogBook') or ()
+        else:
+            key, jobs = equipment_key(equipment), equipment.equipmentLogBook or ()
+        self.tool(key).add_records(jobs)
+        return self
+
+    def add_archives(self, archives):
+        """
+        Folds the logbooks of the tools of an export in one pass. Entries without
+        a logbook are skipped.
+        """
+        for archive in archives:
+            data = archive.get('data') if isinstance(archive, dict) else archive.data
+            if data is None:
+                continue
+            has_logbook = (
+                'equipmentLogBook' in data
+                if isinstance(data, dict)
+                else hasattr(data, 'equipmentLogBook')
+            )
+            if has_logbook:
+                self.add_equipment(data)
+        return self
+
+    def figures(self):
+        """
+        Returns the utilization figure of every tool.
+        """
+        return {
+            key: tool.figure_json(f'Utilization of {key}')
+            for key, tool in self.tools.items()
+        }
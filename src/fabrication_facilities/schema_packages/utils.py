@@ -1,22 +1,35 @@
-import re
-from collections import defaultdict
+import os
 from typing import (
     TYPE_CHECKING,
 )
 
 import numpy as np
-import plotly.express as px
-from ase.data import atomic_masses as am
-from ase.data import atomic_numbers as an
 from nomad.datamodel.data import ArchiveSection, EntryData
 from nomad.datamodel.metainfo.basesections import ElementalComposition
 from nomad.datamodel.metainfo.eln import Chemical
 from nomad.datamodel.metainfo.plot import PlotlyFigure, PlotSection
-from nomad.metainfo import Quantity, Section, SubSection
+from nomad.metainfo import MProxy, MSection, Quantity, Section, SubSection
 from nomad.datamodel.metainfo.basesections import (
     Process,
     Activity
 )
+from schema_packages.figures import (
+    FIGURE_HEIGHT,
+    FIGURE_WIDTH,
+    MAX_FIGURE_POINTS,
+    downsample,
+    figure_cache,
+    figure_key,
+    line_arrays,
+    line_figure_json,
+)
+from schema_packages.formula import (
+    canonicalize_formula,
+    composition_matrices,
+    parse_formula,
+)
+from schema_packages.logs import LOG_DELIMITERS, read_ramp_log
+from schema_packages.profiles import RAMP_PROFILE_POINTS, ramp_profile
 
 if TYPE_CHECKING:
     from nomad.datamodel.datamodel import (
@@ -27,82 +40,117 @@ if TYPE_CHECKING:
     )
 
 
+def reference_key(reference):
+    """
+    Returns what identifies the target of a reference without loading it: its URL
+    when unresolved, the path of the section otherwise.
+    """
+    if isinstance(reference, MProxy):
+        return reference.m_proxy_value
+    if isinstance(reference, MSection):
+        return reference.m_path()
+    return reference
+
+
+def step_value(step, step_quantities):
+    """
+    Returns the first of step_quantities set on the step or, for the measured
+    ones, on its outputs; None when none is set.
+    """
+    outputs = getattr(step, 'outputs', None) or []
+    if isinstance(outputs, MSection):
+        outputs = [outputs]
+    for step_quantity in step_quantities:
+        for section in (step, *outputs):
+            value = getattr(section, step_quantity, None)
+            if value is not None:
+                return value
+    return None
+
+
 def parse_chemical_formula(formula):
-    formula = formula.replace('·', '.')
-    if '.' in formula:
-        main_part, hydrate_part = formula.split('.')
-    else:
-        main_part, hydrate_part = formula, None
+    parsed = parse_formula(formula)
+    return list(parsed.elements), list(parsed.counts)
 
-    def extract_elements(compound):
-        # Espressione per trovare elementi chimici seguiti da un numero opzionale
-        matches = re.findall(r'([A-Z][a-z]*)(\d*)', compound)
-        elements = defaultdict(int)
 
-        for element, count in matches:
-            elements[element] += int(count) if count else 1
+class ElementalCompositionMixin(ArchiveSection):
+    """
+    Base section for sections expanding chemical formulas into ElementalComposition
+    subsections. Subclasses list in `elemental_composition_targets` the pairs
+    (formula quantity, subsection) to fill.
 
-        return elements
+    The canonical formula last expanded into each subsection is kept in m_cache
+    with the element and fractions written, so normalizing again an unchanged
+    formula skips the expansion, while a subsection edited since is rebuilt. The
+    existing ElementalComposition sections are patched in place instead of
+    reallocated. m_cache starts empty whenever an entry is processed again, so the
+    first normalization of each processing always expands the formulas.
+    """
 
-    element_main = defaultdict(int)
+    m_def = Section()
 
-    # Espandiamo le parentesi prima di estrarre gli elementi
-    while '(' in main_part:
-        main_part = re.sub(
-            r'\(([^()]*)\)(\d+)', lambda m: m.group(1) * int(m.group(2)), main_part
+    elemental_composition_targets = ()
+
+    def update_elemental_compositions(self, logger=None):
+        fingerprints = self.m_cache.setdefault('elemental_composition', {})
+        pending = []
+        for formula_name, sub_section_name in self.elemental_composition_targets:
+            formula = getattr(self, formula_name)
+            if not formula:
+                continue
+            fingerprint = (
+                canonicalize_formula(formula),
+                self._elemental_compositions(sub_section_name),
+            )
+            if fingerprints.get(sub_section_name) == fingerprint:
+                continue
+            try:
+                pending.append((sub_section_name, parse_formula(formula)))
+            except ValueError as e:
+                if logger is not None:
+                    logger.warning('could not expand chemical formula', exc_info=e)
+        if not pending:
+            return
+        matrices = composition_matrices([parsed.formula for _, parsed in pending])
+        for row, (sub_section_name, parsed) in enumerate(pending):
+            self._patch_elemental_composition(sub_section_name, parsed, matrices, row)
+            fingerprints[sub_section_name] = (
+                parsed.formula,
+                self._elemental_compositions(sub_section_name),
+            )
+
+    def _elemental_compositions(self, sub_section_name):
+        return tuple(
+            (element.element, element.atomic_fraction, element.mass_fraction)
+            for element in getattr(self, sub_section_name)
         )
 
-    # Trova elementi e numeri
-    matches = re.findall(r'([A-Z][a-z]*)(\d*)', main_part)
+    def _patch_elemental_composition(self, sub_section_name, parsed, matrices, row):
+        sub_section_def = self.m_def.all_sub_sections[sub_section_name]
+        existing = list(self.m_get_sub_sections(sub_section_def))
+        for index, (element, number) in enumerate(
+            zip(parsed.elements, parsed.atomic_numbers)
+        ):
+            values = {
+                'element': element,
+                'atomic_fraction': matrices.atomic_fractions[row, number - 1],
+                'mass_fraction': matrices.mass_fractions[row, number - 1],
+            }
+            if index >= len(existing):
+                self.m_add_sub_section(sub_section_def, ElementalComposition(**values))
+                continue
+            for name, value in values.items():
+                if getattr(existing[index], name) != value:
+                    setattr(existing[index], name, value)
+        for index in range(len(existing) - 1, len(parsed.elements) - 1, -1):
+            self.m_remove_sub_section(sub_section_def, index)
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        super().normalize(archive, logger)
+        self.update_elemental_compositions(logger)
 
-    for element, count in matches:
-        element_main[element] += (
-            int(count) if count else 1
-        )  # Se il numero manca, assume 1
 
-    if hydrate_part:
-        hydrate_match = re.match(r'(\d*)H2O', hydrate_part)
-        if hydrate_match:
-            water_molecules = (
-                int(hydrate_match.group(1)) if hydrate_match.group(1) else 1
-            )
-            elements_hydrate = extract_elements('H2O')
-
-            for element, count in elements_hydrate.items():
-                element_main[element] += count * water_molecules
-
-    # Convertiamo il dizionario in due liste ordinate
-    elements = list(element_main.keys())
-    counts = list(element_main.values())
-
-    return elements, counts
-
-
-def generate_elementality(formula):
-    elements, counts = parse_chemical_formula(formula)
-    total = 0
-    for token in counts:
-        total += int(token)
-    mass = sum(am[an[el]] * cou for el, cou in zip(elements, counts))
-    if total != 0:
-        elemental_fraction = np.array(counts) / total
-        elementality = []
-        i = 0
-        for entry in elements:
-            elemental_try = ElementalComposition()
-            elemental_try.element = entry
-            elemental_try.atomic_fraction = elemental_fraction[i]
-            mass_frac = (am[an[entry]] * counts[i]) / mass
-            elemental_try.mass_fraction = mass_frac
-            i += 1
-            elementality.append(elemental_try)
-    else:
-        print('No elements provided')
-
-    return elementality
-
-
-class FabricationChemical(Chemical, ArchiveSection):
+class FabricationChemical(ElementalCompositionMixin, Chemical, ArchiveSection):
     m_def = Section(
         definition='Chemicals for fabrication products',
         a_eln={
@@ -118,26 +166,90 @@ class FabricationChemical(Chemical, ArchiveSection):
         repeats=True,
     )
 
-    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
-        super().normalize(archive, logger)
-        if self.chemical_formula:
-            self.elemental_composition = generate_elementality(self.chemical_formula)
-
-
-def make_line_express(list1, list2, labelx, labely, finalist, labelfigure):
-    figure1 = px.line(
-        x=list1,
-        y=list2,
-        height=400,
-        width=800,
-        labels={'x': labelx, 'y': labely},
-        markers=True,
+    elemental_composition_targets = (('chemical_formula', 'elemental_composition'),)
+
+
+def plotly_express():
+    """
+    Returns plotly.express, imported on first use to keep plotly out of the plugin
+    load time.
+    """
+    import plotly.express as px
+
+    return px
+
+
+def plotly_graph_objects():
+    """
+    Returns plotly.graph_objects, imported on first use.
+    """
+    import plotly.graph_objects as go
+
+    return go
+
+
+def make_line_express(  # noqa: PLR0917
+    list1,
+    list2,
+    labelx,
+    labely,
+    finalist,
+    labelfigure,
+    *,
+    use_plotly_express=False,
+    max_points=MAX_FIGURE_POINTS,
+    downsampling='lttb',
+):
+    """
+    Appends to finalist a PlotlyFigure with the line of list2 against list1. The
+    figure JSON is written directly from the arrays; use_plotly_express builds it
+    through plotly.express instead.
+
+    Lines longer than max_points are downsampled for display with the downsampling
+    mode ('lttb' or 'minmax'); max_points=None plots every point. Figures are taken
+    from figure_cache when the same line was already plotted with the same options.
+    """
+
+    def build():
+        if use_plotly_express:
+            x, y = downsample(*line_arrays(list1, list2), max_points, downsampling)
+            return (
+                plotly_express()
+                .line(
+                    x=x,
+                    y=y,
+                    height=FIGURE_HEIGHT,
+                    width=FIGURE_WIDTH,
+                    labels={'x': labelx, 'y': labely},
+                    markers=True,
+                )
+                .to_plotly_json()
+            )
+        return line_figure_json(
+            list1,
+            list2,
+            labelx,
+            labely,
+            max_points=max_points,
+            downsampling=downsampling,
+        )
+
+    key = figure_key(
+        'line',
+        list1,
+        list2,
+        labelx,
+        labely,
+        use_plotly_express,
+        max_points,
+        downsampling,
     )
+    figure = figure_cache.get_or_build(key, build)
 
     finalist.append(
         PlotlyFigure(
             label=labelfigure,
-            figure=figure1.to_plotly_json(),
+            figure=figure,
             index=0,
         )
     )
@@ -146,41 +258,65 @@ def make_line_express(list1, list2, labelx, labely, finalist, labelfigure):
 # Capire se se può ingegnerizzare meglio la funzione per ridurre variabili
 
 
-class TimeRampTemperature(PlotSection, EntryData):
+def ramp_quantity(unit, description=None, shape=None):
+    """
+    Returns a float Quantity in unit, edited in the ELN with unit as display unit.
+    """
+    return Quantity(
+        type=np.float64,
+        shape=shape or [],
+        description=description,
+        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': unit},
+        unit=unit,
+    )
+
+
+def _log_column(column, default):
+    return column if column else default
+
+
+def _magnitude(value, unit):
+    if unit is None or not hasattr(value, 'm_as'):
+        return getattr(value, 'magnitude', value)
+    return value.m_as(unit)
+
+
+class TimeRamp(PlotSection, EntryData):
+    """
+    Base of the ramps traced in time. Subclasses define the kind of quantity by
+    declaring start_value, end_value and values in its unit, and the labels used
+    for the figure.
+
+    time and values are typed in the ELN or read from the log file in data_file,
+    a CSV/TSV file with time in seconds and values in the unit of the ramp. Without
+    them, they are generated from start_value, end_value, increment_duration and
+    increment_behavior.
+    """
+
     m_def = Section()
 
+    value_label = 'Value'
+    figure_label = 'Ramp'
+
     name = Quantity(
         type=str,
-        description='What temperature are you tracing?',
+        description='What are you tracing?',
         a_eln={'component': 'StringEditQuantity'},
     )
 
     start_value = Quantity(
         type=np.float64,
         description='Value at the beginning of the increment',
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'celsius',
-        },
-        unit='celsius',
+        a_eln={'component': 'NumberEditQuantity'},
     )
 
     end_value = Quantity(
         type=np.float64,
         description='Value at the end of the increment',
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'celsius',
-        },
-        unit='celsius',
+        a_eln={'component': 'NumberEditQuantity'},
     )
 
-    increment_duration = Quantity(
-        type=np.float64,
-        description='Duration of the increment',
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'sec'},
-        unit='sec',
-    )
+    increment_duration = ramp_quantity('sec', 'Duration of the increment')
 
     increment_behavior = Quantity(
         type=str,
@@ -188,98 +324,118 @@ class TimeRampTemperature(PlotSection, EntryData):
         a_eln={'component': 'StringEditQuantity'},
     )
 
-    time = Quantity(
-        type=np.float64,
-        shape=['*'],
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'sec',
-        },
-        unit='sec',
-    )
-
-    values = Quantity(
-        type=np.float64,
-        shape=['*'],
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'celsius'},
-        unit='celsius',
+    data_file = Quantity(
+        type=str,
+        description="""
+        CSV/TSV log of the ramp, its time (s) and value columns fill time and values
+        """,
+        a_eln={'component': 'FileEditQuantity'},
     )
 
-    def normalize(self, archive, logger):
-        if self.values is not None and len(self.values) > 0:
-            super().normalize(archive, logger)
-            if hasattr(self, 'figures') and self.figures:
-                self.figures.clear()
-            make_line_express(
-                self.time,
-                self.values,
-                'Time (s)',
-                'Temperature (°C)',
-                self.figures,
-                'Ramp of temperature',
-            )
-
-
-class TimeRampPressure(PlotSection, EntryData):
-    m_def = Section()
-
-    name = Quantity(
+    time_column = Quantity(
         type=str,
-        description='What pressure are you tracing?',
+        description='Name or index of the time column of the log (default 0)',
         a_eln={'component': 'StringEditQuantity'},
     )
 
-    start_value = Quantity(
-        type=np.float64,
-        description='Value at the beginning of the increment',
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'mbar',
-        },
-        unit='mbar',
-    )
-
-    end_value = Quantity(
-        type=np.float64,
-        description='Value at the end of the increment',
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'mbar',
-        },
-        unit='mbar',
+    values_column = Quantity(
+        type=str,
+        description='Name or index of the value column of the log (default 1)',
+        a_eln={'component': 'StringEditQuantity'},
     )
 
-    increment_duration = Quantity(
-        type=np.float64,
-        description='Duration of the increment',
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'sec'},
-        unit='sec',
+    profile_points = Quantity(
+        type=int,
+        description="""
+        Number of points of the profile generated from start value, end value,
+        duration and behavior
+        """,
+        a_eln={'component': 'NumberEditQuantity'},
     )
 
-    increment_behavior = Quantity(
-        type=str,
-        description='Is the increment linear(uniform), sigmoidal, etc...?',
-        a_eln={'component': 'StringEditQuantity'},
+    values_from_profile = Quantity(
+        type=bool,
+        description="""
+        Whether time and values are generated from start value, end value, duration
+        and behavior. They are generated again at every normalization while set
+        """,
+        a_eln={'component': 'BoolEditQuantity'},
     )
 
-    time = Quantity(
-        type=np.float64,
-        shape=['*'],
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'sec',
-        },
-        unit='sec',
-    )
+    time = ramp_quantity('sec', shape=['*'])
 
     values = Quantity(
         type=np.float64,
         shape=['*'],
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'mbar'},
-        unit='mbar',
-    )
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+
+    def read_data_file(self, archive, logger):
+        """
+        Fills time and values from data_file. The file is read once per section
+        instance unless data_file or the columns change.
+        """
+        source = (self.data_file, self.time_column, self.values_column)
+        if self.m_cache.get('data_file') == source:
+            return
+        try:
+            with archive.m_context.raw_file(self.data_file, 'rb') as file:
+                log = read_ramp_log(
+                    file,
+                    _log_column(self.time_column, 0),
+                    _log_column(self.values_column, 1),
+                    delimiter=LOG_DELIMITERS.get(
+                        os.path.splitext(self.data_file)[1].lower()
+                    ),
+                )
+        except (OSError, ValueError) as e:
+            logger.warning('could not read the ramp data file', exc_info=e)
+            return
+        self.time = log.time
+        self.values = log.values
+        if self.values_from_profile:
+            self.values_from_profile = False
+        self.m_cache['data_file'] = source
+
+    def needs_profile(self):
+        """
+        Returns whether time and values have to be generated from the ramp
+        parameters: they are all set, and values are empty or were generated.
+        """
+        parameters = (self.start_value, self.end_value, self.increment_duration)
+        if any(parameter is None for parameter in parameters):
+            return False
+        if self.values_from_profile:
+            return True
+        return self.values is None or len(self.values) == 0
+
+    def synthesize_profile(self, logger):
+        """
+        Fills time and values with the ramp going from start_value to end_value in
+        increment_duration with increment_behavior, converted to the units of the
+        values and time quantities.
+        """
+        unit = self.m_def.all_quantities['values'].unit
+        try:
+            time, values = ramp_profile(
+                _magnitude(self.start_value, unit),
+                _magnitude(self.end_value, unit),
+                _magnitude(self.increment_duration, 'sec'),
+                self.increment_behavior,
+                self.profile_points or RAMP_PROFILE_POINTS,
+            )
+        except ValueError as e:
+            logger.warning('could not generate the ramp profile', exc_info=e)
+            return
+        self.time = time
+        self.values = values
+        self.values_from_profile = True
 
     def normalize(self, archive, logger):
+        if self.data_file:
+            self.read_data_file(archive, logger)
+        elif self.needs_profile():
+            self.synthesize_profile(logger)
         if self.values is not None and len(self.values) > 0:
             super().normalize(archive, logger)
             if hasattr(self, 'figures') and self.figures:
@@ -288,155 +444,90 @@ class TimeRampPressure(PlotSection, EntryData):
                 self.time,
                 self.values,
                 'Time (s)',
-                'Pressure (mbar)',
+                self.value_label,
                 self.figures,
-                'Ramp of pressure',
+                self.figure_label,
             )
 
 
-class TimeRampMassflow(PlotSection, EntryData):
+class TimeRampTemperature(TimeRamp):
     m_def = Section()
 
+    value_label = 'Temperature (°C)'
+    figure_label = 'Ramp of temperature'
+
     name = Quantity(
         type=str,
-        description='What massflow are you tracing? (Chemical formulas are accepted)',
+        description='What temperature are you tracing?',
         a_eln={'component': 'StringEditQuantity'},
     )
 
-    start_value = Quantity(
-        type=np.float64,
-        description='Value at the beginning of the increment',
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'centimeter^3/minute',
-        },
-        unit='centimeter^3/minute',
-    )
+    start_value = ramp_quantity('celsius', 'Value at the beginning of the increment')
 
-    end_value = Quantity(
-        type=np.float64,
-        description='Value at the end of the increment',
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'centimeter^3/minute',
-        },
-        unit='centimeter^3/minute',
-    )
+    end_value = ramp_quantity('celsius', 'Value at the end of the increment')
 
-    increment_duration = Quantity(
-        type=np.float64,
-        description='Duration of the increment',
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'sec'},
-        unit='sec',
-    )
+    values = ramp_quantity('celsius', shape=['*'])
 
-    increment_behavior = Quantity(
+
+class TimeRampPressure(TimeRamp):
+    m_def = Section()
+
+    value_label = 'Pressure (mbar)'
+    figure_label = 'Ramp of pressure'
+
+    name = Quantity(
         type=str,
-        description='Is the increment linear(uniform), sigmoidal, etc...?',
+        description='What pressure are you tracing?',
         a_eln={'component': 'StringEditQuantity'},
     )
 
-    time = Quantity(
-        type=np.float64,
-        shape=['*'],
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'sec',
-        },
-        unit='sec',
-    )
+    start_value = ramp_quantity('mbar', 'Value at the beginning of the increment')
 
-    values = Quantity(
-        type=np.float64,
-        shape=['*'],
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'centimeter^3/minute',
-        },
-        unit='centimeter^3/minute',
-    )
+    end_value = ramp_quantity('mbar', 'Value at the end of the increment')
 
-    def normalize(self, archive, logger):
-        if self.values is not None and len(self.values) > 0:
-            super().normalize(archive, logger)
-            if hasattr(self, 'figures') and self.figures:
-                self.figures.clear()
-            make_line_express(
-                self.time,
-                self.values,
-                'Time (s)',
-                'Massflow (sccm)',
-                self.figures,
-                'Ramp of massflow',
-            )
+    values = ramp_quantity('mbar', shape=['*'])
 
 
-class TimeRampRotation(PlotSection, EntryData):
+class TimeRampMassflow(TimeRamp):
     m_def = Section()
 
+    value_label = 'Massflow (sccm)'
+    figure_label = 'Ramp of massflow'
+
     name = Quantity(
         type=str,
-        description='What rotation are you tracing?',
+        description='What massflow are you tracing? (Chemical formulas are accepted)',
         a_eln={'component': 'StringEditQuantity'},
     )
 
-    start_value = Quantity(
-        type=np.float64,
-        description='Value at the beginning of the increment',
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'rpm'},
-        unit='rpm',
+    start_value = ramp_quantity(
+        'centimeter^3/minute', 'Value at the beginning of the increment'
     )
 
-    end_value = Quantity(
-        type=np.float64,
-        description='Value at the end of the increment',
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'rpm'},
-        unit='rpm',
+    end_value = ramp_quantity(
+        'centimeter^3/minute', 'Value at the end of the increment'
     )
 
-    increment_duration = Quantity(
-        type=np.float64,
-        description='Duration of the increment',
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'sec'},
-        unit='sec',
-    )
+    values = ramp_quantity('centimeter^3/minute', shape=['*'])
 
-    increment_behavior = Quantity(
+
+class TimeRampRotation(TimeRamp):
+    m_def = Section()
+
+    value_label = 'Spin frequency (rpm)'
+    figure_label = 'Ramp of spin frequency'
+
+    name = Quantity(
         type=str,
-        description='Is the increment linear(uniform), sigmoidal, etc...?',
+        description='What rotation are you tracing?',
         a_eln={'component': 'StringEditQuantity'},
     )
 
-    time = Quantity(
-        type=np.float64,
-        shape=['*'],
-        a_eln={
-            'component': 'NumberEditQuantity',
-            'defaultDisplayUnit': 'sec',
-        },
-        unit='sec',
-    )
+    start_value = ramp_quantity('rpm', 'Value at the beginning of the increment')
 
-    values = Quantity(
-        type=np.float64,
-        shape=['*'],
-        a_eln={'component': 'NumberEditQuantity', 'defaultDisplayUnit': 'rpm'},
-        unit='rpm',
-    )
+    end_value = ramp_quantity('rpm', 'Value at the end of the increment')
 
-    def normalize(self, archive, logger):
-        if self.values is not None and len(self.values) > 0:
-            super().normalize(archive, logger)
-            if hasattr(self, 'figures') and self.figures:
-                self.figures.clear()
-            make_line_express(
-                self.time,
-                self.values,
-                'Time (s)',
-                'Spin frequency (rpm)',
-                self.figures,
-                'Ramp of spin frequency',
-            )
+    values = ramp_quantity('rpm', shape=['*'])
 
 
 class BeamSource(ArchiveSection):
@@ -0,0 +1,48 @@
+"""
+Benchmark of the replay of film operations on the stacks of a lot of 25 wafers:
+random deposits, etches, oxidations and strips, one in three applied to a single
+wafer. Reports the replay time against the number of steps.
+
+    python tests/benchmarks/benchmark_film_stack.py
+"""
+
+import random
+import timeit
+
+from schema_packages.film_stack import FilmOperation, replay_operations
+
+STEPS = [100, 500, 2000]
+WAFERS = 25
+SUBSTRATE = 525e3
+NAN = float('nan')
+
+
+def operations(steps):
+    rng = random.Random(0)
+    flow = [FilmOperation('substrate', ('Si',), SUBSTRATE, NAN)]
+    for _ in range(steps - 1):
+        flow.append(
+            FilmOperation(
+                rng.choice(['deposit', 'etch', 'oxidize', 'strip']),
+                (rng.choice(['SiO2', 'Si3N4', 'Al', 'resist']),),
+                rng.uniform(10, 300),
+                NAN,
+                rng.choice([None, None, 'w3']),
+            )
+        )
+    return flow
+
+
+def main():
+    wafers = [f'w{wafer}' for wafer in range(WAFERS)]
+    print(f'{"steps":>8}{"time (ms)":>12}')
+    for steps in STEPS:
+        flow = operations(steps)
+        seconds = min(
+            timeit.repeat(lambda: replay_operations(flow, wafers), number=1, repeat=3)
+        )
+        print(f'{steps:>8}{seconds * 1e3:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark of the single-pass formula parser against the regex expansion it
+replaced. The cache is bypassed so that only parsing is measured.
+
+    python tests/benchmarks/benchmark_formula_parser.py
+"""
+
+import re
+import timeit
+from collections import defaultdict
+
+from schema_packages.formula import canonicalize_formula, expand_formula
+
+CORPUS = [
+    'SiO2',
+    'Si3N4',
+    'H2O',
+    'SF6',
+    'C4F8',
+    'CHF3',
+    'Al2O3',
+    'TiN',
+    'HfO2',
+    'Ca3(PO4)2',
+    'Al2(SO4)3',
+    '(NH4)2SO4',
+    'Cu(NO3)2',
+    'CuSO4.5H2O',
+    'Na2CO3.10H2O',
+    'Si(OC2H5)4',
+    'Si(CH3)2(OCH3)2',
+    'Ti(N(CH3)2)4',
+]
+
+LARGE_MULTIPLIERS = ['(CH2)10', '(CH2)100', '(CH2)1000', '((CF2)50O)20']
+
+
+def legacy_parse_chemical_formula(formula):
+    formula = formula.replace('·', '.')
+    if '.' in formula:
+        main_part, hydrate_part = formula.split('.')
+    else:
+        main_part, hydrate_part = formula, None
+    element_main = defaultdict(int)
+    while '(' in main_part:
+        main_part = re.sub(
+            r'\(([^()]*)\)(\d+)', lambda m: m.group(1) * int(m.group(2)), main_part
+        )
+    for element, count in re.findall(r'([A-Z][a-z]*)(\d*)', main_part):
+        element_main[element] += int(count) if count else 1
+    if hydrate_part:
+        hydrate_match = re.match(r'(\d*)H2O', hydrate_part)
+        if hydrate_match:
+            water_molecules = (
+                int(hydrate_match.group(1)) if hydrate_match.group(1) else 1
+            )
+            element_main['H'] += 2 * water_molecules
+            element_main['O'] += water_molecules
+    return list(element_main.keys()), list(element_main.values())
+
+
+def single_pass_parse(formula):
+    return expand_formula(canonicalize_formula(formula))
+
+
+def measure(function, formulas, number):
+    def run():
+        for formula in formulas:
+            function(formula)
+
+    return min(timeit.repeat(run, number=number, repeat=5)) / number / len(formulas)
+
+
+def main():
+    for formula in CORPUS + LARGE_MULTIPLIERS:
+        legacy = dict(zip(*legacy_parse_chemical_formula(formula)))
+        elements, counts, _ = single_pass_parse(formula)
+        assert legacy == dict(zip(elements, counts)), formula
+
+    print(f'{"corpus":<16}{"legacy (us)":>14}{"single-pass (us)":>20}')
+    legacy = measure(legacy_parse_chemical_formula, CORPUS, 2000)
+    current = measure(single_pass_parse, CORPUS, 2000)
+    print(f'{"common":<16}{legacy * 1e6:>14.2f}{current * 1e6:>20.2f}')
+    for formula in LARGE_MULTIPLIERS:
+        legacy = measure(legacy_parse_chemical_formula, [formula], 200)
+        current = measure(single_pass_parse, [formula], 200)
+        print(f'{formula:<16}{legacy * 1e6:>14.2f}{current * 1e6:>20.2f}')
+
+
+if __name__ == '__main__':
+    main()
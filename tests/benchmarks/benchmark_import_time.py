@@ -0,0 +1,64 @@
+"""
+Benchmark of the load time of each schema entry point in a cold interpreter, next
+to the time nomad's base sections take alone, so that the share of the plugin
+shows. Entry points are read from the installed package metadata.
+
+    python tests/benchmarks/benchmark_import_time.py
+"""
+
+import subprocess
+import sys
+from importlib.metadata import entry_points
+
+REPEAT = 3
+
+NOMAD_SCRIPT = """
+import time
+
+start = time.perf_counter()
+import nomad.datamodel.metainfo.basesections
+print(time.perf_counter() - start)
+"""
+
+ENTRY_POINT_SCRIPT = """
+import importlib
+import time
+
+start = time.perf_counter()
+getattr(importlib.import_module({module!r}), {name!r}).load()
+print(time.perf_counter() - start)
+"""
+
+
+def cold_time(script):
+    return min(
+        float(
+            subprocess.run(
+                [sys.executable, '-c', script],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        )
+        for _ in range(REPEAT)
+    )
+
+
+def schema_entry_points():
+    return sorted(
+        (entry_point.module, entry_point.attr)
+        for entry_point in entry_points(group='nomad.plugin')
+        if entry_point.module.startswith('schema_packages')
+    )
+
+
+def main():
+    print(f'{"entry point":<40}{"time (s)":>10}')
+    print(f'{"nomad base sections":<40}{cold_time(NOMAD_SCRIPT):>10.2f}')
+    for module, name in schema_entry_points():
+        script = ENTRY_POINT_SCRIPT.format(module=module, name=name)
+        print(f'{name:<40}{cold_time(script):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the lineage index on a synthetic genealogy of about 100k items: lots
+of 25 wafers, each wafer split in halves diced in dies, and one die in fifty bonded
+to a die of another wafer. Reports the time to add all items in creation order, to
+renumber them at once and to answer ancestry and descendant queries.
+
+    python tests/benchmarks/benchmark_lineage.py
+"""
+
+import random
+import timeit
+
+from schema_packages.lineage import LineageIndex
+
+LOTS = 160
+WAFERS = 25
+HALVES = 2
+DIES = 12
+BONDED = 50
+QUERIES = 10_000
+
+
+def genealogy():
+    rng = random.Random(0)
+    items, dies = [], []
+    for lot in range(LOTS):
+        items.append((f'L{lot}', []))
+        for wafer in range(WAFERS):
+            wafer_id = f'L{lot}-W{wafer}'
+            items.append((wafer_id, [f'L{lot}']))
+            for half in range(HALVES):
+                half_id = f'{wafer_id}-H{half}'
+                items.append((half_id, [wafer_id]))
+                for die in range(DIES):
+                    items.append((f'{half_id}-D{die}', [half_id]))
+                    dies.append(f'{half_id}-D{die}')
+    for bond in range(len(dies) // BONDED):
+        items.append((f'B{bond}', rng.sample(dies, 2)))
+    return items, dies
+
+
+def build(items):
+    index = LineageIndex()
+    for item, parents in items:
+        index.add(item, parents)
+    return index
+
+
+def main():
+    items, dies = genealogy()
+    rng = random.Random(1)
+    pairs = [(f'L{rng.randrange(LOTS)}', rng.choice(dies)) for _ in range(QUERIES)]
+
+    index = build(items)
+    incremental = min(timeit.repeat(lambda: build(items), number=1, repeat=3))
+    renumber = min(timeit.repeat(index.renumber, number=1, repeat=3))
+    ancestry = min(
+        timeit.repeat(
+            lambda: [index.is_ancestor(*pair) for pair in pairs], number=1, repeat=3
+        )
+    )
+    descendants = min(
+        timeit.repeat(
+            lambda: [index.descendants(f'L{lot}') for lot in range(LOTS)],
+            number=1,
+            repeat=3,
+        )
+    )
+    print(f'items: {len(index)}')
+    print(f'add in creation order: {incremental * 1e3:.1f} ms')
+    print(f'renumber at once: {renumber * 1e3:.1f} ms')
+    print(f'ancestry check: {ancestry / QUERIES * 1e6:.2f} us')
+    print(f'descendants of a lot: {descendants / LOTS * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark of the ramp figures stored in PlotlyFigure sections: JSON size and build
+time against the number of logged samples, with and without downsampling.
+
+    python tests/benchmarks/benchmark_ramp_figures.py
+"""
+
+import json
+import timeit
+
+import numpy as np
+from schema_packages.figures import MAX_FIGURE_POINTS, line_figure_json
+
+LENGTHS = [10**3, 10**4, 10**5, 10**6]
+MODES = [None, 'lttb', 'minmax']
+
+
+def noisy_ramp(length):
+    rng = np.random.default_rng(0)
+    time = np.linspace(0, 3600, length)
+    return time, np.minimum(20 + time / 6, 400) + rng.normal(0, 0.5, length)
+
+
+def measure(time, values, mode):
+    def build():
+        return line_figure_json(
+            time,
+            values,
+            'Time (s)',
+            'Temperature (°C)',
+            max_points=MAX_FIGURE_POINTS if mode else None,
+            downsampling=mode or 'lttb',
+        )
+
+    seconds = min(timeit.repeat(build, number=1, repeat=3))
+    figure = build()
+    return seconds, len(figure['data'][0]['x']), len(json.dumps(figure))
+
+
+def main():
+    print(f'{"samples":>10}{"mode":>8}{"points":>8}{"size (kB)":>12}{"time (ms)":>12}')
+    for length in LENGTHS:
+        time, values = noisy_ramp(length)
+        for mode in MODES:
+            seconds, points, size = measure(time, values, mode)
+            print(
+                f'{length:>10}{mode or "full":>8}{points:>8}'
+                f'{size / 1e3:>12.1f}{seconds * 1e3:>12.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
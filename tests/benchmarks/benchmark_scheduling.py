@@ -0,0 +1,53 @@
+"""
+Benchmark of the discrete-event simulation: lots following ten random routes of 20
+steps, each step able to run on two of 25 tools, released over a month. Reports
+the simulation time of each dispatch rule against the number of lots.
+
+    python tests/benchmarks/benchmark_scheduling.py
+"""
+
+import random
+import timeit
+
+import numpy as np
+from schema_packages.flow import ProcessFlow
+from schema_packages.scheduling import DISPATCH_RULES, compile_route, simulate
+
+LOTS = [500, 2000, 8000]
+ROUTES = 10
+STEPS = 20
+TOOLS = 25
+MONTH = 30 * 24 * 60
+
+
+def routes():
+    rng = random.Random(0)
+    return [
+        compile_route(
+            [rng.uniform(5, 30) for _ in range(STEPS)],
+            [rng.sample(range(TOOLS), 2) for _ in range(STEPS)],
+            ProcessFlow(STEPS),
+        )
+        for _ in range(ROUTES)
+    ]
+
+
+def main():
+    compiled = routes()
+    print(f'{"lots":>8}{"rule":>16}{"time (s)":>10}')
+    for count in LOTS:
+        lots = [compiled[lot % ROUTES] for lot in range(count)]
+        releases = np.sort(np.random.default_rng(0).uniform(0, MONTH, count))
+        for rule in DISPATCH_RULES:
+            seconds = min(
+                timeit.repeat(
+                    lambda: simulate(lots, TOOLS, rule, releases=releases),
+                    number=1,
+                    repeat=3,
+                )
+            )
+            print(f'{count:>8}{rule:>16}{seconds:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Benchmark of the propagation of the Stoney input uncertainties: first order
+against Monte Carlo with a growing number of samples.
+
+    python tests/benchmarks/benchmark_stoney_uncertainty.py
+"""
+
+import timeit
+
+from nomad.units import ureg
+from schema_packages.calculus.batch import (
+    stoney_stress_first_order,
+    stoney_stress_monte_carlo,
+)
+
+SAMPLES = [10**3, 10**4, 10**5, 10**6]
+VALUES = (130 * ureg.GPa, 0.28, 500 * ureg.um, 1 * ureg.um, 10 * ureg.m)
+UNCERTAINTIES = (5 * ureg.GPa, 0.02, 5 * ureg.um, 0.05 * ureg.um, 0.5 * ureg.m)
+
+
+def best(function):
+    return min(timeit.repeat(function, number=1, repeat=3))
+
+
+def main():
+    print(f'{"propagation":>12}{"samples":>10}{"time (ms)":>12}')
+    seconds = best(lambda: stoney_stress_first_order(VALUES, UNCERTAINTIES))
+    print(f'{"first order":>12}{"":>10}{seconds * 1e3:>12.2f}')
+    for samples in SAMPLES:
+        seconds = best(
+            lambda: stoney_stress_monte_carlo(VALUES, UNCERTAINTIES, samples=samples)
+        )
+        print(f'{"Monte Carlo":>12}{samples:>10}{seconds * 1e3:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark of the utilization of a tool folded from a long logbook: jobs of 5 to
+120 minutes separated by idle gaps, given as dated records and folded chunk at a
+time. Reports the folding time against the number of jobs.
+
+    python tests/benchmarks/benchmark_utilization.py
+"""
+
+import timeit
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from schema_packages.utilization import ToolUtilization
+
+JOBS = [10**4, 10**5, 10**6]
+START = datetime(2024, 5, 6, tzinfo=timezone.utc)
+
+
+def logbook(jobs):
+    rng = np.random.default_rng(0)
+    durations = rng.uniform(5, 120, jobs)
+    steps = np.cumsum(durations + rng.uniform(0, 60, jobs))
+    starts = np.concatenate(([0.0], steps[:-1]))
+    return [
+        {
+            'starting_date': START + timedelta(minutes=float(start)),
+            'ending_date': START + timedelta(minutes=float(start + duration)),
+        }
+        for start, duration in zip(starts, durations)
+    ]
+
+
+def main():
+    print(f'{"jobs":>10}{"time (s)":>10}{"us per job":>12}')
+    for jobs in JOBS:
+        records = logbook(jobs)
+        seconds = min(
+            timeit.repeat(
+                lambda: ToolUtilization().add_records(records), number=1, repeat=3
+            )
+        )
+        print(f'{jobs:>10}{seconds:>10.2f}{seconds / jobs * 1e6:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+import numpy as np
+import pytest
+from nomad.client import normalize_all
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.datamodel.context import Context
+from nomad.units import ureg
+from schema_packages.calculus.batch import (
+    etching_rate,
+    stoney_stress,
+    stoney_stress_first_order,
+    stoney_stress_monte_carlo,
+)
+from schema_packages.calculus.calculus import (
+    EtchingRate,
+    EtchingRateInputs,
+    StressParametersAdopted,
+    StressProperties,
+    StressPropertiesInputs,
+    propagation_error,
+)
+from schema_packages.calculus.graph import DependencyGraph
+from schema_packages.steps.remove.etching.dry_etching import RIE
+from schema_packages.steps.utils import EtchingOutputs
+
+
+def test_etching_rate_masks_unusable_rows():
+    depth = np.array([100.0, 1.0, 50.0, np.nan, 0.0]) * ureg.nm
+    etching_time = [2 * ureg.minute, 60 * ureg.second, 0, 1, None]
+
+    rates = etching_rate(depth, etching_time)
+
+    assert rates.units == ureg('nm/minute').units
+    np.testing.assert_array_equal(rates.magnitude, [50, 1, np.nan, np.nan, np.nan])
+
+
+def test_stoney_stress():
+    stress = stoney_stress(
+        [130, 130, 130] * ureg.GPa,
+        [0.28, 1, 0.28],
+        500 * ureg.um,
+        [1, 1, 0] * ureg.um,
+        10 * ureg.m,
+    )
+
+    expected = 130 * 500e-6**2 / (6 * 0.72 * 10 * 1e-6)
+    np.testing.assert_allclose(stress.m_as('GPa'), [expected, np.nan, np.nan])
+
+
+STONEY_VALUES = (130 * ureg.GPa, 0.28, 500 * ureg.um, 1 * ureg.um, 10 * ureg.m)
+STONEY_UNCERTAINTIES = (
+    5 * ureg.GPa,
+    0.02,
+    5 * ureg.um,
+    0.05 * ureg.um,
+    0.5 * ureg.m,
+)
+
+
+def test_stoney_uncertainty_propagation():
+    monte_carlo = stoney_stress_monte_carlo(
+        STONEY_VALUES, STONEY_UNCERTAINTIES, samples=100_000
+    )
+    first_order = stoney_stress_first_order(STONEY_VALUES, STONEY_UNCERTAINTIES)
+
+    assert first_order.mean == stoney_stress(*STONEY_VALUES)
+    assert monte_carlo.mean.m_as('GPa') == pytest.approx(
+        first_order.mean.m_as('GPa'), rel=0.02
+    )
+    assert monte_carlo.standard_deviation.m_as('GPa') == pytest.approx(
+        first_order.standard_deviation.m_as('GPa'), rel=0.05
+    )
+    assert monte_carlo.low < monte_carlo.mean < monte_carlo.high
+
+
+def test_dependency_graph_recomputes_downstream_only():
+    calls = []
+    graph = DependencyGraph()
+    graph.add('area', ('width', 'height'), lambda w, h: calls.append('area') or w * h)
+    graph.add('double', ('area',), lambda a: calls.append('double') or 2 * a)
+    graph.add('label', ('name',), lambda n: calls.append('label') or n.upper())
+
+    graph.update({'width': 2, 'height': 3, 'name': 'wafer'})
+    graph.compute()
+    changed = graph.update({'width': 2, 'height': 4, 'name': 'wafer'})
+
+    assert graph.sources == ['width', 'height', 'name']
+    assert changed == {'height'}
+    assert graph.dirty == {'height', 'area', 'double'}
+    assert graph.compute() == ['area', 'double']
+    assert not graph.is_dirty('double')
+    assert calls == ['area', 'label', 'double', 'area', 'double']
+    assert graph.results['double'] == 2 * 2 * 4
+
+
+def test_calculus_sheets_normalize():
+    etching = EtchingRate(
+        inputs=EtchingRateInputs(depth=300 * ureg.nm, etching_time=2 * ureg.minute)
+    )
+    stress = StressProperties(
+        inputs=StressPropertiesInputs(
+            substrate_thickness=500 * ureg.um,
+            layer_thickness=1 * ureg.um,
+            curvature_radius=10 * ureg.m,
+        ),
+        parameters=StressParametersAdopted(
+            assumed_Young_module_of_the_substrate=130 * ureg.GPa,
+            assumed_Poisson_coefficient=0.28,
+            Young_module_uncertainty=5 * ureg.GPa,
+            uncertainty_propagation='first order',
+        ),
+    )
+    empty = StressProperties(inputs=StressPropertiesInputs())
+    for sheet in (etching, stress, empty):
+        normalize_all(EntryArchive(data=sheet, metadata=EntryMetadata()))
+
+    assert etching.output.etching_rate_value.m_as('nm/minute') == pytest.approx(150)
+    assert stress.output.stress_value.m_as('MPa') == pytest.approx(752.3, abs=0.1)
+    assert empty.output is None
+    assert stress.calculus_graph().recomputed == [
+        'calculate_stress',
+        'calculate_stress_uncertainty',
+    ]
+    low, high = stress.output.stress_confidence_interval.m_as('MPa')
+    assert stress.output.stress_standard_deviation.m_as('MPa') == pytest.approx(
+        28.9, abs=0.1
+    )
+    assert low == pytest.approx(752.3 - 1.96 * 28.9, abs=0.2)
+    assert high == pytest.approx(752.3 + 1.96 * 28.9, abs=0.2)
+
+
+class StepsContext(Context):
+    def __init__(self, archives):
+        super().__init__()
+        self.step_archives = archives
+
+    def load_archive(self, entry_id, upload_id, installation_url):
+        return self.step_archives[entry_id]
+
+
+def test_inputs_are_read_from_referenced_steps():
+    rie = RIE(
+        depth_target=400 * ureg.nm,
+        outputs=[EtchingOutputs(duration_measured=120 * ureg.s)],
+    )
+    context = StepsContext(
+        {'rie': EntryArchive(data=rie, metadata=EntryMetadata(entry_id='rie'))}
+    )
+    archive = EntryArchive(
+        m_context=context, metadata=EntryMetadata(upload_id='u', entry_id='sheet')
+    )
+    url = '../upload/archive/rie#/data'
+    archive.data = EtchingRate(
+        inputs=EtchingRateInputs(etching_time_reference=url, depth_reference=url)
+    )
+
+    normalize_all(archive)
+    inputs, output = archive.data.inputs, archive.data.output
+
+    assert inputs.depth.m_as('nm') == pytest.approx(400)
+    assert inputs.etching_time.m_as('minute') == pytest.approx(2)
+    assert output.etching_rate_value.m_as('nm/minute') == pytest.approx(200)
+    assert list(archive.m_cache['calculus_references']) == [url]
+    assert inputs.depth_reference.m_proxy_resolved is None
+
+
+@pytest.mark.parametrize(
+    'propagation, samples, confidence',
+    [
+        ('first order', None, 1.0),
+        ('Monte Carlo', None, 1.5),
+        ('Monte Carlo', None, 0.0),
+        ('Monte Carlo', -5, None),
+    ],
+)
+def test_unusable_propagation_parameters_are_reported(propagation, samples, confidence):
+    stress = StressProperties(
+        inputs=StressPropertiesInputs(
+            substrate_thickness=500 * ureg.um,
+            layer_thickness=1 * ureg.um,
+            curvature_radius=10 * ureg.m,
+            layer_thickness_uncertainty=0.05 * ureg.um,
+        ),
+        parameters=StressParametersAdopted(
+            assumed_Young_module_of_the_substrate=130 * ureg.GPa,
+            assumed_Poisson_coefficient=0.28,
+            uncertainty_propagation=propagation,
+            monte_carlo_samples=samples,
+            confidence_level=confidence,
+        ),
+    )
+
+    normalize_all(EntryArchive(data=stress, metadata=EntryMetadata()))
+
+    assert propagation_error(samples, confidence) is not None
+    assert stress.output.stress_value is not None
+    assert stress.output.stress_confidence_interval is None
+
+
+def test_sheet_recomputes_only_changed_calculations():
+    stress = StressProperties(
+        inputs=StressPropertiesInputs(
+            substrate_thickness=500 * ureg.um,
+            layer_thickness=1 * ureg.um,
+            curvature_radius=10 * ureg.m,
+            layer_thickness_uncertainty=0.05 * ureg.um,
+        ),
+        parameters=StressParametersAdopted(
+            assumed_Young_module_of_the_substrate=130 * ureg.GPa,
+            assumed_Poisson_coefficient=0.28,
+        ),
+    )
+    archive = EntryArchive(data=stress, metadata=EntryMetadata())
+    normalize_all(archive)
+    interval = stress.output.stress_confidence_interval
+
+    stress.parameters.confidence_level = 0.99
+    graph = stress.update_calculus_graph()
+
+    assert graph.dirty == {
+        'parameters.confidence_level',
+        'calculate_stress_uncertainty',
+    }
+    assert stress.update_outputs() == ['calculate_stress_uncertainty']
+    assert stress.output.stress_confidence_interval[0] < interval[0]
+    normalize_all(archive)
+    assert graph.recomputed == []
+
+
+def test_inputs_follow_referenced_steps():
+    rie = RIE(depth_target=400 * ureg.nm, duration_target=2 * ureg.minute)
+    context = StepsContext(
+        {'rie': EntryArchive(data=rie, metadata=EntryMetadata(entry_id='rie'))}
+    )
+    archive = EntryArchive(
+        m_context=context, metadata=EntryMetadata(upload_id='u', entry_id='sheet')
+    )
+    url = '../upload/archive/rie#/data'
+    archive.data = EtchingRate(
+        inputs=EtchingRateInputs(etching_time_reference=url, depth_reference=url)
+    )
+    normalize_all(archive)
+
+    rie.depth_target = 600 * ureg.nm
+    normalize_all(archive)
+
+    assert archive.data.inputs.read_from_references == ['etching_time', 'depth']
+    assert archive.data.output.etching_rate_value.m_as('nm/minute') == pytest.approx(
+        300
+    )
+
+
+class WarningLogger:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, event, **kwargs):
+        self.warnings.append((event, kwargs))
+
+
+def test_referenced_step_without_the_quantities_is_reported():
+    rie = RIE(depth_target=400 * ureg.nm)
+    context = StepsContext(
+        {'rie': EntryArchive(data=rie, metadata=EntryMetadata(entry_id='rie'))}
+    )
+    archive = EntryArchive(
+        m_context=context, metadata=EntryMetadata(upload_id='u', entry_id='sheet')
+    )
+    url = '../upload/archive/rie#/data'
+    inputs = EtchingRateInputs(etching_time_reference=url, depth_reference=url)
+    archive.data = EtchingRate(inputs=inputs)
+    logger = WarningLogger()
+
+    inputs.resolve_references(archive, logger)
+
+    assert inputs.read_from_references == ['depth']
+    assert [kwargs['quantity'] for _, kwargs in logger.warnings] == [
+        'etching_time_reference'
+    ]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from nomad.units import ureg
+from schema_packages.capabilities import CapabilityIndex, step_setpoints
+from schema_packages.equipments.equipments import (
+    ICP_RIE_Etcher,
+    LPCVD_System,
+    RIE_Etcher,
+)
+from schema_packages.equipments.utils import ChuckCapabilities, Massflow_parameter
+from schema_packages.steps.remove.etching.dry_etching import RIE, RIEbase
+from schema_packages.steps.utils import Chuck, Massflow_controller
+
+TOOLS = 200
+
+
+def etcher(name, pressures, gases, section=RIE_Etcher, chuck_power=None):
+    return section(
+        name=name,
+        min_chamber_pressure=pressures[0] * ureg.mbar,
+        max_chamber_pressure=pressures[1] * ureg.mbar,
+        gases=[
+            Massflow_parameter(
+                name=gas, max_massflow=flow * ureg('centimeter^3/minute')
+            )
+            for gas, flow in gases.items()
+        ],
+        chuck=None
+        if chuck_power is None
+        else ChuckCapabilities(max_chuck_power=chuck_power * ureg.watt),
+    )
+
+
+def etch(pressures, gases, chuck_power=None):
+    return RIE(
+        etching_steps=[
+            RIEbase(
+                chamber_pressure=pressure * ureg.mbar,
+                fluximeters=[
+                    Massflow_controller(
+                        name=gas, massflow=flow * ureg('centimeter^3/minute')
+                    )
+                    for gas, flow in gases.items()
+                ],
+                chuck=None
+                if chuck_power is None
+                else Chuck(chuck_power=chuck_power * ureg.watt),
+            )
+            for pressure in pressures
+        ]
+    )
+
+
+def test_step_setpoints():
+    setpoints = step_setpoints(etch([0.05, 0.2], {'SF6': 30}))
+
+    assert setpoints['chamber_pressure'] == pytest.approx((5.0, 20.0))
+    low, high = setpoints['massflow/SF6']
+    assert low == high
+    assert low == pytest.approx(30e-6 / 60)
+
+
+def test_match_reports_parameters_out_of_range():
+    tools = [
+        etcher('wide', (0.01, 1.0), {'SF6': 100, 'O2': 50}),
+        etcher('narrow', (0.1, 1.0), {'SF6': 100, 'O2': 50}, chuck_power=100),
+        etcher('no oxygen', (0.01, 1.0), {'SF6': 100}),
+        etcher('icp', (0.01, 1.0), {'SF6': 100, 'O2': 50}, ICP_RIE_Etcher),
+        LPCVD_System(name='furnace', min_chamber_pressure=0.01 * ureg.mbar),
+    ]
+    index = CapabilityIndex(tools)
+    step = etch([0.05, 0.2], {'SF6': 30, 'O2': 10}, chuck_power=150)
+
+    assert [tool.name for tool in index.capable(step)] == ['wide', 'icp']
+
+    matches = {match.equipment.name: match for match in index.match(step)}
+    assert set(matches) == {'wide', 'narrow', 'no oxygen', 'icp'}
+    assert matches['wide'].runnable
+    assert matches['wide'].unchecked == ('chuck_power',)
+    assert set(matches['narrow'].outside) == {'chamber_pressure', 'chuck_power'}
+    assert matches['narrow'].outside['chamber_pressure'].low == pytest.approx(10)
+    assert list(matches['no oxygen'].outside) == ['massflow/O2']
+    assert np.isnan(matches['no oxygen'].outside['massflow/O2'].low)
+
+
+def test_index_over_many_tools():
+    tools = [
+        etcher(f'tool {tool}', (0.001 * (tool + 1), 0.01 * (tool + 1)), {'SF6': 100})
+        for tool in range(TOOLS)
+    ]
+    index = CapabilityIndex(tools)
+
+    capable = index.capable(etch([0.55], {'SF6': 30}))
+
+    assert [tool.name for tool in capable] == [
+        f'tool {tool}' for tool in range(54, TOOLS)
+    ]
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from nomad.units import ureg
+from schema_packages.cycle_time import cycle_times, step_times
+from schema_packages.fabrication_utilities import FabricationProcess
+from schema_packages.flow import ProcessFlow
+from schema_packages.steps.transform import OxidationOutputs, ThermalOxidation
+
+START = datetime(2024, 5, 6, 8, tzinfo=timezone.utc)
+
+
+def test_cycle_times_over_branches():
+    flow = ProcessFlow(4, [(0, 1), (0, 2), (1, 3), (2, 3)])
+    nan = np.nan
+    times = [
+        (10, 10, 0, 10),
+        (30, 45, 15, 60),
+        (20, nan, nan, nan),
+        (5, 5, 70, 75),
+    ]
+
+    result = cycle_times(flow, times)
+
+    np.testing.assert_allclose(result.planned_cumulative, [10, 40, 30, 45])
+    np.testing.assert_allclose(result.queue, [0, 5, 0, 10])
+    np.testing.assert_allclose(result.actual_cumulative, [10, 60, 30, 75])
+    assert result.planned_critical_path == [0, 1, 3]
+    assert result.actual_critical_path == [0, 1, 3]
+    assert result.planned_total == 10 + 30 + 5
+    assert result.queue_total == 5 + 10
+
+
+def oxidation(planned, measured=None, start=None, end=None):
+    return ThermalOxidation(
+        duration_target=planned * ureg.minute,
+        outputs=OxidationOutputs(duration_measured=measured),
+        starting_date=None if start is None else START + timedelta(minutes=start),
+        ending_date=None if end is None else START + timedelta(minutes=end),
+    )
+
+
+def test_step_times_read_outputs_and_dates():
+    assert step_times(oxidation(20, 600 * ureg.s)) == pytest.approx(
+        (20, 10, np.nan, np.nan), nan_ok=True
+    )
+    planned, actual, start, end = step_times(oxidation(20, start=30, end=55))
+    assert (planned, actual, end - start) == pytest.approx((20, 25, 25))
+
+
+def test_process_cycle_times_are_cached_per_revision():
+    steps = [oxidation(10, start=0, end=10), oxidation(20, start=15, end=40)]
+    process = FabricationProcess(steps=steps)
+
+    result = process.cycle_times()
+    assert process.cycle_times() is result
+    assert result.actual_total == 10 + 5 + 25
+
+    steps[1].ending_date = START + timedelta(minutes=50)
+    changed = process.cycle_times()
+    assert changed is not result
+    assert changed.actual_total == 10 + 5 + 35
+    assert changed.planned_total == 10 + 20
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that must only be imported when a figure is built. ase is left out:
+# nomad's base sections import it anyway. Load times are measured by
+# tests/benchmarks/benchmark_import_time.py.
+DEFERRED_MODULES = ('plotly',)
+
+SCHEMA_ENTRY_POINTS = [
+    ('schema_packages', 'Items_entry_point'),
+    ('schema_packages', 'Utilities_entry_point'),
+    ('schema_packages', 'Transform_entry_point'),
+    ('schema_packages', 'Equipments_entry_point'),
+    ('schema_packages', 'materials_entry_point'),
+    ('schema_packages', 'calculus_entry_point'),
+    ('schema_packages', 'Characterization_entry_point'),
+    ('schema_packages', 'Characterization_Equipment_entry_point'),
+    ('schema_packages', 'Add_entry_point'),
+    ('schema_packages.steps.remove.etching', 'dryetch_entry_point'),
+    ('schema_packages.steps.remove.etching', 'wetetch_entry_point'),
+    ('schema_packages.steps.remove.etching', 'strip_entry_point'),
+    ('schema_packages.steps.remove.drying', 'drying_entry_point'),
+    ('schema_packages.steps.remove.developing', 'develop_entry_point'),
+    ('schema_packages.steps.add.synthesis', 'CVDs_entry_point'),
+    ('schema_packages.steps.add.synthesis', 'coating_entry_point'),
+]
+
+SCRIPT = """
+import importlib
+import sys
+
+getattr(importlib.import_module({module!r}), {name!r}).load()
+print(' '.join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+
+@pytest.mark.parametrize('module, name', SCHEMA_ENTRY_POINTS)
+def test_entry_point_defers_plotly(module, name):
+    script = SCRIPT.format(module=module, name=name, deferred=DEFERRED_MODULES)
+    result = subprocess.run(
+        [sys.executable, '-c', script], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.split() == []
@@ -0,0 +1,123 @@
+import numpy as np
+import plotly.express as px
+import pytest
+from nomad.client import normalize_all
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.units import ureg
+from schema_packages.figures import (
+    DOWNSAMPLING_MODES,
+    FigureCache,
+    downsample,
+    figure_cache,
+    figure_key,
+    line_figure_json,
+)
+from schema_packages.Items import Circle, ItemPlacement
+
+MAX_POINTS = 500
+
+
+def test_line_figure_json_matches_plotly_express():
+    time = np.linspace(0, 60, 7)
+    values = np.linspace(20, 400, 7)
+    expected = px.line(
+        x=time,
+        y=values,
+        height=400,
+        width=800,
+        labels={'x': 'Time (s)', 'y': 'Temperature (°C)'},
+        markers=True,
+    ).to_plotly_json()
+    expected['layout'].pop('template')
+
+    figure = line_figure_json(
+        time * ureg.second, values * ureg.celsius, 'Time (s)', 'Temperature (°C)'
+    )
+
+    assert figure['layout'] == expected['layout']
+    assert figure['data'][0].keys() == expected['data'][0].keys()
+    for key, value in expected['data'][0].items():
+        if key in {'x', 'y'}:
+            np.testing.assert_array_equal(figure['data'][0][key], value)
+        else:
+            assert figure['data'][0][key] == value
+
+
+@pytest.mark.parametrize('mode', DOWNSAMPLING_MODES)
+def test_downsample_keeps_endpoints_and_spikes(mode):
+    time = np.arange(100_000, dtype=np.float64)
+    values = np.sin(time / 5000)
+    values[31_337] = 10.0
+    values[77_777] = -10.0
+
+    x, y = downsample(time, values, max_points=MAX_POINTS, mode=mode)
+
+    assert len(x) <= MAX_POINTS
+    assert (x[0], x[-1]) == (time[0], time[-1])
+    assert np.all(np.diff(x) > 0)
+    assert {31_337, 77_777} <= set(x.astype(int))
+    np.testing.assert_array_equal(y, values[x.astype(int)])
+
+
+def test_downsample_leaves_short_lines_unchanged():
+    time = np.arange(10.0)
+
+    x, y = downsample(time, time**2, max_points=10)
+    figure = line_figure_json(time, time**2, 'x', 'y', max_points=None)
+
+    assert x is time
+    assert len(figure['data'][0]['x']) == len(time)
+
+
+def test_figure_cache_evicts_least_recently_used_figures():
+    cache = FigureCache(maxsize=2)
+    for key in 'abc':
+        cache.put(key, {'key': key})
+    cache.get('b')
+
+    assert cache.get('a') is None
+    cache.put('d', {'key': 'd'})
+    assert cache.get('c') is None
+    assert cache.get('b') == {'key': 'b'}
+
+
+def test_cached_figures_are_copies():
+    cache = FigureCache()
+    figure = {'data': [{'x': [1, 2]}]}
+    cache.put('a', figure)
+    figure['data'][0]['x'].append(3)
+
+    hit = cache.get('a')
+    hit['data'][0]['x'].append(4)
+
+    assert cache.get('a') == {'data': [{'x': [1, 2]}]}
+    assert cache.hits == 2
+
+
+def test_figure_cache_disk_tier(tmp_path):
+    time = np.arange(5.0)
+    key = figure_key('line', time * ureg.second, time, 'x', 'y')
+    FigureCache(directory=tmp_path).put(key, {'data': [{'x': time}]})
+
+    cache = FigureCache(directory=tmp_path)
+
+    assert cache.get(key) == {'data': [{'x': [0, 1, 2, 3, 4]}]}
+    assert cache.disk_hits == 1
+    assert key != figure_key('line', time * ureg.minute, time, 'x', 'y')
+
+
+def test_placement_figure_is_built_once():
+    figure_cache.clear()
+    placement = ItemPlacement(
+        chuck_geometry=Circle(radius=10 * ureg.cm),
+        item_center_x=1 * ureg.cm,
+        item_center_y=2 * ureg.cm,
+    )
+    archive = EntryArchive(data=placement, metadata=EntryMetadata())
+
+    normalize_all(archive)
+    figure = placement.figures[0].figure
+    normalize_all(archive)
+
+    assert placement.figures[0].figure == figure
+    assert (figure_cache.misses, figure_cache.hits) == (1, 1)
@@ -0,0 +1,106 @@
+import random
+
+import numpy as np
+import pytest
+from nomad.units import ureg
+from schema_packages.fabrication_utilities import StartingMaterial
+from schema_packages.film_stack import (
+    SILICON_CONSUMPTION,
+    FilmOperation,
+    film_operation,
+    replay_operations,
+    replay_steps,
+)
+from schema_packages.steps.add.add import Sputtering
+from schema_packages.steps.add.synthesis.CVD import LPCVD, LPCVDbase
+from schema_packages.steps.remove.etching.dry_etching import RIE, RIEbase
+from schema_packages.steps.transform import Dicing, ThermalOxidation
+from schema_packages.utils import FabricationChemical
+
+WAFERS = 25
+STEPS = 500
+SUBSTRATE = 525e3
+NAN = float('nan')
+
+
+def test_replay_of_film_operations():
+    operations = [
+        FilmOperation('substrate', ('Si',), SUBSTRATE, NAN),
+        FilmOperation('oxidize', ('SiO2',), 100.0, NAN),
+        FilmOperation('deposit', ('resist',), 1000.0, 1100.0),
+        FilmOperation('etch', ('SiO2',), 50.0, NAN),
+        FilmOperation('strip', ('resist',), NAN, NAN),
+        FilmOperation('etch', ('SiO2',), 150.0, NAN, item='w1'),
+    ]
+
+    replay = replay_operations(operations, ['w0', 'w1'])
+
+    stack = replay.stack
+    silicon = SUBSTRATE - SILICON_CONSUMPTION * 100
+    assert stack.layers(0) == [('Si', silicon), ('SiO2', 100.0)]
+    assert stack.layers(1) == [('Si', silicon)]
+    assert stack.layers(0, replay.snapshots[2])[-1] == ('resist', 1000.0)
+    assert [(flag.step, flag.kind, flag.wafers) for flag in replay.flags] == [
+        (2, 'thickness mismatch', [0, 1]),
+        (3, 'etch stopped', [0, 1]),
+        (5, 'etch stopped', [1]),
+    ]
+    assert replay.flags[-1].measured == pytest.approx(100.0)
+    np.testing.assert_allclose(stack.composition(0)[1, [7, 13]], [2 / 3, 1 / 3])
+
+
+def test_replay_of_process_steps():
+    steps = [
+        StartingMaterial(short_name='Si', wafer_thickness=525 * ureg.um),
+        ThermalOxidation(thickness_target=100 * ureg.nm),
+        LPCVD(
+            thickness_target=200 * ureg.nm,
+            synthesis_steps=[
+                LPCVDbase(material_deposited=[FabricationChemical(name='Si3N4')])
+            ],
+        ),
+        Dicing(depth_target=100 * ureg.um),
+        Sputtering(chemical_formula='Al', thickness_target=50 * ureg.nm),
+        RIE(
+            depth_target=80 * ureg.nm,
+            etching_steps=[
+                RIEbase(
+                    materials_etched=[
+                        FabricationChemical(name='Al'),
+                        FabricationChemical(name='Si3N4'),
+                    ]
+                )
+            ],
+        ),
+    ]
+
+    assert film_operation(steps[3]) is None
+    assert film_operation(steps[5]).materials == ('Al', 'Si3N4')
+
+    replay = replay_steps(steps, WAFERS)
+
+    assert replay.flags == []
+    assert len(replay.snapshots) == len(steps)
+    materials, thickness = zip(*replay.stack.layers(WAFERS - 1))
+    assert materials == ('Si', 'SiO2', 'Si3N4')
+    assert thickness == pytest.approx((SUBSTRATE - 44, 100, 170))
+
+
+def test_replay_of_a_long_flow_for_a_lot():
+    rng = random.Random(0)
+    operations = [FilmOperation('substrate', ('Si',), SUBSTRATE, NAN)]
+    for _ in range(STEPS - 1):
+        operations.append(
+            FilmOperation(
+                rng.choice(['deposit', 'etch', 'oxidize', 'strip']),
+                (rng.choice(['SiO2', 'Si3N4', 'Al', 'resist']),),
+                rng.uniform(10, 300),
+                NAN,
+                rng.choice([None, None, 'w3']),
+            )
+        )
+    wafers = [f'w{wafer}' for wafer in range(WAFERS)]
+
+    replay = replay_operations(operations, wafers)
+
+    assert len(replay.snapshots) == STEPS
@@ -0,0 +1,55 @@
+import numpy as np
+from schema_packages.fabrication_utilities import FabricationProcess
+from schema_packages.flow import ProcessFlow
+
+STEPS = 300
+
+
+def test_process_flow_with_branches_and_rework():
+    flow = ProcessFlow(5, [(0, 2), (0, 1), (1, 3), (2, 3), (3, 1), (3, 4)])
+
+    np.testing.assert_array_equal(flow.rework_edges, [(3, 1)])
+    np.testing.assert_array_equal(flow.topological_order(), [0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(flow.predecessors(3), [1, 2])
+    np.testing.assert_array_equal(flow.successors(0), [2, 1])
+    assert flow.longest_path([1, 1, 5, 1, 1]) == (8.0, [0, 2, 3, 4])
+
+
+def test_flow_edits_keep_the_order():
+    flow = ProcessFlow(4, [(0, 1), (1, 3), (0, 2), (2, 3)])
+    flow.topological_order()
+
+    flow.insert_step(2, predecessors=[1], successors=[4])
+    order = flow.topological_order()
+    flow.remove_step(0)
+
+    np.testing.assert_array_equal(order, [0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(flow.successors(1), [3])
+    np.testing.assert_array_equal(flow.predecessors(3), [2, 1])
+    np.testing.assert_array_equal(
+        flow.topological_order(),
+        ProcessFlow(flow.count, flow.edges).topological_order(),
+    )
+
+
+def step_urls(numbers):
+    return [f'../upload/archive/step{number}#/data' for number in numbers]
+
+
+def test_process_flow_follows_added_and_removed_steps():
+    process = FabricationProcess(steps=step_urls(range(STEPS)))
+    flow = process.process_flow()
+    flow.topological_order()
+
+    process.steps = step_urls([*range(10), 'new', *range(10, STEPS)])
+    assert process.process_flow() is flow
+    process.steps = step_urls([*range(10), 'new', *range(11, STEPS)])
+    assert process.process_flow() is flow
+
+    assert flow.count == STEPS
+    np.testing.assert_array_equal(flow.topological_order(), np.arange(STEPS))
+    np.testing.assert_array_equal(flow.predecessors(10), [9])
+    assert flow.longest_path()[0] == STEPS
+
+    process.flow_edges = [(0, 2), (1, 2)]
+    assert process.process_flow() is not flow
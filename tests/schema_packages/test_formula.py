@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from schema_packages.formula import (
+    canonicalize_formula,
+    clear_formula_cache,
+    composition_matrices,
+    formula_cache_info,
+    parse_formula,
+)
+
+
+def test_parse_formula_fractions():
+    parsed = parse_formula('SiO2')
+
+    assert parsed.elements == ('Si', 'O')
+    assert parsed.counts == (1, 2)
+    assert parsed.atomic_fractions == pytest.approx((1 / 3, 2 / 3))
+    assert sum(parsed.mass_fractions) == pytest.approx(1)
+    assert parsed.mass_fractions[0] == pytest.approx(0.4674, abs=1e-3)
+
+
+@pytest.mark.parametrize(
+    'formula, elements, counts, charge',
+    [
+        ('Ca3(PO4)2', ('Ca', 'P', 'O'), (3, 2, 8), 0),
+        ('{[(CH3)2]3}2', ('C', 'H'), (12, 36), 0),
+        ('Si0.5Ge0.5', ('Si', 'Ge'), (0.5, 0.5), 0),
+        ('CaSO4.0.5H2O', ('Ca', 'S', 'O', 'H'), (1, 1, 4.5, 1), 0),
+        ('Al2(SO4)3·18H2O·2NH3', ('Al', 'S', 'O', 'H', 'N'), (2, 3, 30, 42, 2), 0),
+        ('[Fe(CN)6]4-', ('Fe', 'C', 'N'), (1, 6, 6), -4),
+        ('SO4^2-', ('S', 'O'), (1, 4), -2),
+        ('NH4+', ('N', 'H'), (1, 4), 1),
+    ],
+)
+def test_parse_formula_syntax(formula, elements, counts, charge):
+    parsed = parse_formula(formula)
+
+    assert parsed.elements == elements
+    assert parsed.counts == counts
+    assert parsed.charge == charge
+
+
+@pytest.mark.parametrize('formula', ['Si(O2', 'SiO2)', 'Si-O', 'Xy2'])
+def test_parse_formula_rejects_invalid_formulas(formula):
+    with pytest.raises(ValueError):
+        parse_formula(formula)
+
+
+def test_formula_cache_is_keyed_on_canonical_formula():
+    clear_formula_cache()
+    assert canonicalize_formula(' CuSO4 · 5H₂O ') == 'CuSO4·5H2O'
+
+    first = parse_formula('CuSO4.5H2O')
+    second = parse_formula('CuSO4 · 5H₂O')
+    info = formula_cache_info()
+
+    assert first is second
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_composition_matrices():
+    formulas = ['SiO2', 'Si3N4', '', 'SiO2']
+    matrices = composition_matrices(formulas)
+
+    assert matrices.counts.shape == (4, 118)
+    # Si3N4: Si (Z = 14) and N (Z = 7) in columns Z - 1
+    assert (matrices.counts[1, 13], matrices.counts[1, 6]) == (3, 4)
+    assert not matrices.atomic_fractions[2].any()
+    np.testing.assert_array_equal(
+        matrices.mass_fractions[0], matrices.mass_fractions[3]
+    )
+    np.testing.assert_allclose(matrices.atomic_fractions.sum(axis=1), [1, 1, 0, 1])
+    for row, formula in enumerate(formulas):
+        parsed = parse_formula(formula)
+        columns = [number - 1 for number in parsed.atomic_numbers]
+        np.testing.assert_allclose(
+            matrices.mass_fractions[row, columns], parsed.mass_fractions
+        )
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+from schema_packages.fabrication_utilities import SampleParenting, StartingMaterial
+from schema_packages.Items import Item
+from schema_packages.lineage import LineageIndex
+
+ITEMS = 400
+ROOTS = 5
+
+
+def random_genealogy(seed):
+    rng = random.Random(seed)
+    genealogy = {}
+    for item in range(ITEMS):
+        count = 0 if item < ROOTS else rng.choice([1, 1, 1, 2])
+        genealogy[f'i{item}'] = [f'i{rng.randrange(item)}' for _ in range(count)]
+    return genealogy
+
+
+def brute_force_descendants(genealogy, item):
+    found = set()
+    for child, parents in genealogy.items():
+        if item in parents:
+            found |= {child} | brute_force_descendants(genealogy, child)
+    return found
+
+
+@pytest.mark.parametrize('incremental', [True, False])
+def test_lineage_matches_brute_force(incremental):
+    genealogy = random_genealogy(0)
+    index = LineageIndex()
+    items = list(genealogy.items())
+    for item, parents in items if incremental else reversed(items):
+        index.add(item, parents)
+
+    for item in ('i0', 'i3', 'i17', 'i150'):
+        expected = brute_force_descendants(genealogy, item)
+        assert set(index.descendants(item)) == expected
+        assert all(index.is_ancestor(item, other) for other in expected)
+        assert not any(
+            index.is_ancestor(item, other) for other in set(genealogy) - expected
+        )
+
+
+def test_lineage_of_items_and_parenting():
+    index = LineageIndex()
+    index.add_section(
+        SampleParenting(
+            inputs=[StartingMaterial(id_item_processed='lot-1')],
+            outputs=[Item(id='W1'), Item(id='W2')],
+        )
+    )
+    for section in (
+        Item(id='W1-a', id_wafer_parent='W1'),
+        Item(id='W2-a', id_wafer_parent='W2'),
+        Item(id='D1', id_wafer_parent='W1-a'),
+        Item(id='B1', isAssembly=True, ids_components=['D1', 'W2-a']),
+    ):
+        index.add_section(section)
+
+    assert index.origins('B1') == ['lot-1']
+    assert index.ancestors('D1') == ['W1-a', 'W1', 'lot-1']
+    assert sorted(index.descendants('W2')) == ['B1', 'W2-a']
+    assert index.is_ancestor('W1', 'B1')
+    assert not index.is_ancestor('W2-a', 'D1')
+
+    index.add('B1', ['X'])
+    assert index.is_ancestor('X', 'B1')
+    index.add('W1', ['B1'])
+    with pytest.raises(ValueError, match='loop'):
+        index.descendants('W1')
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from schema_packages.logs import read_ramp_log
+
+
+@pytest.mark.parametrize(
+    'content, columns',
+    [
+        ('time,T\n0,20\n1,21.5\n2,23\n', ('time', 'T')),
+        ('"t"\t"x"\t"T"\n0\t9\t20\n1\t9\t21.5\n2\t9\t23\n', ('t', 2)),
+        ('# chuck\n\n0 20\n1 21.5\n# pause\n2 23\n', (0, 1)),
+    ],
+)
+def test_read_ramp_log(tmp_path, content, columns):
+    path = tmp_path / 'ramp.log'
+    path.write_text(content)
+
+    log = read_ramp_log(path, *columns, chunk_lines=2)
+
+    np.testing.assert_array_equal(log.time, [0, 1, 2])
+    np.testing.assert_array_equal(log.values, [20, 21.5, 23])
+
+
+def test_read_ramp_log_rejects_unknown_columns(tmp_path):
+    path = tmp_path / 'ramp.csv'
+    path.write_text('time,T\n0,20\n')
+
+    with pytest.raises(ValueError):
+        read_ramp_log(path, 'time', 'pressure')
@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+from nomad.units import ureg
+from schema_packages.fabrication_utilities import FabricationProcess
+from schema_packages.process_diff import align, diff_processes, same_value
+from schema_packages.steps.transform import ThermalOxidation
+
+LENGTH = 80
+SYMBOLS = 'abcd'
+
+
+def lcs_length(before, after):
+    lengths = [[0] * (len(after) + 1) for _ in range(len(before) + 1)]
+    for i, old in enumerate(before):
+        for j, new in enumerate(after):
+            lengths[i + 1][j + 1] = (
+                lengths[i][j] + 1
+                if old == new
+                else max(lengths[i][j + 1], lengths[i + 1][j])
+            )
+    return lengths[-1][-1]
+
+
+def test_alignment_is_a_longest_common_subsequence():
+    rng = random.Random(0)
+    for _ in range(20):
+        before = [rng.choice(SYMBOLS) for _ in range(LENGTH)]
+        after = [rng.choice(SYMBOLS) for _ in range(rng.randrange(LENGTH))]
+        pairs = align(before, after, band=LENGTH)
+        assert all(before[i] == after[j] for i, j in pairs)
+        assert all(a < b for a, b in zip(pairs, pairs[1:]))
+        assert len(pairs) == lcs_length(before, after)
+
+
+def oxidation(recipe, minutes=30):
+    return ThermalOxidation(
+        name=recipe,
+        recipe_name=recipe,
+        duration_target=minutes * ureg.minute,
+    )
+
+
+def test_diff_of_a_golden_flow_and_a_reworked_lot():
+    golden = FabricationProcess(
+        steps=[oxidation(recipe) for recipe in ('clean', 'oxide', 'litho', 'etch')]
+    )
+    lot = FabricationProcess(
+        steps=[
+            oxidation('clean'),
+            oxidation('oxide', 35),
+            oxidation('litho'),
+            oxidation('strip'),
+            oxidation('litho'),
+            oxidation('etch'),
+        ]
+    )
+
+    differences = diff_processes(golden, lot)
+
+    assert [(d.kind, d.before, d.after) for d in differences] == [
+        ('equal', 0, 0),
+        ('changed', 1, 1),
+        ('equal', 2, 2),
+        ('inserted', None, 3),
+        ('inserted', None, 4),
+        ('equal', 3, 5),
+    ]
+    (delta,) = differences[1].deltas
+    assert delta.path == 'duration_target'
+    assert delta.difference == 5 * ureg.minute
+
+
+def test_values_are_compared_directly():
+    assert same_value(1 * ureg.um, 1000 * ureg.nm)
+    assert not same_value(1 * ureg.um, 1 * ureg.nm)
+    assert not same_value(1 * ureg.um, 1 * ureg.s)
+    assert not same_value(1 * ureg.um, 1.0)
+    assert same_value(np.array([1.0, np.nan]), np.array([1.0, np.nan]))
+    assert same_value('Si3N4', 'Si3N4')
+    assert not same_value('Si3N4', None)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from nomad.client import normalize_all
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.units import ureg
+from schema_packages.profiles import piecewise_profile, ramp_behavior, ramp_profile
+from schema_packages.utils import TimeRampPressure
+
+POINTS = 11
+
+
+@pytest.mark.parametrize('behavior', ['linear(uniform)', 'Exponential', 'sigmoidal'])
+def test_ramp_profile_goes_from_start_to_end(behavior):
+    time, values = ramp_profile(20, 400, 60, behavior, points=POINTS)
+
+    assert len(time) == len(values) == POINTS
+    assert (time[0], time[-1]) == (0, 60)
+    assert values[0] == pytest.approx(20)
+    assert values[-1] == pytest.approx(400)
+    assert np.all(np.diff(values) > 0)
+
+
+def test_piecewise_profile_joins_segments():
+    durations = [60, 120, 300]
+    time, values = piecewise_profile(
+        [20, 400, 400], [400, 400, 20], durations, ['', 'linear', 'exp'], POINTS
+    )
+
+    assert len(time) == 3 * POINTS - 2
+    assert np.all(np.diff(time) > 0)
+    assert time[-1] == sum(durations)
+    np.testing.assert_allclose(values[POINTS - 1 : 2 * POINTS - 1], 400)
+
+
+def test_ramp_behavior_rejects_unknown_behaviors():
+    with pytest.raises(ValueError):
+        ramp_behavior('parabolic')
+
+
+def test_ramp_profile_is_generated_in_the_units_of_the_ramp():
+    ramp = TimeRampPressure(
+        start_value=1 * ureg.bar,
+        end_value=10 * ureg.mbar,
+        increment_duration=2 * ureg.minute,
+        profile_points=5,
+    )
+    archive = EntryArchive(data=ramp, metadata=EntryMetadata())
+    normalize_all(archive)
+
+    assert ramp.values_from_profile
+    assert ramp.time.to('s').magnitude.tolist() == [0, 30, 60, 90, 120]
+    np.testing.assert_allclose(ramp.values.to('mbar').magnitude[[0, -1]], [1000, 10])
+
+    ramp.end_value = 100 * ureg.mbar
+    normalize_all(archive)
+    assert ramp.values[-1].to('mbar').magnitude == pytest.approx(100)
@@ -0,0 +1,175 @@
+import json
+
+from nomad.client import normalize_all
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.datamodel.context import Context
+from schema_packages.fabrication_utilities import (
+    Equipment,
+    EquipmentReference,
+    FabricationProcess,
+    equipment_snapshot,
+)
+from schema_packages.references import (
+    DirectoryBackend,
+    archive_request,
+    pending_references,
+    prefetch_references,
+)
+
+STEPS = 300
+STEP = 'schema_packages.fabrication_utilities.FabricationProcessStep'
+EQUIPMENT = 'schema_packages.fabrication_utilities.Equipment'
+
+
+def write_archive(directory, entry_id, data):
+    path = directory / f'{entry_id}.archive.json'
+    path.write_text(json.dumps({'data': data}))
+
+
+def process_archive(process, backend):
+    context = Context()
+    context.archive_backend = backend
+    return EntryArchive(
+        data=process,
+        m_context=context,
+        metadata=EntryMetadata(upload_id='u', entry_id='process'),
+    )
+
+
+def test_steps_are_loaded_in_one_read(tmp_path):
+    for step in range(STEPS):
+        write_archive(tmp_path, f'step{step}', {'m_def': STEP, 'name': f'{step}'})
+    backend = DirectoryBackend(tmp_path)
+    urls = [f'../upload/archive/step{step}#/data' for step in range(STEPS)]
+    process = FabricationProcess(steps=urls + urls[:10])
+    process_archive(process, backend)
+
+    steps = process.load_steps(backend)
+
+    assert backend.reads == 1
+    assert [step.name for step in steps] == [
+        f'{n}' for n in [*range(STEPS), *range(10)]
+    ]
+    assert pending_references(process) == []
+
+
+class BareContext:
+    """
+    Context without the URL parsing and the archive cache of nomad's Context.
+    """
+
+
+def test_references_are_left_to_contexts_without_url_parsing(tmp_path):
+    write_archive(tmp_path, 'step', {'m_def': STEP, 'name': 'step'})
+    backend = DirectoryBackend(tmp_path)
+    url = '../upload/archive/step'
+    process = FabricationProcess(steps=[f'{url}#/data'])
+    EntryArchive(
+        data=process,
+        m_context=BareContext(),
+        metadata=EntryMetadata(upload_id='u', entry_id='process'),
+    )
+
+    assert archive_request(BareContext(), url) is None
+    assert prefetch_references(process, backend) == 0
+    assert backend.reads == 0
+    assert len(pending_references(process)) == 1
+    assert archive_request(Context(), url).entry_id == 'step'
+
+
+def test_equipment_references_are_prefetched(tmp_path):
+    for name in ('etcher', 'furnace'):
+        write_archive(tmp_path, name, {'m_def': EQUIPMENT, 'name': name})
+    backend = DirectoryBackend(tmp_path)
+    process = FabricationProcess(
+        instruments=[
+            EquipmentReference(section=f'../upload/archive/{name}#/data')
+            for name in ('etcher', 'furnace', 'etcher')
+        ]
+    )
+
+    normalize_all(process_archive(process, backend))
+
+    assert backend.reads == 1
+    assert [i.name for i in process.instruments] == ['etcher', 'furnace', 'etcher']
+
+
+def test_equipment_references_keep_a_snapshot(tmp_path):
+    for name, lab_id in (('etcher', 'E1'), ('furnace', 'F1')):
+        write_archive(
+            tmp_path,
+            name,
+            {'m_def': EQUIPMENT, 'name': name, 'lab_id': lab_id, 'is_bookable': True},
+        )
+    backend = DirectoryBackend(tmp_path)
+    process = FabricationProcess(
+        instruments=[
+            EquipmentReference(section=f'../upload/archive/{name}#/data')
+            for name in ('etcher', 'furnace', 'etcher', 'missing')
+        ]
+    )
+    archive = process_archive(process, backend)
+
+    normalize_all(archive)
+
+    etcher, furnace, again, missing = process.instruments
+    assert len(archive.m_cache['resolved_equipment']) == 3
+    assert (etcher.id, etcher.snapshot.lab_id, etcher.snapshot.is_bookable) == (
+        'E1',
+        'E1',
+        True,
+    )
+    assert (furnace.name, furnace.id, furnace.snapshot.lab_id) == (
+        'furnace',
+        'F1',
+        'F1',
+    )
+    assert etcher.snapshot.equipment_type == 'Equipment'
+    assert again.snapshot.version == etcher.snapshot.version
+    assert furnace.snapshot.version != etcher.snapshot.version
+    assert missing.snapshot is None
+
+
+class WarningLogger:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, event, **kwargs):
+        self.warnings.append(event)
+
+
+def test_missing_equipment_is_reported_without_raising(tmp_path):
+    reference = EquipmentReference(section='../upload/archive/missing#/data')
+    archive = process_archive(
+        FabricationProcess(instruments=[reference]), DirectoryBackend(tmp_path)
+    )
+    logger = WarningLogger()
+
+    reference.normalize(archive, logger)
+
+    assert reference.snapshot is None
+    assert logger.warnings == ['could not resolve the referenced equipment']
+
+
+def test_resolved_equipment_of_different_entries_are_cached_apart():
+    archives = [
+        EntryArchive(
+            data=Equipment(name=name, lab_id=name),
+            metadata=EntryMetadata(upload_id='u', entry_id=name),
+        )
+        for name in ('etcher', 'furnace')
+    ]
+    process = process_archive(FabricationProcess(), None)
+
+    names = [equipment_snapshot(process, archive.data)['name'] for archive in archives]
+
+    assert names == ['etcher', 'furnace']
+
+
+def test_snapshot_version_follows_the_equipment():
+    equipment = Equipment(name='etcher', lab_id='E1')
+    version = equipment_snapshot(None, equipment)['version']
+
+    assert equipment_snapshot(None, equipment)['version'] == version
+    equipment.product_model = 'Plasmalab 100'
+    assert equipment_snapshot(None, equipment)['version'] != version
@@ -0,0 +1,98 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from nomad.units import ureg
+from schema_packages.fabrication_utilities import (
+    Equipment,
+    EquipmentReference,
+    FabricationProcess,
+    Jobdone,
+)
+from schema_packages.flow import ProcessFlow
+from schema_packages.scheduling import compile_route, schedule, simulate
+from schema_packages.steps.transform import ThermalOxidation
+
+START = datetime(2024, 5, 6, 8, tzinfo=timezone.utc)
+LOTS = 200
+STEPS = 20
+TOOLS = 25
+
+
+def route(durations, tools):
+    return compile_route(durations, tools, ProcessFlow(len(durations)))
+
+
+@pytest.mark.parametrize(
+    'rule, completion',
+    [('fifo', [70, 80]), ('spt', [40, 80]), ('critical_ratio', [70, 80])],
+)
+def test_dispatch_rules(rule, completion):
+    routes = [route([30, 10], [[0], [0]])] * 2
+
+    result = simulate(routes, 1, rule)
+
+    np.testing.assert_allclose(result.completion, completion)
+    np.testing.assert_allclose(result.utilization, [1.0])
+    assert result.makespan == 80
+
+
+def test_bookings_and_steps_without_tools():
+    routes = [route([10, 5], [[0], []])]
+
+    result = simulate(routes, 1, bookings=[[(5, 15)]])
+
+    np.testing.assert_allclose(result.start, [15, 25])
+    assert result.tool.tolist() == [0, -1]
+    np.testing.assert_allclose(result.cycle_times, [30])
+
+
+def test_schedule_of_processes_on_equipment():
+    tools = [
+        Equipment(lab_id='furnace-1', is_bookable=True),
+        Equipment(
+            lab_id='furnace-2',
+            is_bookable=True,
+            equipmentLogBook=[
+                Jobdone(
+                    starting_date=START - timedelta(minutes=30),
+                    ending_date=START + timedelta(minutes=30),
+                )
+            ],
+        ),
+        Equipment(lab_id='hood', is_bookable=False),
+    ]
+    step = ThermalOxidation(
+        duration_target=20 * ureg.minute,
+        instruments=[
+            EquipmentReference(id='furnace-1'),
+            EquipmentReference(id='furnace-2'),
+            EquipmentReference(id='hood'),
+        ],
+    )
+    process = FabricationProcess(steps=[step])
+
+    result = schedule([process] * 3, tools, start=START)
+
+    assert result.tool.tolist() == [0, 0, 1]
+    np.testing.assert_allclose(result.completion, [20, 40, 50])
+
+
+def test_simulation_of_many_lots():
+    rng = random.Random(0)
+    routes = [
+        route(
+            [rng.uniform(5, 30) for _ in range(STEPS)],
+            [rng.sample(range(TOOLS), 2) for _ in range(STEPS)],
+        )
+        for _ in range(10)
+    ]
+    lots = [routes[lot % len(routes)] for lot in range(LOTS)]
+    releases = np.sort(np.random.default_rng(0).uniform(0, 30 * 24 * 60, LOTS))
+
+    for rule in ('fifo', 'critical_ratio'):
+        result = simulate(lots, TOOLS, rule, releases=releases)
+
+        assert len(result.start) == LOTS * STEPS
+        assert np.all(result.cycle_times > 0)
@@ -9,4 +9,45 @@ def test_schema_package():
     normalize_all(entry)
     el = entry.data.synthesis_steps[0].fluximeters[0].elemental_composition[0].element
 
-    assert el is not None
\ No newline at end of file
+    assert el is not None
+
+
+def test_elemental_composition_is_patched_in_place():
+    test_file = os.path.join('tests', 'data', 'icp.archive.yaml')
+    entry = parse(test_file)[0]
+    normalize_all(entry)
+    chemical = entry.data.synthesis_steps[0].fluximeters[0]
+    sulfur = chemical.elemental_composition[0]
+
+    normalize_all(entry)
+    assert chemical.elemental_composition[0] is sulfur
+
+    chemical.chemical_formula = 'SO2'
+    normalize_all(entry)
+    assert chemical.elemental_composition[0] is sulfur
+    assert [el.element for el in chemical.elemental_composition] == ['S', 'O']
+    assert sulfur.atomic_fraction == 1 / 3
+
+
+def test_edited_elemental_composition_is_rebuilt():
+    test_file = os.path.join('tests', 'data', 'icp.archive.yaml')
+    entry = parse(test_file)[0]
+    normalize_all(entry)
+    element = entry.data.synthesis_steps[0].fluximeters[0].elemental_composition[0]
+    fraction = element.atomic_fraction
+
+    element.atomic_fraction = 0.5
+    normalize_all(entry)
+
+    assert element.atomic_fraction == fraction
+
+
+def test_ramp_is_read_from_data_file():
+    test_file = os.path.join('tests', 'data', 'ramp.archive.yaml')
+    entry = parse(test_file)[0]
+    normalize_all(entry)
+    ramp = entry.data
+
+    assert ramp.time.to('s').magnitude.tolist() == [0, 60, 120, 180]
+    assert ramp.values.to('celsius').magnitude.tolist() == [20.1, 118.4, 219.7, 301.2]
+    assert ramp.figures[0].label == 'Ramp of temperature'
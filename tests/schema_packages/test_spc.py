@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.units import ureg
+from schema_packages.fabrication_utilities import EquipmentReference
+from schema_packages.spc import ControlChart, RunningStatistics, SPCAggregator, SPCKey
+from schema_packages.steps.add.synthesis.CVD import PECVD
+from schema_packages.steps.remove.etching.dry_etching import ICP_RIE, RIE
+
+BASELINE = 10
+RUNS = 30
+
+
+def test_running_statistics_match_numpy():
+    values = np.random.default_rng(0).normal(100, 5, 1000)
+    statistics = RunningStatistics()
+    for value in values:
+        statistics.add(value)
+
+    assert statistics.count == len(values)
+    assert statistics.mean == pytest.approx(values.mean())
+    assert statistics.variance == pytest.approx(values.var(ddof=1))
+
+
+def test_running_statistics_merge_arrays():
+    values = np.random.default_rng(0).normal(100, 5, 1000)
+    statistics = RunningStatistics()
+    statistics.add(values[0])
+    for chunk in np.array_split(values[1:], 7):
+        statistics.add_values(chunk)
+    statistics.add_values([])
+
+    assert statistics.count == len(values)
+    assert statistics.mean == pytest.approx(values.mean())
+    assert statistics.variance == pytest.approx(values.var(ddof=1))
+
+
+def test_control_chart_flags_a_shift():
+    chart = ControlChart(baseline_runs=BASELINE)
+    values = 100 + np.random.default_rng(1).normal(0, 1, RUNS)
+    values[BASELINE + 10 :] += 5
+    rules = [chart.add(value) for value in values]
+
+    assert not any(rules[: BASELINE + 10])
+    assert 'one beyond 3 sigma' in rules[BASELINE + 10]
+    assert 'CUSUM' in rules[-1]
+    assert 'eight on one side' in rules[-1]
+
+
+@pytest.mark.parametrize('value, flagged', [(104, False), (105, True)])
+def test_ewma_limit_of_the_first_monitored_run(value, flagged):
+    # center 100 and sigma sqrt(2): after one run the EWMA limit is
+    # 3 sigma sqrt(w / (2 - w) (1 - (1 - w)^2)) = 0.849, the EWMA 100 + w (value - 100)
+    chart = ControlChart(baseline_runs=2)
+    chart.add(99)
+    chart.add(101)
+
+    assert ('EWMA' in chart.add(value)) == flagged
+
+
+def etching_archive(step_class, recipe, equipment, rate):
+    step = step_class(
+        recipe_name=recipe,
+        etching_rate_target=rate * ureg('nm/minute'),
+        instruments=[EquipmentReference(id=equipment)],
+    )
+    return EntryArchive(data=step, metadata=EntryMetadata())
+
+
+def test_aggregator_groups_runs_by_recipe_and_equipment():
+    archives = [
+        etching_archive(RIE, 'SiO2', 'etcher-1', 50),
+        etching_archive(ICP_RIE, 'SiO2', 'etcher-1', 54),
+        etching_archive(RIE, 'SiO2', 'etcher-2', 70),
+        EntryArchive(
+            data=PECVD(
+                recipe_name='SiN',
+                deposition_rate_target=20 * ureg('nm/minute'),
+                instruments=[EquipmentReference(name='pecvd')],
+            ),
+            metadata=EntryMetadata(),
+        ),
+        EntryArchive(data=RIE(), metadata=EntryMetadata()),
+    ]
+
+    aggregator = SPCAggregator(baseline_runs=BASELINE).add_archives(archives)
+    key = SPCKey('SiO2', 'etcher-1', 'etching_rate_target')
+    figures = aggregator.figures()
+
+    assert set(aggregator.charts) == {
+        key,
+        SPCKey('SiO2', 'etcher-2', 'etching_rate_target'),
+        SPCKey('SiN', 'pecvd', 'deposition_rate_target'),
+    }
+    np.testing.assert_allclose(aggregator.charts[key].values, [50, 54])
+    assert [trace['name'] for trace in figures[key]['data']] == [
+        'runs',
+        'EWMA',
+        'violations',
+    ]
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from schema_packages.fabrication_utilities import Equipment, Jobdone
+from schema_packages.utilization import ToolUtilization, UtilizationAggregator
+
+START = datetime(2024, 5, 6, tzinfo=timezone.utc)
+JOBS = 5000
+
+
+def test_jobs_are_split_over_windows():
+    tool = ToolUtilization(window=60)
+    tool.add_jobs([10, 20, 100], [30, 50, 250], [1, 2, 3])
+
+    assert tool.window_starts.tolist() == [0, 60, 120, 180, 240]
+    np.testing.assert_allclose(tool.busy, [40, 20, 60, 60, 10])
+    np.testing.assert_allclose(tool.throughput, [48, 0, 0, 0, 24])
+    np.testing.assert_allclose(tool.items, [3, 0, 0, 0, 3])
+    np.testing.assert_allclose(tool.gap_max, [0, 50, 0, 0, 0])
+    assert tool.gaps.count == 1
+
+
+def job(start, end, items=()):
+    return Jobdone(
+        starting_date=START + timedelta(minutes=start),
+        ending_date=START + timedelta(minutes=end),
+        id_items_processed=list(items),
+    )
+
+
+def test_logbooks_of_sections_and_archives_agree():
+    jobs = [job(0, 90, [1]), job(120, 200, [2, 3]), job(1500, 1600), job(3000, 3100)]
+    archive = {
+        'data': {
+            'lab_id': 'etcher',
+            'equipmentLogBook': [
+                {
+                    'starting_date': record.starting_date.isoformat(),
+                    'ending_date': record.ending_date.isoformat(),
+                    'id_items_processed': list(record.id_items_processed),
+                }
+                for record in jobs
+            ],
+        }
+    }
+
+    sections = UtilizationAggregator().add_equipment(
+        Equipment(lab_id='etcher', equipmentLogBook=jobs)
+    )
+    archives = UtilizationAggregator().add_archives([archive, {'data': {}}])
+
+    tool, other = sections.tools['etcher'], archives.tools['etcher']
+    np.testing.assert_allclose(tool.busy, other.busy)
+    np.testing.assert_allclose(tool.busy, [170, 100, 100])
+    np.testing.assert_allclose(tool.items, [3, 0, 0])
+    assert tool.gaps.mean == pytest.approx((30 + 1300 + 1400) / 3)
+    assert set(sections.figures()) == {'etcher'}
+
+
+def test_streaming_a_long_logbook():
+    rng = np.random.default_rng(0)
+    durations = rng.uniform(5, 120, JOBS)
+    steps = np.cumsum(durations + rng.uniform(0, 60, JOBS))
+    starts = np.concatenate(([0.0], steps[:-1]))
+    records = (
+        {
+            'starting_date': START + timedelta(minutes=float(start)),
+            'ending_date': START + timedelta(minutes=float(start + duration)),
+        }
+        for start, duration in zip(starts, durations)
+    )
+    tool = ToolUtilization()
+
+    tool.add_records(records, chunk=1000)
+
+    assert tool.busy.sum() == pytest.approx(durations.sum())
+    assert tool.arrays['jobs'].sum() == JOBS